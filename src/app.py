@@ -1,17 +1,37 @@
 
+import os
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 import streamlit as st
-from src.models.entities import WashingMachine, Task, Context, MachineType, TaskLengthCategory, DueDateCategory
-from src.models.lp_model import solve_scheduling_problem
-import plotly.figure_factory as ff
+from src.models.entities import WashingMachine, Task, Context, MachineType, TaskLengthCategory, DueDateCategory, SolverConfig, Job, Operation
+from src.models.analysis import analyze
+from src.models.tables import DUE_CATEGORIES, MACHINE_TYPES, TaskTable
+from src.models.calendars import format_windows, normalize_windows
+from src.data.file_io import read_machines, read_tasks, schedule_to_frame
+from src.profiling import MemorySink, PhaseProfiler
+from src.cache import ScheduleCache
+from src.visualize_gantt import gantt_figure
+import numpy as np
 from datetime import datetime, timedelta
 
 st.set_page_config(page_title="Wash Scheduler", layout="wide")
 st.title("Wash Scheduler")
 
 
+@st.cache_resource
+def schedule_cache():
+    """
+    One schedule cache for all sessions and reruns; set WASH_SCHEDULER_CACHE_DIR to keep it on disk.
+    """
+    return ScheduleCache(
+        max_entries=32,
+        directory=os.environ.get("WASH_SCHEDULER_CACHE_DIR"),
+        max_bytes=256 * 2**20,
+        max_age_seconds=7 * 24 * 3600,
+    )
+
+
 # Sidebar: Add machines and scheduling horizon
 st.sidebar.header("Machines")
 machine_types = [e.value for e in MachineType]
@@ -23,9 +43,23 @@ if st.sidebar.button("Add Drier"):
     st.session_state["machines"].append(WashingMachine(id=f"M{len(st.session_state['machines'])+1}", type=MachineType.DRIER))
 if st.sidebar.button("Add Iron"):
     st.session_state["machines"].append(WashingMachine(id=f"M{len(st.session_state['machines'])+1}", type=MachineType.IRON))
+machines_file = st.sidebar.file_uploader("Load machines (id, type, downtime)", type=["csv", "jsonl", "parquet"])
+if machines_file is not None and st.session_state.get("machines_file") != machines_file.name:
+    st.session_state["machines"] = read_machines(machines_file).to_machines()
+    st.session_state["machines_file"] = machines_file.name
 st.sidebar.write("Current machines:")
 for m in st.session_state["machines"]:
-    st.sidebar.write(f"{m.id}: {m.type.value}")
+    downtime = f" (down {format_windows(m.downtime)})" if m.downtime else ""
+    st.sidebar.write(f"{m.id}: {m.type.value}{downtime}")
+if st.session_state["machines"]:
+    with st.sidebar.form("downtime_form"):
+        down_machine = st.selectbox("Machine", [m.id for m in st.session_state["machines"]])
+        down_from = st.number_input("Down from hour", min_value=0, value=0, step=1)
+        down_to = st.number_input("Down until hour", min_value=1, value=1, step=1)
+        if st.form_submit_button("Add downtime") and down_to > down_from:
+            for m in st.session_state["machines"]:
+                if m.id == down_machine:
+                    m.downtime = list(normalize_windows(m.downtime + [(int(down_from), int(down_to))]))
 
 # Sidebar: Scheduling horizon (number of days)
 if "num_days" not in st.session_state:
@@ -35,6 +69,18 @@ st.sidebar.header("Scheduling Horizon")
 num_days = st.sidebar.number_input("Number of days to schedule", min_value=1, value=st.session_state["num_days"])
 st.session_state["num_days"] = num_days
 
+# Sidebar: Solver settings
+st.sidebar.write("")
+st.sidebar.header("Solver")
+time_limit = st.sidebar.number_input("Time limit (s, 0 = none)", min_value=0.0, value=10.0, step=1.0)
+num_workers = st.sidebar.number_input("Search workers (0 = all cores)", min_value=0, value=0)
+gap_limit = st.sidebar.number_input("Relative gap limit (0 = prove optimum)", min_value=0.0, max_value=1.0, value=0.0, step=0.01)
+random_seed = st.sidebar.number_input("Random seed", min_value=0, value=0)
+first_objective = st.sidebar.selectbox("Minimize", ["tardiness", "weighted_tardiness", "late_count"])
+then_objective = st.sidebar.selectbox("Then, at that optimum, minimize", ["nothing", "makespan", "idle", "late_count", "tardiness"])
+show_log = st.sidebar.checkbox("Show solver log")
+show_stats = st.sidebar.checkbox("Show run statistics")
+
 # Main: Add tasks
 st.header("Tasks")
 if "tasks" not in st.session_state:
@@ -66,6 +112,7 @@ with st.form("add_task_form"):
             options=list(DueDateCategory),
             format_func=lambda c: {DueDateCategory.H12: "12h", DueDateCategory.H24: "24h", DueDateCategory.WEEK: "1 week"}[c]
         )
+    full_order = st.checkbox("Full order: wash, then dry, then iron (type is ignored)")
     submitted = st.form_submit_button("Add Task")
     if submitted:
         # Map due category to due_time in hours
@@ -76,89 +123,169 @@ with st.form("add_task_form"):
         else:
             due_time = arrival_time + 7 * 24
         due_time = min(due_time, horizon_hours - 1)
-        t = Task(
-            id=f"T{len(st.session_state['tasks'])+1}",
-            arrival_time=arrival_time,
-            length=length,
-            required_type=MachineType(required_type),
-            required_count=required_count,
-            due=due_category,
-            due_time=due_time,
-        )
-        st.session_state["tasks"].append(t)
+        if full_order:
+            job = Job(
+                id=f"J{len(st.session_state['tasks'])+1}",
+                arrival_time=arrival_time,
+                due=due_category,
+                due_time=due_time,
+                operations=[
+                    Operation(length=length, required_type=machine_type, required_count=required_count)
+                    for machine_type in (MachineType.WASHER, MachineType.DRIER, MachineType.IRON)
+                ],
+            )
+            st.session_state["tasks"].extend(job.to_tasks())
+        else:
+            t = Task(
+                id=f"T{len(st.session_state['tasks'])+1}",
+                arrival_time=arrival_time,
+                length=length,
+                required_type=MachineType(required_type),
+                required_count=required_count,
+                due=due_category,
+                due_time=due_time,
+            )
+            st.session_state["tasks"].append(t)
+
+tasks_file = st.file_uploader("Load tasks from file", type=["csv", "jsonl", "parquet"])
+if tasks_file is not None and st.session_state.get("tasks_file") != tasks_file.name:
+    try:
+        st.session_state["task_table"] = read_tasks(tasks_file)
+        st.session_state["tasks_file"] = tasks_file.name
+    except ValueError as error:
+        st.error(str(error))
 
 if st.button("Clear Tasks"):
     st.session_state["tasks"] = []
+    st.session_state["task_table"] = None
 
 st.write("### Current Tasks")
+uploaded_tasks = st.session_state.get("task_table")
+if uploaded_tasks is not None:
+    st.write(f"{len(uploaded_tasks)} tasks loaded from {st.session_state['tasks_file']}")
 for t in st.session_state["tasks"]:
-    st.write(f"{t.id}: Arrive {t.arrival_time}h, Length {t.length.name} ({t.length.value}h), Type {t.required_type.value}, # {t.required_count}, Due {t.due.name} ({t.due_time}h)")
+    after = f", after {t.predecessor}" if t.predecessor else ""
+    st.write(f"{t.id}: Arrive {t.arrival_time}h, Length {t.length.name} ({t.length.value}h), Type {t.required_type.value}, # {t.required_count}, Due {t.due.name} ({t.due_time}h){after}")
 
 # Optimize and visualize
 if st.button("Optimize & Visualize"):
-    if not st.session_state["machines"] or not st.session_state["tasks"]:
+    task_tables = [TaskTable.from_tasks(st.session_state["tasks"])]
+    if uploaded_tasks is not None:
+        task_tables.append(uploaded_tasks)
+    all_tasks = TaskTable.concat(task_tables)
+    if not st.session_state["machines"] or not len(all_tasks):
         st.error("Please add at least one machine and one task.")
     else:
+        # Loaded on the first solve, not with the page (OR-Tools in particular)
+        import time
+        import pandas as pd
+        from dataclasses import replace
+        from src.models.anytime import solve_anytime
         # Set horizon for all tasks (end of scheduling window)
         horizon = int(st.session_state["num_days"]) * 24
-        for t in st.session_state["tasks"]:
-            t.due_time = min(t.due_time, horizon)
-        context = Context(machines=st.session_state["machines"], tasks=st.session_state["tasks"])
-        import time
+        all_tasks.due_time = np.minimum(all_tasks.due_time, horizon)
+        solver_log = []
+        solver_config = SolverConfig(
+            max_time_in_seconds=time_limit or None,
+            num_search_workers=int(num_workers),
+            relative_gap_limit=gap_limit or None,
+            random_seed=int(random_seed),
+            log_callback=solver_log.append if show_log else None,
+        )
+        stats_sink = MemorySink()
+        machine_ids = [m.id for m in st.session_state["machines"]]
+        context = Context(
+            machines=st.session_state["machines"],
+            tasks=all_tasks,
+            solver_config=solver_config,
+            objectives=[first_objective] + ([then_objective] if then_objective not in ("nothing", first_objective) else []),
+            profiler=PhaseProfiler([stats_sink]) if show_stats else None,
+            cache=schedule_cache(),
+        )
+        # Machine hours needed against those available within the scheduled days
+        analysis = analyze(replace(context, horizon=horizon))
+        with st.expander("Capacity check", expanded=bool(analysis.infeasible)):
+            st.dataframe(pd.DataFrame(analysis.load).T, use_container_width=True)
+            st.write(f"**Lower bound on the total lateness:** {analysis.lateness_bound}")
+            for reason in analysis.infeasible:
+                st.warning(reason)
         start_time = time.time()
-        result = solve_scheduling_problem(context)
+        st.subheader("Live Search")
+        live_stats = st.empty()
+        live_chart = st.empty()
+        result = None
+        # Show each improving schedule as soon as the solver finds it
+        for update in solve_anytime(context):
+            result = update["schedule"]
+            if not isinstance(result, dict):
+                break
+            bound = "-" if update["bound"] is None else f"{update['bound']:.0f}"
+            live_stats.write(
+                f"**{update['status']}** {context.objectives[update['stage']]} {update['objective']:.0f}, "
+                f"bound {bound}, after {update['wall_time']:.2f} s"
+            )
+            live_chart.plotly_chart(gantt_figure(result, machine_ids), use_container_width=True)
         solve_time = time.time() - start_time
+        live_chart.empty()
         if isinstance(result, dict):
-            base_time = datetime(2025, 1, 1, 0, 0, 0)
-            gantt_tasks = []
-            num_delayed = 0
-            for task_id, info in result.items():
-                start = base_time + timedelta(hours=info["start"])
-                end = base_time + timedelta(hours=info["end"])
-                if info["late"] > 0:
-                    num_delayed += 1
-                machine = info.get("machine", "N/A")
-                gantt_tasks.append(dict(Task=machine, Start=start, Finish=end, Resource=task_id, Description=f"Task ID: {task_id}"))
-            # Solution stats
-            st.subheader("Solution Stats")
-            st.write(f"**Solution value (total lateness):** {sum(info['late'] for info in result.values())}")
-            st.write(f"**Solution time:** {solve_time:.2f} seconds")
-            st.write(f"**Number of tasks scheduled:** {len(result)}")
-            st.write(f"**Number of tasks delayed:** {num_delayed}")
-            # Gantt chart
-            fig = ff.create_gantt(
-                gantt_tasks,
-                index_col="Task",  # Each row is a machine
-                show_colorbar=True,
-                group_tasks=True,
-                showgrid_x=True,
-                showgrid_y=True,
-                title="Schedule (Start: Jan 1st, 2025, Tasks as bars, Machines as rows)",
+            # Kept in the session, so moving the chart window or paging the table does not solve again
+            base_time = pd.Timestamp(2025, 1, 1)
+            schedule = schedule_to_frame(result)
+            length_labels = {int(c.value): f"{c.name} ({c.value}h)" for c in TaskLengthCategory}
+            df = pd.DataFrame({
+                "TaskID": all_tasks.id,
+                "Arrival": all_tasks.arrival_time,
+                "Length": pd.Series(all_tasks.length).map(length_labels),
+                "Type": [MACHINE_TYPES[code].value for code in all_tasks.type_code.tolist()],
+                "# Machines": all_tasks.required_count,
+                "Due": [f"{DUE_CATEGORIES[code].name} ({due}h)" for code, due in zip(all_tasks.due_code.tolist(), all_tasks.due_time.tolist())],
+            }).merge(schedule, left_on="TaskID", right_on="task_id", how="left")
+            df["Scheduled Start"] = (base_time + pd.to_timedelta(df["start"], unit="h")).dt.strftime("%b %d %H:%M")
+            df["Scheduled End"] = (base_time + pd.to_timedelta(df["end"], unit="h")).dt.strftime("%b %d %H:%M")
+            df = df.rename(columns={"late": "Late", "machines": "Machines"}).drop(columns=["task_id", "start", "end"])
+            st.session_state["solution"] = dict(
+                result=result, machine_ids=machine_ids, solve_time=solve_time, table=df, csv=schedule.to_csv(index=False),
+                bound=analysis.lateness_bound,
             )
-            st.plotly_chart(fig, use_container_width=True)
-            # Table of tasks
-            import pandas as pd
-            st.subheader("Task Schedule Table")
-            table_data = []
-            base_time = datetime(2025, 1, 1, 0, 0, 0)
-            for t in st.session_state["tasks"]:
-                sched = result.get(t.id, {})
-                start_val = sched.get("start", None)
-                end_val = sched.get("end", None)
-                start_time = (base_time + timedelta(hours=start_val)).strftime("%b %d %H:%M") if isinstance(start_val, (int, float)) else "-"
-                end_time = (base_time + timedelta(hours=end_val)).strftime("%b %d %H:%M") if isinstance(end_val, (int, float)) else "-"
-                table_data.append({
-                    "TaskID": t.id,
-                    "Arrival": t.arrival_time,
-                    "Length": f"{t.length.name} ({t.length.value}h)",
-                    "Type": t.required_type.value,
-                    "# Machines": t.required_count,
-                    "Due": f"{t.due.name} ({t.due_time}h)",
-                    "Scheduled Start": start_time,
-                    "Scheduled End": end_time,
-                    "Late": sched.get("late", "-"),
-                })
-            df = pd.DataFrame(table_data)
-            st.dataframe(df, use_container_width=True)
         else:
-            st.error("No feasible solution found.")
+            st.session_state["solution"] = None
+            st.error(result or "No feasible solution found.")
+        if show_log:
+            with st.expander("Solver log"):
+                st.code("\n".join(solver_log) or "No log output (solution taken from the greedy fallback).")
+        if show_stats and stats_sink.last is not None:
+            # Tells whether a slow run comes from building a large model or from the search itself
+            report = stats_sink.last
+            with st.expander("Run statistics", expanded=True):
+                st.dataframe(pd.DataFrame(report["phases"]).T, use_container_width=True)
+                st.write({**report["model"], **report["search"], "peak_rss_mb": report["peak_rss_mb"]})
+
+solution = st.session_state.get("solution")
+if solution is not None:
+    result = solution["result"]
+    num_delayed = sum(1 for info in result.values() if info["late"] > 0)
+    # Solution stats
+    st.subheader("Solution Stats")
+    st.write(f"**Solution value (total lateness):** {sum(info['late'] for info in result.values())}")
+    st.write(f"**Lower bound (capacity analysis):** {solution['bound']}")
+    st.write(f"**Solution time:** {solution['solve_time']:.2f} seconds")
+    st.write(f"**Number of tasks scheduled:** {len(result)}")
+    st.write(f"**Number of tasks delayed:** {num_delayed}")
+    # Chart: bars inside the chosen window, utilization when that holds too many of them
+    st.subheader("Schedule")
+    span = max(1, int(np.ceil(max(info["end"] for info in result.values()))))
+    window = st.slider("Visible window (hours)", 0, span, (0, min(span, 48)))
+    st.plotly_chart(gantt_figure(result, solution["machine_ids"], window=window), use_container_width=True)
+    # Table of tasks, one page at a time
+    st.subheader("Task Schedule Table")
+    table = solution["table"]
+    page_size = st.selectbox("Rows per page", [50, 200, 1000], index=1)
+    pages = max(1, -(-len(table) // page_size))
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1)
+    st.dataframe(table.iloc[(page - 1) * page_size:page * page_size], use_container_width=True)
+    st.download_button(
+        "Download schedule (CSV)",
+        solution["csv"],
+        file_name="schedule.csv",
+        mime="text/csv",
+    )
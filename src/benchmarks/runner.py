@@ -0,0 +1,154 @@
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+if __package__ in (None, ""):
+    sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+
+from src.benchmarks.workload import ARRIVAL_PROCESSES, WorkloadSpec, generate_workload
+from src.models.entities import Context, SolverConfig
+from src.models.heuristics import greedy_schedule
+from src.models.lp_model import build_and_solve, extract_solution
+from src.profiling import PhaseProfiler
+
+SCALES = (50, 200, 1_000, 5_000, 20_000, 50_000)
+MODES = ("per-machine", "pooled", "greedy")
+
+def run_case(spec: WorkloadSpec, mode: str, time_limit: float) -> Dict[str, Any]:
+    """
+    Build, solve and extract one workload in one mode and time every phase.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}, expected one of {MODES}")
+    machines, tasks = generate_workload(spec)
+    profiler = PhaseProfiler()
+    context = Context(
+        machines=machines,
+        tasks=tasks,
+        pooled=mode == "pooled",
+        solver_config=SolverConfig(max_time_in_seconds=time_limit),
+        greedy_hint=False,  # Measure the search itself, not the warm start
+        profiler=profiler,
+    )
+    record = {"n_tasks": spec.n_tasks, "n_machines": len(machines), "mode": mode, "arrival": spec.arrival, "seed": spec.seed}
+    if mode == "greedy":
+        with profiler.phase("solve"):
+            result = greedy_schedule(context)
+        record["status"] = "HEURISTIC" if isinstance(result, dict) else "INFEASIBLE"
+        record["objective"] = sum(info["late"] for info in result.values()) if isinstance(result, dict) else None
+    else:
+        _, variables, solver, status = build_and_solve(context)
+        with profiler.phase("extract"):
+            extract_solution(solver, status, variables)
+    report = profiler.report()
+    for name, stats in report["phases"].items():
+        record[f"{name}_s"] = stats["wall_s"]
+        record[f"{name}_cpu_s"] = stats["cpu_s"]
+    record.update({f"num_{name}": value for name, value in report["model"].items()})
+    record.update(report["search"])
+    record["peak_rss_mb"] = report["peak_rss_mb"]
+    return record
+
+def run_suite(
+    scales: Sequence[int] = SCALES,
+    modes: Sequence[str] = ("pooled", "greedy"),
+    base_spec: Optional[WorkloadSpec] = None,
+    time_limit: float = 30.0,
+    isolate: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Run every mode at every scale. With isolate, each case runs in a fresh
+    process so that peak memory is measured per case, and a case killed for
+    running out of memory is recorded with status "CRASHED" instead of
+    ending the suite.
+    """
+    base_spec = base_spec or WorkloadSpec(n_tasks=0)
+    records = []
+    for n_tasks in scales:
+        for mode in modes:
+            spec = replace(base_spec, n_tasks=n_tasks)
+            if isolate:
+                try:
+                    with ProcessPoolExecutor(max_workers=1) as pool:
+                        record = pool.submit(run_case, spec, mode, time_limit).result()
+                except BrokenProcessPool:
+                    record = {"n_tasks": n_tasks, "mode": mode, "arrival": spec.arrival, "seed": spec.seed, "status": "CRASHED"}
+            else:
+                record = run_case(spec, mode, time_limit)
+            print(json.dumps(record), file=sys.stderr)
+            records.append(record)
+    return records
+
+def write_report(records: List[Dict[str, Any]], path: str, spec: WorkloadSpec) -> None:
+    """
+    Write benchmark records with enough metadata to compare runs across commits.
+    """
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "workload": {k: v for k, v in asdict(spec).items() if k != "n_tasks"},
+        "results": records,
+    }
+    Path(path).write_text(json.dumps(report, indent=2, default=str))
+
+def compare_reports(baseline_path: str, current_path: str) -> List[str]:
+    """
+    Lines comparing solve time and objective of two reports, per mode and scale.
+    """
+    baseline = {(r["mode"], r["n_tasks"]): r for r in json.loads(Path(baseline_path).read_text())["results"]}
+    lines = []
+    for record in json.loads(Path(current_path).read_text())["results"]:
+        before = baseline.get((record["mode"], record["n_tasks"]))
+        if before is None:
+            continue
+        if "solve_s" not in record or "solve_s" not in before:
+            lines.append(f"{record['mode']:>12} {record['n_tasks']:>7}: {before['status']} -> {record['status']}")
+            continue
+        ratio = record["solve_s"] / max(before["solve_s"], 1e-9)
+        lines.append(
+            f"{record['mode']:>12} {record['n_tasks']:>7}: solve x{ratio:.2f}, "
+            f"objective {before.get('objective')} -> {record.get('objective')}"
+        )
+    return lines
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the scheduler on synthetic workloads.")
+    parser.add_argument("--scales", type=int, nargs="+", default=list(SCALES))
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=["pooled", "greedy"])
+    parser.add_argument("--arrival", choices=ARRIVAL_PROCESSES, default="poisson")
+    parser.add_argument("--arrival-span", type=int, default=24)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--time-limit", type=float, default=30.0)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="Earlier report to compare the new results with")
+    parser.add_argument("--in-process", action="store_true", help="Run all cases in this process")
+    args = parser.parse_args(argv)
+    spec = WorkloadSpec(n_tasks=0, seed=args.seed, arrival=args.arrival, arrival_span=args.arrival_span)
+    records = run_suite(args.scales, args.modes, spec, args.time_limit, isolate=not args.in_process)
+    write_report(records, args.output, spec)
+    if args.compare:
+        print("\n".join(compare_reports(args.compare, args.output)))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+if __package__ in (None, ""):
+    sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+# Entry points, from the solver-free core to the full CP-SAT pipeline
+MODULES = ("src.core", "src.cli", "src.models.lp_model", "src.models.lns", "src.visualize_gantt")
+HEAVY = ("ortools", "pandas", "plotly", "streamlit")
+
+# Run in a fresh interpreter: time the import and list the heavy packages it pulled in
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started
+print(json.dumps({{"seconds": seconds, "loaded": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+def measure_import(module: str, repeats: int = 5) -> Dict[str, Any]:
+    """
+    Import time of a module in fresh interpreters: the median and minimum over
+    repeats (seconds), the wall time of the whole process including interpreter
+    startup, and which of HEAVY the import loaded.
+    """
+    seconds = []
+    process_seconds = []
+    loaded: List[str] = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY)],
+            capture_output=True, text=True, check=True, cwd=ROOT,
+        ).stdout
+        process_seconds.append(time.perf_counter() - started)
+        probe = json.loads(output.strip().splitlines()[-1])
+        seconds.append(probe["seconds"])
+        loaded = probe["loaded"]
+    return {
+        "module": module,
+        "import_s": statistics.median(seconds),
+        "import_min_s": min(seconds),
+        "process_s": statistics.median(process_seconds),
+        "loaded": loaded,
+    }
+
+def run_startup(modules: Sequence[str] = MODULES, repeats: int = 5) -> List[Dict[str, Any]]:
+    """
+    measure_import for every module; a module that fails to import (e.g. an
+    optional dependency is missing) is recorded with its error.
+    """
+    records = []
+    for module in modules:
+        try:
+            record = measure_import(module, repeats)
+        except subprocess.CalledProcessError as error:
+            record = {"module": module, "error": error.stderr.strip().splitlines()[-1] if error.stderr.strip() else str(error)}
+        print(json.dumps(record), file=sys.stderr)
+        records.append(record)
+    return records
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure how long each entry point of the scheduler takes to import.")
+    parser.add_argument("--modules", nargs="+", default=list(MODULES))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="Write the records as JSON to this file")
+    args = parser.parse_args(argv)
+    records = run_startup(args.modules, args.repeats)
+    if args.output:
+        Path(args.output).write_text(json.dumps(records, indent=2))
+    for record in records:
+        if "error" in record:
+            print(f"{record['module']:>24}: {record['error']}")
+        else:
+            print(
+                f"{record['module']:>24}: import {record['import_s'] * 1000:.0f} ms, process {record['process_s'] * 1000:.0f} ms, "
+                f"loads {', '.join(record['loaded']) or 'none of ' + ', '.join(HEAVY)}"
+            )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+
+import math
+import numpy as np
+from dataclasses import dataclass, field
+from src.models.entities import DUE_HOURS, DueDateCategory, MachineType, TaskLengthCategory
+from src.models.tables import DUE_CODES, TYPE_CODES, MachineTable, TaskTable
+from typing import Dict, Optional, Tuple
+
+ARRIVAL_PROCESSES = ("batch", "uniform", "poisson", "bursty")
+
+@dataclass
+class WorkloadSpec:
+    """
+    Parameters of a synthetic workload. Mixes are relative weights and do not
+    need to sum to one. Without machines_per_type, each type gets enough
+    machines to reach target_utilization over the arrival span.
+    """
+    n_tasks: int
+    seed: int = 0
+    arrival: str = "poisson"
+    arrival_span: int = 24  # Hours over which tasks arrive
+    length_mix: Dict[TaskLengthCategory, float] = field(default_factory=lambda: {
+        TaskLengthCategory.XS: 0.2,
+        TaskLengthCategory.S: 0.35,
+        TaskLengthCategory.M: 0.25,
+        TaskLengthCategory.L: 0.15,
+        TaskLengthCategory.XL: 0.04,
+        TaskLengthCategory.XXL: 0.01,
+    })
+    due_mix: Dict[DueDateCategory, float] = field(default_factory=lambda: {
+        DueDateCategory.H12: 0.3,
+        DueDateCategory.H24: 0.5,
+        DueDateCategory.WEEK: 0.2,
+    })
+    type_mix: Dict[MachineType, float] = field(default_factory=lambda: {
+        MachineType.WASHER: 0.5,
+        MachineType.DRIER: 0.35,
+        MachineType.IRON: 0.15,
+    })
+    count_mix: Dict[int, float] = field(default_factory=lambda: {1: 0.9, 2: 0.1})
+    machines_per_type: Optional[Dict[MachineType, int]] = None
+    target_utilization: float = 0.85
+
+def generate_workload(spec: WorkloadSpec) -> Tuple[MachineTable, TaskTable]:
+    """
+    Draw machines and tasks for a spec; the same spec always gives the same workload.
+    """
+    if spec.arrival not in ARRIVAL_PROCESSES:
+        raise ValueError(f"Unknown arrival process {spec.arrival!r}, expected one of {ARRIVAL_PROCESSES}")
+    rng = np.random.default_rng(spec.seed)
+    n = spec.n_tasks
+    arrival = _arrivals(rng, spec)
+    length = _draw(rng, {int(k.value): v for k, v in spec.length_mix.items()}, n)
+    due_code = _draw(rng, {DUE_CODES[k]: v for k, v in spec.due_mix.items()}, n).astype(np.int8)
+    type_code = _draw(rng, {TYPE_CODES[k]: v for k, v in spec.type_mix.items()}, n).astype(np.int8)
+    count = _draw(rng, spec.count_mix, n)
+    due_hours = np.array([DUE_HOURS[due] for due in DueDateCategory], dtype=np.int64)
+    tasks = TaskTable(
+        id=np.array([f"T{i}" for i in range(n)], dtype=object),
+        arrival_time=arrival,
+        length=length,
+        due_time=arrival + due_hours[due_code],
+        type_code=type_code,
+        required_count=count,
+        due_code=due_code,
+    )
+    machines_per_type = spec.machines_per_type or _sized_fleet(tasks, spec)
+    ids, codes = [], []
+    for machine_type, amount in machines_per_type.items():
+        ids += [f"{machine_type.value[0].upper()}{j}" for j in range(amount)]
+        codes += [TYPE_CODES[machine_type]] * amount
+    machines = MachineTable(id=np.array(ids, dtype=object), type_code=np.array(codes, dtype=np.int8))
+    return machines, tasks
+
+def _arrivals(rng: np.random.Generator, spec: WorkloadSpec) -> np.ndarray:
+    n, span = spec.n_tasks, spec.arrival_span
+    if spec.arrival == "batch":
+        return np.zeros(n, dtype=np.int64)
+    if spec.arrival == "uniform":
+        return np.sort(rng.integers(0, span, size=n))
+    if spec.arrival == "poisson":
+        gaps = rng.exponential(span / max(n, 1), size=n)
+        return np.minimum(np.floor(np.cumsum(gaps)), span - 1).astype(np.int64)
+    # Bursty: arrivals cluster around a few random peaks
+    peaks = rng.integers(0, span, size=max(1, span // 8))
+    times = rng.choice(peaks, size=n) + rng.normal(0, 1.5, size=n)
+    return np.sort(np.clip(np.round(times), 0, span - 1)).astype(np.int64)
+
+def _draw(rng: np.random.Generator, mix: Dict[int, float], n: int) -> np.ndarray:
+    values = np.array(list(mix), dtype=np.int64)
+    weights = np.array(list(mix.values()), dtype=np.float64)
+    return rng.choice(values, size=n, p=weights / weights.sum())
+
+def _sized_fleet(tasks: TaskTable, spec: WorkloadSpec) -> Dict[MachineType, int]:
+    """
+    Machines per type so that the type's work fills target_utilization of the span.
+    """
+    work = np.bincount(tasks.type_code, weights=tasks.length * tasks.required_count, minlength=len(MachineType))
+    span = max(spec.arrival_span, 24)
+    fleet = {}
+    for machine_type in spec.type_mix:
+        code = TYPE_CODES[machine_type]
+        needed = math.ceil(work[code] / (span * spec.target_utilization))
+        widest = int(tasks.required_count[tasks.type_code == code].max(initial=1))
+        fleet[machine_type] = max(needed, widest)
+    return fleet
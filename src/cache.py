@@ -0,0 +1,160 @@
+
+import hashlib
+import json
+import os
+import time
+import numpy as np
+from collections import OrderedDict
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+from src.models.calendars import format_windows
+from src.models.tables import as_machine_table, as_task_table
+
+# Bump when the schedule format or the model changes, so older entries are not reused
+CACHE_VERSION = 1
+
+# Context fields that do not change the schedule and stay out of the key
+_IGNORED_FIELDS = {"machines", "tasks", "solver_config", "profiler", "cache"}
+_IGNORED_SOLVER_FIELDS = {"log_search_progress", "log_callback"}
+
+def context_key(context: Any) -> str:
+    """
+    Content hash of everything in a Context that determines its schedule:
+    machines and their downtime, tasks, horizon, fixed entries, hints, modelling options and
+    solver parameters. Logging, profiling and the cache itself are left out.
+    """
+    digest = hashlib.sha256(f"wash_scheduler-{CACHE_VERSION}".encode())
+    machines = as_machine_table(context.machines)
+    tasks = as_task_table(context.tasks)
+    for ids in (machines.id, tasks.id, tasks.predecessor):
+        digest.update("\x1f".join("" if i is None else str(i) for i in ids.tolist()).encode())
+        digest.update(b"\x1e")
+    digest.update("\x1f".join(format_windows(windows) for windows in machines.downtime.tolist()).encode())
+    for column in (machines.type_code, tasks.arrival_time, tasks.length, tasks.due_time,
+                   tasks.type_code, tasks.required_count, tasks.due_code):
+        digest.update(np.ascontiguousarray(column).tobytes())
+    options = {
+        name: value for name, value in vars(context).items() if name not in _IGNORED_FIELDS
+    }
+    options["solver_config"] = {
+        name: value for name, value in asdict(context.solver_config).items() if name not in _IGNORED_SOLVER_FIELDS
+    }
+    digest.update(json.dumps(options, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+class ScheduleCache:
+    """
+    Solved schedules keyed by context_key.
+    An in-memory LRU tier holds up to max_entries schedules. With a directory,
+    schedules are also written there as JSON files, which survive restarts
+    and can be shared between processes. Files older than max_age_seconds
+    are dropped, and the least recently used files go first once the
+    directory exceeds max_bytes. Returned schedules are shared with the cache
+    and must not be modified.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 128,
+        directory: Union[str, Path, None] = None,
+        max_bytes: Optional[int] = None,
+        max_age_seconds: Optional[float] = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.directory = Path(directory) if directory is not None else None
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if key in self._memory:
+            stored_at, schedule = self._memory[key]
+            if not self._expired(stored_at):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return schedule
+            del self._memory[key]
+        stored = self._read(key)
+        if stored is None:
+            self.misses += 1
+            return None
+        self._remember(key, *stored)
+        self.hits += 1
+        return stored[1]
+
+    def put(self, key: str, schedule: Dict[str, Any]) -> None:
+        self._remember(key, time.time(), schedule)
+        if self.directory is None:
+            return
+        path = self._path(key)
+        partial = path.with_suffix(f".{os.getpid()}.tmp")
+        partial.write_text(json.dumps(schedule))
+        os.replace(partial, path)  # Readers never see a half-written file
+        self.evict()
+
+    def clear(self) -> None:
+        self._memory.clear()
+        if self.directory is not None:
+            for path in self.directory.glob("*.json"):
+                path.unlink(missing_ok=True)
+
+    def evict(self) -> None:
+        """
+        Drop expired files, then the least recently used ones until the directory fits max_bytes.
+        """
+        if self.directory is None:
+            return
+        now = time.time()
+        files = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # Evicted by another process
+            if self._expired(stat.st_mtime, now):
+                path.unlink(missing_ok=True)
+            else:
+                files.append((stat.st_atime, stat.st_size, path))
+        if self.max_bytes is None:
+            return
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files, key=lambda f: f[0]):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def _expired(self, stored_at: float, now: Optional[float] = None) -> bool:
+        if self.max_age_seconds is None:
+            return False
+        return (now or time.time()) - stored_at > self.max_age_seconds
+
+    def _remember(self, key: str, stored_at: float, schedule: Dict[str, Any]) -> None:
+        self._memory[key] = (stored_at, schedule)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _read(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            stat = path.stat()
+            if self._expired(stat.st_mtime):
+                path.unlink(missing_ok=True)
+                return None
+            schedule = json.loads(path.read_text())
+            # Record the use in the access time, the age stays in the modification time
+            os.utime(path, (time.time(), stat.st_mtime))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return stat.st_mtime, schedule
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
@@ -0,0 +1,125 @@
+
+import argparse
+import logging
+import sys
+import time
+from dataclasses import replace
+from pathlib import Path
+from typing import Dict, List, Optional
+
+if __package__ in (None, ""):
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.data.file_io import read_machines, read_tasks, write_schedule
+from src.models.entities import Context, SolverConfig
+from src.models.heuristics import PRIORITY_RULES, greedy_schedule
+from src.models.objectives import OBJECTIVES, stage_weights
+from src.profiling import LogSink, PhaseProfiler, PrometheusSink
+from src.cache import ScheduleCache
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Schedule laundry tasks on washers, driers and irons.")
+    parser.add_argument("--tasks", required=True, help="Tasks file (.csv, .jsonl or .parquet)")
+    parser.add_argument("--machines", required=True, help="Machines file with id and type columns")
+    parser.add_argument("--output", help="Where to write the schedule; format follows the suffix")
+    parser.add_argument("--engine", choices=("cp-sat", "greedy"), default="cp-sat")
+    parser.add_argument("--rule", choices=PRIORITY_RULES, default="edd", help="Priority rule of the greedy engine")
+    parser.add_argument("--horizon", type=int, help="Last hour any task may end")
+    parser.add_argument("--pooled", action="store_true", help="Model each machine type as one pooled resource")
+    parser.add_argument("--rolling", action="store_true", help="Solve in rolling 24h windows")
+    parser.add_argument("--decompose", action="store_true", help="Solve independent machine types and time clusters in parallel")
+    parser.add_argument("--lns", action="store_true", help="Improve the greedy schedule by re-solving neighbourhoods of it")
+    parser.add_argument("--lns-size", type=int, default=200, help="Tasks freed per LNS neighbourhood")
+    parser.add_argument("--lns-time", type=float, default=2.0, help="Seconds per LNS neighbourhood")
+    parser.add_argument("--slot-minutes", type=int, default=60, help="Minutes per model time step, e.g. 15 for quarter hours")
+    parser.add_argument("--fix-slack", type=int, help="Keep the greedy start of tasks finishing this many hours before due")
+    parser.add_argument(
+        "--objective", action="append", type=parse_objective, metavar="NAME[=WEIGHT,...]",
+        help="Objective stage, repeat to minimize lexicographically, e.g. --objective tardiness --objective makespan=2,idle=1 "
+             f"(choices: {', '.join(OBJECTIVES)})",
+    )
+    parser.add_argument("--time-limit", type=float, help="Solver time limit in seconds")
+    parser.add_argument("--workers", type=int, default=0, help="Solver search workers (0 = all cores)")
+    parser.add_argument("--cache-dir", help="Reuse schedules of identical runs stored in this directory")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="Rows read per chunk")
+    parser.add_argument(
+        "--profile", choices=("log", "prometheus"),
+        help="Report phase timings, model size and search statistics to stderr as a JSON log line or Prometheus text",
+    )
+    return parser
+
+def parse_objective(value: str) -> Dict[str, int]:
+    """
+    Parse "makespan" or "makespan=2,idle=1" into objective weights.
+    """
+    weights = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = int(weight) if weight else 1
+    try:
+        return stage_weights(weights)
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(str(error))
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Read tasks and machines from files, solve, and write or print the schedule.
+    """
+    args = build_parser().parse_args(argv)
+    started = time.perf_counter()
+    profiler = None
+    if args.profile == "log":
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+        profiler = PhaseProfiler([LogSink()])
+    elif args.profile == "prometheus":
+        profiler = PhaseProfiler([PrometheusSink(sys.stderr)])
+    context = Context(
+        machines=read_machines(args.machines),
+        tasks=read_tasks(args.tasks, chunksize=args.chunksize),
+        horizon=args.horizon,
+        pooled=args.pooled,
+        rolling_horizon=args.rolling,
+        decompose=args.decompose,
+        lns=args.lns,
+        lns_size=args.lns_size,
+        lns_time_limit=args.lns_time,
+        slot_minutes=args.slot_minutes,
+        fix_slack=args.fix_slack,
+        objectives=args.objective or ("tardiness",),
+        solver_config=SolverConfig(max_time_in_seconds=args.time_limit, num_search_workers=args.workers),
+        profiler=profiler,
+        cache=ScheduleCache(directory=args.cache_dir) if args.cache_dir else None,
+    )
+    bound = None
+    if args.engine == "greedy":
+        result = greedy_schedule(context, rule=args.rule)
+    else:
+        # The solver is imported only now, so greedy runs and --help start fast
+        from src.models.lp_model import precheck, solve_scheduling_problem
+        # Analysed here instead of in the solve, to report the bound next to the result
+        analysis = precheck(context)
+        bound = analysis.lateness_bound
+        if analysis.infeasible:
+            result = analysis.message()
+            if profiler is not None:
+                profiler.emit()
+        else:
+            result = solve_scheduling_problem(replace(context, precheck=False))
+    if not isinstance(result, dict):
+        print(result, file=sys.stderr)
+        return 1
+    if args.output:
+        write_schedule(result, args.output)
+    else:
+        for task_id, info in result.items():
+            print(task_id, info["start"], info["end"], info["late"], ";".join(info["machines"]))
+    total_late = sum(info["late"] for info in result.values())
+    lower = f" (lower bound {bound})" if bound is not None else ""
+    print(
+        f"Scheduled {len(result)} tasks, total lateness {total_late}{lower}, in {time.perf_counter() - started:.2f} s",
+        file=sys.stderr,
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+
+"""
+The solver-free core of the scheduler: entities, column tables, calendars,
+data I/O, the greedy heuristics, objectives and the presolve analysis.
+Importing it loads numpy and pydantic but not OR-Tools, plotly or streamlit,
+so batch jobs and short-lived workers that only read, check or list-schedule
+tasks start fast. The CP-SAT pipeline stays in src.models.lp_model and is
+imported on first use; src.benchmarks.startup measures what each entry
+point costs to import.
+"""
+from src.cache import ScheduleCache, context_key
+from src.data.file_io import read_machines, read_tasks, schedule_to_frame, write_machines, write_schedule, write_tasks
+from src.models.analysis import Analysis, analyze
+from src.models.calendars import Availability, format_windows, normalize_windows, parse_windows, shift_downtime
+from src.models.entities import (
+    Context, DueDateCategory, Job, MachineType, Operation, SolverConfig, Task, TaskLengthCategory, WashingMachine,
+)
+from src.models.heuristics import PRIORITY_RULES, best_greedy_schedule, greedy_schedule
+from src.models.objectives import OBJECTIVES, evaluate_schedule, stage_value, stage_weights
+from src.models.tables import MachineTable, TaskTable, as_machine_table, as_task_table
+from src.profiling import LogSink, MemorySink, PhaseProfiler, PrometheusSink
+
+__all__ = [
+    "Analysis", "Availability", "Context", "DueDateCategory", "Job", "LogSink", "MachineTable", "MachineType",
+    "MemorySink", "OBJECTIVES", "Operation", "PRIORITY_RULES", "PhaseProfiler", "PrometheusSink", "ScheduleCache",
+    "SolverConfig", "Task", "TaskLengthCategory", "TaskTable", "WashingMachine", "analyze", "as_machine_table",
+    "as_task_table", "best_greedy_schedule", "context_key", "evaluate_schedule", "format_windows", "greedy_schedule",
+    "normalize_windows", "parse_windows", "read_machines", "read_tasks", "schedule_to_frame", "shift_downtime",
+    "stage_value", "stage_weights", "write_machines", "write_schedule", "write_tasks",
+]
@@ -0,0 +1,131 @@
+
+from pathlib import Path
+from src.models.calendars import format_windows
+from src.models.tables import DUE_CATEGORIES, MACHINE_TYPES, MachineTable, TaskTable
+from typing import Any, Dict, IO, Iterator, Optional, Union
+
+FORMATS = ("csv", "jsonl", "parquet")
+_SUFFIXES = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".json": "jsonl", ".parquet": "parquet", ".pq": "parquet"}
+
+Source = Union[str, Path, IO[Any]]
+
+def detect_format(path: Union[str, Path], fmt: Optional[str] = None) -> str:
+    """
+    Pick the file format from an explicit `fmt` or from the file suffix.
+    """
+    if fmt is None:
+        fmt = _SUFFIXES.get(Path(str(path)).suffix.lower())
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format for {path}: expected one of {FORMATS}")
+    return fmt
+
+def iter_frames(source: Source, fmt: str, chunksize: int = 100_000) -> Iterator[Any]:
+    """
+    Read a CSV, JSONL or Parquet source as a stream of pandas DataFrames.
+    """
+    import pandas as pd
+    if fmt == "csv":
+        yield from pd.read_csv(source, chunksize=chunksize)
+    elif fmt == "jsonl":
+        yield from pd.read_json(source, lines=True, chunksize=chunksize, dtype=False)
+    else:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as error:
+            raise ImportError("Reading Parquet files requires pyarrow, the parquet extra (pip install 'wash-scheduler[parquet]')") from error
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+
+def iter_task_chunks(
+    source: Source, fmt: Optional[str] = None, chunksize: int = 100_000
+) -> Iterator[TaskTable]:
+    """
+    Stream tasks from a file as validated TaskTable chunks.
+    Validation errors report row numbers relative to the whole file.
+    """
+    fmt = detect_format(getattr(source, "name", source), fmt)
+    offset = 0
+    for frame in iter_frames(source, fmt, chunksize):
+        yield TaskTable.from_frame(frame, row_offset=offset)
+        offset += len(frame)
+
+def read_tasks(source: Source, fmt: Optional[str] = None, chunksize: int = 100_000) -> TaskTable:
+    """
+    Load all tasks of a CSV, JSONL or Parquet file into one TaskTable.
+    """
+    chunks = list(iter_task_chunks(source, fmt, chunksize))
+    if not chunks:
+        return TaskTable.from_records([])
+    return chunks[0] if len(chunks) == 1 else TaskTable.concat(chunks)
+
+def read_machines(source: Source, fmt: Optional[str] = None) -> MachineTable:
+    """
+    Load machines (columns "id", "type" and an optional "downtime" like
+    "8-10;20-22") from a CSV, JSONL or Parquet file.
+    """
+    import pandas as pd
+    fmt = detect_format(getattr(source, "name", source), fmt)
+    frames = list(iter_frames(source, fmt))
+    frame = pd.concat(frames) if frames else pd.DataFrame(columns=["id", "type"])
+    return MachineTable.from_records(frame.to_dict("records"))
+
+def schedule_to_frame(schedule: Dict[str, Dict[str, Any]]) -> Any:
+    """
+    One row per task with start, end, lateness and the machines joined by ";".
+    """
+    import pandas as pd
+    return pd.DataFrame({
+        "task_id": list(schedule),
+        "start": [info["start"] for info in schedule.values()],
+        "end": [info["end"] for info in schedule.values()],
+        "late": [info["late"] for info in schedule.values()],
+        "machines": [";".join(info.get("machines") or [info["machine"]]) for info in schedule.values()],
+    })
+
+def write_schedule(schedule: Dict[str, Dict[str, Any]], path: Union[str, Path], fmt: Optional[str] = None) -> None:
+    """
+    Write a solved schedule (extract_solution format) as CSV, JSONL or Parquet.
+    """
+    _write_frame(schedule_to_frame(schedule), path, detect_format(path, fmt))
+
+def write_tasks(tasks: TaskTable, path: Union[str, Path], fmt: Optional[str] = None) -> None:
+    """
+    Write a TaskTable in the layout read_tasks expects.
+    """
+    import pandas as pd
+    frame = pd.DataFrame({
+        "id": tasks.id,
+        "arrival_time": tasks.arrival_time,
+        "length": tasks.length,
+        "required_type": [MACHINE_TYPES[code].value for code in tasks.type_code.tolist()],
+        "required_count": tasks.required_count,
+        "due": [DUE_CATEGORIES[code].value for code in tasks.due_code.tolist()],
+        "due_time": tasks.due_time,
+    })
+    if tasks.has_precedence():
+        frame["predecessor"] = tasks.predecessor
+    _write_frame(frame, path, detect_format(path, fmt))
+
+def write_machines(machines: MachineTable, path: Union[str, Path], fmt: Optional[str] = None) -> None:
+    """
+    Write a MachineTable in the layout read_machines expects.
+    """
+    import pandas as pd
+    frame = pd.DataFrame({
+        "id": machines.id,
+        "type": [MACHINE_TYPES[code].value for code in machines.type_code.tolist()],
+    })
+    if machines.has_downtime():
+        frame["downtime"] = [format_windows(windows) for windows in machines.downtime.tolist()]
+    _write_frame(frame, path, detect_format(path, fmt))
+
+def _write_frame(frame: Any, path: Union[str, Path], fmt: str) -> None:
+    if fmt == "csv":
+        frame.to_csv(path, index=False)
+    elif fmt == "jsonl":
+        frame.to_json(path, orient="records", lines=True)
+    else:
+        try:
+            frame.to_parquet(path, index=False)
+        except ImportError as error:
+            raise ImportError("Writing Parquet files requires pyarrow, the parquet extra (pip install 'wash-scheduler[parquet]')") from error
@@ -1,8 +1,8 @@
 
-from src.models.lp_model import solve_scheduling_problem
-from src.data.example_data import get_example_data
+import sys
+from pathlib import Path
 
 if __name__ == "__main__":
-    machines, tasks = get_example_data()
-    result = solve_scheduling_problem(machines, tasks)
-    print(result)
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+    from src.cli import main
+    sys.exit(main())
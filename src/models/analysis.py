@@ -0,0 +1,172 @@
+
+import math
+import numpy as np
+from dataclasses import dataclass, field
+from src.models.entities import Context
+from src.models.tables import MACHINE_TYPES, as_machine_table, as_task_table, precedence_depth, start_windows
+from typing import Any, Dict, List
+
+NO_SOLUTION = "No feasible solution found."
+MAX_REASONS = 5  # Certificates of one kind listed before the rest are counted
+
+@dataclass
+class Analysis:
+    """
+    What can be told about a context without a solver (see analyze).
+    load maps each machine type with tasks to its machines, work and
+    capacity in machine hours, and their ratio. lateness_bound is a lower
+    bound on the total lateness in hours. infeasible lists the reasons why
+    no schedule exists; an empty list proves nothing.
+    """
+    load: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    lateness_bound: float = 0.0
+    infeasible: List[str] = field(default_factory=list)
+
+    def message(self) -> str:
+        """
+        The result string of a context proven infeasible, with the reasons.
+        """
+        return " ".join([NO_SOLUTION] + [f"{reason}." for reason in self.infeasible])
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"load": self.load, "lateness_bound": self.lateness_bound, "infeasible": list(self.infeasible)}
+
+def analyze(context: Context) -> Analysis:
+    """
+    Capacity analysis of a context in O(n log n), before any model is built.
+    Per machine type, the work of its tasks (length times required_count) is
+    compared with the hours its machines are up from the first release until
+    the horizon (or the last due time without one). Infeasibility is certain when
+    - a task needs more machines of a type than there are,
+    - with Context.horizon, a task cannot end by it after its release and its
+      chain of predecessors and successors, or
+    - with Context.horizon, the tasks released from some time on bring more
+      work than the machines can do from then until the horizon.
+    The lateness bound adds up, per type, the larger of two bounds on the last
+    stages of jobs: the lateness each has when started as early as possible,
+    and an energetic bound. Tasks due by d bring work W, of which at most the
+    capacity C between their first release and d gets done by d; the rest runs
+    after d, so the tasks ending after d are late by at least (W - C) / k in
+    total, k being the most machines one of them needs.
+    """
+    tasks = as_task_table(context.tasks)
+    machines = as_machine_table(context.machines)
+    analysis = Analysis()
+    if not len(tasks):
+        return analysis
+    task_ids = tasks.id.tolist()
+    fixed = context.fixed or {}
+    release = np.maximum(tasks.arrival_time, context.frozen_until or 0).astype(np.float64)
+    for row, task_id in enumerate(task_ids):
+        if task_id in fixed:
+            release[row] = fixed[task_id]["start"]
+    lengths = tasks.length.astype(np.float64)
+    predecessors = tasks.predecessor_positions()
+    depth = precedence_depth(predecessors)
+    horizon = context.horizon
+    earliest, latest = start_windows(release, lengths, predecessors, depth, horizon if horizon is not None else 0)
+    is_terminal = np.ones(len(tasks), dtype=bool)
+    is_terminal[predecessors[predecessors >= 0]] = False
+    machine_counts = np.bincount(machines.type_code, minlength=len(MACHINE_TYPES))
+    counts = tasks.required_count
+    short = np.flatnonzero(counts > machine_counts[tasks.type_code])
+    analysis.infeasible += _reasons(
+        f"Task {task_ids[row]} needs {counts[row]} {MACHINE_TYPES[tasks.type_code[row]].value} machines, "
+        f"only {machine_counts[tasks.type_code[row]]} exist"
+        for row in short.tolist()
+    )
+    if horizon is not None:
+        overdue = np.flatnonzero(earliest > latest)
+        analysis.infeasible += _reasons(
+            f"Task {task_ids[row]} cannot end by the horizon {horizon}, "
+            f"its chain runs until {_hours(earliest[row] + horizon - latest[row])} at the earliest"
+            for row in overdue.tolist()
+        )
+    bound = 0.0
+    for type_code in np.unique(tasks.type_code).tolist():
+        name = MACHINE_TYPES[type_code].value
+        rows = np.flatnonzero(tasks.type_code == type_code)
+        on_type = machines.type_code == type_code
+        n_machines = int(machine_counts[type_code])
+        down = _Downtime([w for windows in machines.downtime[on_type].tolist() for w in windows])
+        work = lengths[rows] * counts[rows]
+        first = float(release[rows].min())
+        until = float(horizon if horizon is not None else tasks.due_time[rows].max())
+        capacity = down.capacity(n_machines, first, until)
+        analysis.load[name] = {
+            "machines": n_machines,
+            "work": float(work.sum()),
+            "capacity": capacity,
+            "load": float(work.sum() / capacity) if capacity > 0 else math.inf,
+        }
+        if n_machines == 0:
+            continue
+        if horizon is not None:
+            # Work released from each release time on, against the capacity left until the horizon
+            order = np.argsort(release[rows], kind="stable")
+            releases = release[rows][order]
+            work_from = np.cumsum(work[order][::-1])[::-1]
+            spare = work_from - np.asarray(down.capacity(n_machines, releases, float(horizon)))
+            if (spare > 1e-9).any():
+                k = int(np.argmax(spare))
+                analysis.infeasible.append(
+                    f"{name} machines cannot do the {_hours(work_from[k])} hours of work released "
+                    f"from hour {_hours(releases[k])} on before the horizon {horizon}"
+                )
+        terminal = rows[is_terminal[rows]]
+        if not len(terminal):
+            continue
+        earliest_late = np.maximum(0.0, earliest[terminal] + lengths[terminal] - tasks.due_time[terminal]).sum()
+        order = terminal[np.argsort(tasks.due_time[terminal], kind="stable")]
+        due = tasks.due_time[order].astype(np.float64)
+        first_release = np.minimum.accumulate(earliest[order])
+        excess = np.cumsum(lengths[order] * counts[order]) - down.capacity(n_machines, first_release, np.maximum(due, first_release))
+        energetic = float((np.maximum(excess, 0) / np.maximum.accumulate(counts[order])).max())
+        bound += max(float(earliest_late), energetic)
+    # Lateness comes in whole model slots
+    step = context.slot_minutes / 60
+    analysis.lateness_bound = _hours(math.ceil(bound / step - 1e-9) * step)
+    return analysis
+
+class _Downtime:
+    """
+    Machine hours lost to downtime over all machines of a type. Down time
+    before t is the sum of (t - start) over windows started before t, minus
+    (t - end) over windows ended before t, so sorted starts and ends with
+    prefix sums answer it for many t at once.
+    """
+
+    def __init__(self, windows: List[Any]) -> None:
+        self.starts = np.sort(np.array([start for start, _ in windows], dtype=np.float64))
+        self.ends = np.sort(np.array([end for _, end in windows], dtype=np.float64))
+        self.start_sums = np.concatenate([[0.0], np.cumsum(self.starts)])
+        self.end_sums = np.concatenate([[0.0], np.cumsum(self.ends)])
+
+    def before(self, t: Any) -> Any:
+        t = np.asarray(t, dtype=np.float64)
+        started = np.searchsorted(self.starts, t)
+        ended = np.searchsorted(self.ends, t)
+        return (started * t - self.start_sums[started]) - (ended * t - self.end_sums[ended])
+
+    def capacity(self, n_machines: int, start: Any, end: Any) -> Any:
+        """
+        Machine hours available between start and end (scalars or arrays).
+        """
+        capacity = n_machines * np.maximum(np.asarray(end) - np.asarray(start), 0) - (self.before(end) - self.before(start))
+        return float(capacity) if np.ndim(capacity) == 0 else capacity
+
+def _reasons(reasons: Any) -> List[str]:
+    """
+    The first MAX_REASONS reasons, with a count of the others.
+    """
+    reasons = list(reasons)
+    if len(reasons) > MAX_REASONS:
+        return reasons[:MAX_REASONS] + [f"And {len(reasons) - MAX_REASONS} more tasks like these"]
+    return reasons
+
+def _hours(value: float) -> Any:
+    """
+    Hours as an int when whole, for readable messages and reports.
+    """
+    value = float(value)
+    return int(value) if value.is_integer() else round(value, 2)
@@ -0,0 +1,212 @@
+import asyncio
+import queue
+import threading
+import time
+from ortools.sat.python import cp_model
+from src.models.entities import Context, ModelVariables
+from src.models.heuristics import best_greedy_schedule
+from src.models.lp_model import (
+    create_scheduling_model, extract_solution, keep_stage, precheck, stage_deadline, stage_solver, warm_start,
+)
+from src.models.objectives import evaluate_schedule, stage_value, stage_weights
+from src.models.tables import to_hours
+from src.profiling import phase
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+_DONE = object()
+
+class _SolutionStream(cp_model.CpSolverSolutionCallback):
+    """
+    Solution callback that forwards every improving solution as an update dict.
+    The objective of an update is the value of the current stage in hours.
+    """
+
+    def __init__(
+        self,
+        context: Context,
+        variables: ModelVariables,
+        publish: Callable[[Dict[str, Any]], None],
+        floor: Optional[float] = None,
+    ) -> None:
+        super().__init__()
+        self._context = context
+        self._variables = variables
+        self._publish = publish
+        self._floor = floor
+        self.stage = 0
+
+    def on_solution_callback(self) -> None:
+        schedule = extract_solution(self, cp_model.FEASIBLE, self._variables)
+        self._publish(_update(
+            schedule,
+            "FEASIBLE",
+            _objective(schedule, self._context, self.stage),
+            _bound(self.best_objective_bound, self._context, self.stage, self._floor),
+            self.wall_time,
+            self.stage,
+        ))
+
+def solve_anytime(context: Context) -> Iterator[Dict[str, Any]]:
+    """
+    Solve the scheduling problem and yield every improving schedule as it is found.
+    Each update is a dict with "schedule" (extract_solution format), "status",
+    "objective", "bound", "gap", "wall_time" and "stage", the index of the
+    Context.objectives stage the objective and bound refer to. The greedy
+    schedule comes first (when Context.greedy_hint is set), then each CP-SAT
+    solution of every stage, and a final update carries the status the solver
+    finished with. Closing the generator early stops the search. A context
+    found in Context.cache yields one update with status "CACHED".
+    With Context.precheck, a context the presolve analysis proves infeasible
+    yields one update with status "INFEASIBLE" and the reasons as schedule,
+    and the analysis lower bound on the total lateness raises the bound of a
+    first stage that minimizes tardiness alone (before the solver has one too).
+    Context.profiler, if set, is emitted before the final update.
+    """
+    started = time.perf_counter()
+    profiler = context.profiler
+    key = None
+    if context.cache is not None:
+        from src.cache import context_key
+        with phase(profiler, "cache"):
+            key = context_key(context)
+            cached = context.cache.get(key)
+        if cached is not None:
+            if profiler is not None:
+                profiler.emit()
+            yield _update(cached, "CACHED", _objective(cached, context, 0), None, time.perf_counter() - started)
+            return
+    floor = None
+    if context.precheck:
+        analysis = precheck(context)
+        if analysis.infeasible:
+            if profiler is not None:
+                profiler.emit()
+            yield _update(analysis.message(), "INFEASIBLE", None, None, time.perf_counter() - started)
+            return
+        weights = stage_weights(context.objectives[0])
+        if set(weights) == {"tardiness"}:
+            floor = weights["tardiness"] * analysis.lateness_bound
+    last_schedule = None
+    if context.greedy_hint and context.hints is None:
+        with phase(profiler, "greedy"):
+            greedy = best_greedy_schedule(context)
+        if isinstance(greedy, dict):
+            context = warm_start(context, greedy)
+            last_schedule = greedy
+            yield _update(greedy, "HEURISTIC", _objective(greedy, context, 0), floor, time.perf_counter() - started)
+    with phase(profiler, "build"):
+        model, variables = create_scheduling_model(context)
+    stages = variables.objective_stages
+    updates = queue.Queue()
+    stream = _SolutionStream(context, variables, updates.put, floor)
+    outcome = {}
+    lock = threading.Lock()
+    stopping = threading.Event()
+
+    def run() -> None:
+        try:
+            deadline = stage_deadline(context.solver_config)
+            with phase(profiler, "solve"):
+                for k, objective in enumerate(stages):
+                    with lock:
+                        if stopping.is_set():
+                            break
+                        solver = outcome["current"] = stage_solver(context.solver_config, deadline, len(stages) - k)
+                    stream.stage = k
+                    model.minimize(objective)
+                    status = solver.solve(model, stream)
+                    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE) and "solver" in outcome:
+                        break  # Keep the solution of the previous stage
+                    outcome.update(solver=solver, status=status, stage=k)
+                    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                        break
+                    if k + 1 < len(stages):
+                        keep_stage(model, objective, solver)
+        finally:
+            updates.put(_DONE)
+
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+    try:
+        while True:
+            update = updates.get()
+            if update is _DONE:
+                break
+            last_schedule = update["schedule"]
+            yield update
+    finally:
+        with lock:
+            stopping.set()
+            current = outcome.get("current")
+        if current is not None:
+            current.stop_search()
+        worker.join()
+    solver, status, stage = outcome.get("solver"), outcome.get("status"), outcome.get("stage", 0)
+    if profiler is not None and solver is not None:
+        profiler.record_model(model)
+        profiler.record_search(solver, status)
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        with phase(profiler, "extract"):
+            final = extract_solution(solver, status, variables)
+        objective = _objective(final, context, stage)
+        bound = _bound(solver.best_objective_bound, context, stage, floor)
+    elif status == cp_model.UNKNOWN and last_schedule is not None:
+        # Stopped before CP-SAT found anything, keep the greedy schedule
+        final = last_schedule
+        objective, bound = _objective(last_schedule, context, 0), floor
+    else:
+        final = "No feasible solution found."
+        objective, bound = None, None
+    if key is not None and isinstance(final, dict):
+        context.cache.put(key, final)
+    if profiler is not None:
+        profiler.emit()
+    status_name = solver.status_name(status) if solver is not None else "UNKNOWN"
+    yield _update(final, status_name, objective, bound, solver.wall_time if solver is not None else 0.0, stage)
+
+async def solve_anytime_async(context: Context) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Async variant of solve_anytime; the blocking waits run in the default executor.
+    """
+    loop = asyncio.get_running_loop()
+    updates = solve_anytime(context)
+    try:
+        while True:
+            update = await loop.run_in_executor(None, next, updates, _DONE)
+            if update is _DONE:
+                break
+            yield update
+    finally:
+        await loop.run_in_executor(None, updates.close)
+
+def _objective(schedule: Dict[str, Any], context: Context, stage: int) -> float:
+    return stage_value(evaluate_schedule(schedule, context), context.objectives[stage])
+
+def _bound(bound: float, context: Context, stage: int, floor: Optional[float] = None) -> Optional[float]:
+    """
+    A solver bound in hours, None when its stage counts late tasks in slots other than hours.
+    floor is a bound on the first stage known beforehand, kept when the solver's is lower.
+    """
+    if context.slot_minutes != 60 and "late_count" in stage_weights(context.objectives[stage]):
+        return None
+    bound = to_hours(bound, context.slot_minutes)
+    return max(bound, floor) if floor is not None and stage == 0 else bound
+
+def _update(
+    schedule: Any, status: str, objective: Any, bound: Any, wall_time: float, stage: int = 0
+) -> Dict[str, Any]:
+    """
+    Build one anytime update, including the relative gap when it is known.
+    """
+    gap = None
+    if objective is not None and bound is not None:
+        gap = (objective - bound) / max(1.0, abs(objective))
+    return {
+        "schedule": schedule,
+        "status": status,
+        "objective": objective,
+        "bound": bound,
+        "gap": gap,
+        "wall_time": wall_time,
+        "stage": stage,
+    }
@@ -0,0 +1,91 @@
+
+import bisect
+import math
+from typing import Any, Iterable, List, Sequence, Tuple
+
+Window = Tuple[int, int]
+
+def normalize_windows(windows: Iterable[Sequence[int]]) -> Tuple[Window, ...]:
+    """
+    Sort downtime windows [start, end) in hours and merge the ones that overlap
+    or touch; empty windows are dropped. Raises ValueError when a window ends
+    before it starts.
+    """
+    pairs = sorted((int(start), int(end)) for start, end in windows)
+    merged: List[List[int]] = []
+    for start, end in pairs:
+        if end < start:
+            raise ValueError(f"Invalid downtime: window ({start}, {end}) ends before it starts")
+        if start == end:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return tuple((start, end) for start, end in merged)
+
+def parse_windows(value: Any) -> Tuple[Window, ...]:
+    """
+    Downtime from a file cell or a record: "8-10;20-22", a list of pairs, or
+    nothing (None, NaN, "").
+    """
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ()
+    if isinstance(value, str):
+        parts = [part.strip() for part in value.split(";") if part.strip()]
+        try:
+            return normalize_windows(tuple(int(hour) for hour in part.split("-")) for part in parts)
+        except ValueError as error:
+            raise ValueError(f"Invalid downtime {value!r}: expected windows like '8-10;20-22'") from error
+    return normalize_windows(value)
+
+def format_windows(windows: Iterable[Window]) -> str:
+    """
+    The file form of downtime windows, read back by parse_windows.
+    """
+    return ";".join(f"{start}-{end}" for start, end in windows)
+
+def shift_downtime(shift_start: int, shift_end: int, days: int, day_hours: int = 24) -> Tuple[Window, ...]:
+    """
+    Downtime outside a daily shift from shift_start to shift_end (hours of the
+    day) over `days` days, e.g. shift_downtime(6, 22, 7) for a 6-22 week.
+    """
+    if not 0 <= shift_start < shift_end <= day_hours:
+        raise ValueError("A shift must start before it ends, within one day")
+    windows = []
+    for day in range(days):
+        offset = day * day_hours
+        windows += [(offset, offset + shift_start), (offset + shift_end, offset + day_hours)]
+    return normalize_windows(windows)
+
+class Availability:
+    """
+    Downtime of one machine with O(log n) lookups. Windows are disjoint after
+    normalize_windows, so binary search over their sorted ends finds the only
+    window that can overlap a given time, no interval tree needed.
+    """
+
+    def __init__(self, windows: Iterable[Sequence[int]]) -> None:
+        windows = normalize_windows(windows)
+        self.starts = [start for start, _ in windows]
+        self.ends = [end for _, end in windows]
+
+    def __bool__(self) -> bool:
+        return bool(self.starts)
+
+    def is_free(self, start: float, end: float) -> bool:
+        """
+        Whether [start, end) misses every downtime window.
+        """
+        i = bisect.bisect_right(self.ends, start)
+        return i == len(self.starts) or self.starts[i] >= end
+
+    def next_free(self, start: float, length: float) -> float:
+        """
+        Earliest time from `start` at which a task of `length` hours fits between downtime windows.
+        """
+        i = bisect.bisect_right(self.ends, start)
+        while i < len(self.starts) and self.starts[i] < start + length:
+            start = self.ends[i]
+            i += 1
+        return start
@@ -0,0 +1,196 @@
+
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from src.models.entities import Context
+from src.models.heuristics import best_greedy_schedule
+from src.models.lp_model import solve_component
+from src.models.tables import MachineTable, TaskTable, as_machine_table, as_task_table
+from src.profiling import phase
+from typing import Any, Dict, List, Optional, Union
+
+MIN_CLUSTER_SIZE = 50  # Time clusters with fewer tasks are merged into the next one
+
+def solve_decomposed(context: Context) -> Union[Dict[str, Any], str]:
+    """
+    Solve the independent parts of the problem separately and merge the schedules.
+    Components are found by find_components and solved in a process pool of
+    Context.max_workers processes. The time limit is split by component size:
+    with several processes a component gets up to processes times its share,
+    solved one by one each gets its share of the time still left. Unless
+    num_search_workers is set, each component gets an equal share of the cores.
+    The solver log callback and the profiler stay in this process, so the
+    component searches are neither logged nor profiled individually.
+    """
+    tasks = as_task_table(context.tasks)
+    machines = as_machine_table(context.machines)
+    with phase(context.profiler, "greedy"):
+        greedy = best_greedy_schedule(context)
+    greedy = greedy if isinstance(greedy, dict) else None
+    hints = context.hints
+    if hints is None and context.greedy_hint:
+        hints = greedy
+    with phase(context.profiler, "decompose"):
+        components = find_components(tasks, context, greedy)
+    if len(components) <= 1:
+        return solve_component(replace(context, hints=hints))
+    cores = os.cpu_count() or 1
+    processes = min(len(components), context.max_workers or cores)
+    search_workers = context.solver_config.num_search_workers or max(1, cores // processes)
+    # Largest first, so that the longest searches start right away
+    components.sort(key=len, reverse=True)
+    horizons = cluster_horizons(tasks, context, components)
+    subproblems = [
+        _subproblem(context, tasks, machines, rows, hints, search_workers, horizon)
+        for rows, horizon in zip(components, horizons)
+    ]
+    time_limit = context.solver_config.max_time_in_seconds
+    sizes = [len(rows) for rows in components]
+    with phase(context.profiler, "components"):
+        if processes == 1:
+            results = []
+            deadline = None if time_limit is None else time.perf_counter() + time_limit
+            for i, sub in enumerate(subproblems):
+                if deadline is not None:
+                    left = max(deadline - time.perf_counter(), 0.0)
+                    sub = _with_time_limit(sub, left * sizes[i] / sum(sizes[i:]))
+                results.append(solve_component(sub))
+        else:
+            if time_limit is not None:
+                subproblems = [
+                    _with_time_limit(sub, time_limit * min(1.0, processes * size / sum(sizes)))
+                    for sub, size in zip(subproblems, sizes)
+                ]
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                results = list(pool.map(solve_component, subproblems))
+    merged = {}
+    for result in results:
+        if not isinstance(result, dict):
+            return result
+        merged.update(result)
+    return {task_id: merged[task_id] for task_id in tasks.id.tolist()}
+
+def _with_time_limit(context: Context, seconds: float) -> Context:
+    return replace(context, solver_config=replace(context.solver_config, max_time_in_seconds=seconds))
+
+def find_components(
+    tasks: TaskTable,
+    context: Context,
+    schedule: Optional[Dict[str, Dict[str, Any]]] = None,
+    min_cluster_size: int = MIN_CLUSTER_SIZE,
+) -> List[np.ndarray]:
+    """
+    Rows of tasks that can be scheduled independently of each other.
+    Tasks of different machine types never share a machine, so each type is
+    a component unless predecessor links join it with another type. Given a
+    feasible schedule, a component is also cut at a release time t when its
+    tasks released since the previous cut all end by t without being late
+    in that schedule: that part is then optimal on its own and leaves every
+    machine free for the tasks released from t on. Cuts are skipped when
+    tasks are fixed, since those may hold machines across any cut.
+    """
+    parent = {code: code for code in np.unique(tasks.type_code).tolist()}
+
+    def find(code: int) -> int:
+        while parent[code] != code:
+            parent[code] = parent[parent[code]]
+            code = parent[code]
+        return code
+
+    predecessors = tasks.predecessor_positions()
+    linked = np.flatnonzero(predecessors >= 0)
+    pairs = set(zip(tasks.type_code[linked].tolist(), tasks.type_code[predecessors[linked]].tolist()))
+    for a, b in pairs:
+        parent[find(a)] = find(b)
+    label = np.array([find(code) for code in tasks.type_code.tolist()], dtype=np.int64)
+    components = [np.flatnonzero(label == root) for root in np.unique(label).tolist()]
+    if schedule is None or context.fixed:
+        return components
+    task_ids = tasks.id.tolist()
+    release = np.maximum(tasks.arrival_time, context.frozen_until or 0)
+    ends = np.fromiter((schedule[task_id]["end"] for task_id in task_ids), dtype=np.int64, count=len(tasks))
+    lates = np.fromiter((schedule[task_id]["late"] for task_id in task_ids), dtype=np.int64, count=len(tasks))
+    clusters = []
+    for rows in components:
+        clusters += _time_clusters(rows, release, ends, lates, min_cluster_size)
+    return clusters
+
+def cluster_horizons(tasks: TaskTable, context: Context, components: List[np.ndarray]) -> List[Optional[int]]:
+    """
+    The horizon of each component: the first release among the later time
+    clusters on the same machine types (the cut after it), or Context.horizon.
+    Solved on their own, the tasks of a cluster would otherwise be free to run
+    past the cut, on the machines the next cluster counts on from then on.
+    """
+    release = np.maximum(tasks.arrival_time, context.frozen_until or 0)
+    first = [int(release[rows].min()) if len(rows) else 0 for rows in components]
+    last = [int(release[rows].max()) if len(rows) else 0 for rows in components]
+    types = [set(tasks.type_code[rows].tolist()) for rows in components]
+    horizons = []
+    for k in range(len(components)):
+        cuts = [
+            first[j] for j in range(len(components))
+            if j != k and types[j] & types[k] and first[j] > last[k]
+        ]
+        caps = cuts + ([context.horizon] if context.horizon is not None else [])
+        horizons.append(min(caps) if caps else None)
+    return horizons
+
+def _time_clusters(
+    rows: np.ndarray, release: np.ndarray, ends: np.ndarray, lates: np.ndarray, min_size: int
+) -> List[np.ndarray]:
+    """
+    Split rows at release times that no earlier task runs past or is late before.
+    """
+    order = rows[np.argsort(release[rows], kind="stable")]
+    release_list = release[order].tolist()
+    end_list = ends[order].tolist()
+    late_list = lates[order].tolist()
+    clusters = []
+    cluster_start = 0
+    cluster_end = 0
+    cluster_late = 0
+    for k in range(1, len(order)):
+        cluster_end = max(cluster_end, end_list[k - 1])
+        cluster_late += late_list[k - 1]
+        if (
+            release_list[k] > release_list[k - 1]
+            and cluster_end <= release_list[k]
+            and cluster_late == 0
+            and k - cluster_start >= min_size
+        ):
+            clusters.append(order[cluster_start:k])
+            cluster_start, cluster_end, cluster_late = k, 0, 0
+    clusters.append(order[cluster_start:])
+    return clusters
+
+def _subproblem(
+    context: Context,
+    tasks: TaskTable,
+    machines: MachineTable,
+    rows: np.ndarray,
+    hints: Optional[Dict[str, Dict[str, Any]]],
+    search_workers: int,
+    horizon: Optional[int] = None,
+) -> Context:
+    """
+    The context of one component: its tasks, the machines of its types, the
+    fixed entries and hints of its tasks, and its horizon (see cluster_horizons).
+    """
+    sub_tasks = tasks.take(np.sort(rows))
+    task_ids = sub_tasks.id.tolist()
+    fixed = {task_id: context.fixed[task_id] for task_id in task_ids if task_id in (context.fixed or {})}
+    return replace(
+        context,
+        tasks=sub_tasks,
+        machines=machines.take(np.isin(machines.type_code, np.unique(sub_tasks.type_code))),
+        horizon=horizon,
+        fixed=fixed or None,
+        hints=None if hints is None else {task_id: hints[task_id] for task_id in task_ids if task_id in hints},
+        solver_config=replace(context.solver_config, log_callback=None, num_search_workers=search_workers),
+        decompose=False,
+        profiler=None,
+        cache=None,
+    )
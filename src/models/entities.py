@@ -1,11 +1,18 @@
 
 
 import uuid
-from dataclasses import dataclass
+import numpy as np
+from dataclasses import dataclass, field
 from enum import Enum
-from ortools.sat.python.cp_model import IntVar
 from pydantic import BaseModel
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+if TYPE_CHECKING:
+    # The solver is only imported where a model is built, see src.core
+    from ortools.sat.python.cp_model import IntVar
+    from src.models.tables import MachineTable, TaskTable
+    from src.cache import ScheduleCache
+    from src.profiling import PhaseProfiler
 
 
 # Task due date and length categories
@@ -14,6 +21,10 @@ class DueDateCategory(str, Enum):
     H24 = "24h"
     WEEK = "1w"
 
+# Hours until due per category, also keyed by category name ("H12") for loose input
+DUE_HOURS = {DueDateCategory.H12: 12, DueDateCategory.H24: 24, DueDateCategory.WEEK: 7 * 24}
+DUE_HOURS.update({due.name: hours for due, hours in list(DUE_HOURS.items())})
+
 class TaskLengthCategory(str, Enum):
     XS = "1"
     S = "2"
@@ -25,19 +36,94 @@ class TaskLengthCategory(str, Enum):
 
 @dataclass
 class ModelVariables:
-    start_vars: Dict[str, IntVar]
-    end_vars: Dict[str, IntVar]
-    late_vars: Dict[str, IntVar]
-    assigned_vars: Dict[str, List[IntVar]]  # Use IntVar for bools
-    machines: List['WashingMachine']
-    tasks: List['Task']
+    start_vars: Dict[str, 'IntVar']
+    end_vars: Dict[str, 'IntVar']
+    late_vars: Dict[str, 'IntVar']
+    assigned_vars: Dict[str, List['IntVar']]  # Use IntVar for bools
+    machines: 'MachineTable'
+    tasks: 'TaskTable'
+    # Machine ids matching assigned_vars position by position (empty when pooled)
+    assigned_machines: Dict[str, List[str]] = field(default_factory=dict)
+    pooled: bool = False
+    # Machine types modelled per machine in a pooled model, because their machines have downtime
+    calendar_types: List[int] = field(default_factory=list)
+    # Machines of tasks pinned through Context.fixed, used by the pooled post-pass
+    fixed_machines: Dict[str, List[str]] = field(default_factory=dict)
+    # Model variable indices for bulk extraction, in task order
+    start_index: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    end_index: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    late_index: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    # One entry per assignment literal: variable index, task position and machine id
+    assignment_index: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    assignment_task: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    assignment_machine: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=object))
+    # Minutes per model time unit, to convert the solution back to hours
+    slot_minutes: int = 60
+    # One objective expression per stage of Context.objectives, minimized in turn
+    objective_stages: List[Any] = field(default_factory=list)
+
+# CP-SAT parameters for a run
+@dataclass
+class SolverConfig:
+    max_time_in_seconds: Optional[float] = None
+    num_search_workers: int = 0  # 0 lets CP-SAT pick one worker per core
+    relative_gap_limit: Optional[float] = None
+    random_seed: Optional[int] = None
+    # Probing effort of the CP-SAT presolve (its cp_model_probing_level, default 2); 0 skips it,
+    # which pays off for many small models solved under short time limits
+    probing_level: Optional[int] = None
+    log_search_progress: bool = False
+    # Receives each solver log line instead of stdout when set
+    log_callback: Optional[Callable[[str], None]] = None
 
 # Context dataclass to hold all info for a run
 @dataclass
 class Context:
-    machines: List['WashingMachine']
-    tasks: List['Task']
+    machines: Union[List['WashingMachine'], 'MachineTable']
+    tasks: Union[List['Task'], 'TaskTable']
     horizon: Optional[int] = None
+    solver_config: SolverConfig = field(default_factory=SolverConfig)
+    # Model each machine type as one cumulative resource and assign machine ids afterwards
+    pooled: bool = False
+    # Order identical machines by first use when modelling them one by one
+    symmetry_breaking: bool = True
+    # Schedule entries ({"start", "machines"}) that must be kept as they are, e.g. started tasks
+    fixed: Optional[Dict[str, Dict[str, Any]]] = None
+    # Schedule entries passed to the solver as a warm start
+    hints: Optional[Dict[str, Dict[str, Any]]] = None
+    # Tasks that are not fixed may not start before this time
+    frozen_until: Optional[int] = None
+    # Warm-start CP-SAT with the greedy list schedule (also the fallback when it finds nothing)
+    greedy_hint: bool = True
+    # Objectives minimized one after another, each kept at its optimum for the next. A stage is
+    # a name from objectives.OBJECTIVES or a dict of names to integer weights, e.g.
+    # ["tardiness", {"makespan": 2, "idle": 1}]. Time terms are measured in model slots.
+    objectives: Sequence[Union[str, Dict[str, int]]] = ("tardiness",)
+    # Minutes per model time unit: 15 plans in quarter hours, 120 halves the domains of long horizons.
+    # Arrivals and lengths are rounded up to whole slots, due times down; results stay in hours.
+    slot_minutes: int = 60
+    # Upper bound on the total lateness in hours, caps every lateness variable (set from the greedy schedule)
+    lateness_bound: Optional[int] = None
+    # Pin the hinted start of tasks whose hint ends at least this many hours before their due time
+    fix_slack: Optional[int] = None
+    # Solve window by window instead of one model over the whole horizon
+    rolling_horizon: bool = False
+    rolling_window: int = 24  # Hours covered by each window
+    rolling_overlap: int = 12  # Hours re-planned by the next window
+    # Split into independent subproblems (per machine type, then per time cluster) solved in parallel
+    decompose: bool = False
+    max_workers: Optional[int] = None  # Processes for decomposed subproblems and LNS neighbourhoods, None for one per core
+    # Improve the greedy schedule by re-solving small neighbourhoods of it, see lns.solve_lns
+    lns: bool = False
+    lns_size: int = 200  # Tasks freed per neighbourhood
+    lns_rounds: int = 100  # Rounds of one neighbourhood per process
+    lns_time_limit: float = 2.0  # Seconds per neighbourhood
+    # Check capacity before solving and answer contexts that cannot be scheduled right away, see analysis.analyze
+    precheck: bool = True
+    # Records phase timings, model size and search statistics of the run
+    profiler: Optional['PhaseProfiler'] = None
+    # Returns the stored schedule for a context that was solved before
+    cache: Optional['ScheduleCache'] = None
 
 
 
@@ -50,6 +136,8 @@ class MachineType(str, Enum):
 class WashingMachine(BaseModel):
     id: str
     type: MachineType
+    # Hours [start, end) the machine is unavailable: outside shifts, maintenance, breakdowns
+    downtime: List[Tuple[int, int]] = []
 
 class Task(BaseModel):
     id: str
@@ -59,20 +147,59 @@ class Task(BaseModel):
     required_type: MachineType # Type of machine required
     required_count: int # Number of machines required
     due_time: int      # Due time for the task
+    predecessor: Optional[str] = None  # Id of the task that must end before this one starts
 
     def __init__(self, **data):
         if 'id' not in data or data['id'] is None:
             data['id'] = str(uuid.uuid4())[:8]
         # Auto-calculate due_time if not provided, based on due category
         if 'due_time' not in data or data['due_time'] is None:
-            arrival_time = data.get('arrival_time', 0)
-            due = data.get('due', None)
-            if due == DueDateCategory.H12 or due == 'H12' or due == '12h':
-                data['due_time'] = arrival_time + 12
-            elif due == DueDateCategory.H24 or due == 'H24' or due == '24h':
-                data['due_time'] = arrival_time + 24
-            elif due == DueDateCategory.WEEK or due == 'WEEK' or due == '1w':
-                data['due_time'] = arrival_time + 7 * 24
-            else:
-                data['due_time'] = arrival_time + 24  # Default to 24h if unknown
+            # Default to 24h if unknown
+            data['due_time'] = data.get('arrival_time', 0) + DUE_HOURS.get(data.get('due'), 24)
         super().__init__(**data)
+
+class Operation(BaseModel):
+    length: TaskLengthCategory
+    required_type: MachineType
+    required_count: int = 1
+
+class Job(BaseModel):
+    """
+    An order going through several stages, e.g. washer -> drier -> iron.
+    Each operation becomes one Task linked to the previous stage by its
+    predecessor, and only the last stage counts towards lateness.
+    """
+    id: str
+    arrival_time: int
+    due: DueDateCategory
+    operations: List[Operation]
+    due_time: Optional[int] = None
+
+    def to_tasks(self) -> List[Task]:
+        """
+        One Task per operation, with ids "<job id>-<stage>". Earlier stages get
+        the latest end that still lets the remaining stages finish on time as
+        their due time, which is what the priority rules dispatch on.
+        """
+        due_time = self.due_time
+        if due_time is None:
+            due_time = self.arrival_time + DUE_HOURS[self.due]
+        remaining = sum(int(op.length.value) for op in self.operations)
+        tasks = []
+        predecessor = None
+        for stage, op in enumerate(self.operations):
+            remaining -= int(op.length.value)
+            task_id = f"{self.id}-{stage}"
+            tasks.append(Task(
+                id=task_id,
+                arrival_time=self.arrival_time,
+                length=op.length,
+                due=self.due,
+                required_type=op.required_type,
+                required_count=op.required_count,
+                due_time=due_time - remaining,
+                predecessor=predecessor,
+            ))
+            predecessor = task_id
+        return tasks
+
@@ -0,0 +1,216 @@
+
+import heapq
+import numpy as np
+from src.models.calendars import Availability
+from src.models.entities import Context
+from src.models.tables import TaskTable, as_machine_table, as_task_table, precedence_depth
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+PRIORITY_RULES = ("edd", "slack", "johnson")
+
+def greedy_schedule(context: Context, rule: str = "edd") -> Union[Dict[str, Any], str]:
+    """
+    List-schedule the tasks without a solver.
+    Tasks are dispatched per machine type: whenever a machine frees up, the
+    released task with the best priority (earliest due date for "edd", latest
+    possible start for "slack") takes the required_count machines that free up
+    first. "johnson" orders whole jobs for flow shops (see _johnson_priority).
+    Tasks with a predecessor are dispatched stage by stage and released when
+    their predecessor ends. Fixed entries, frozen_until and machine downtime
+    are respected, the horizon is not. Returns a dictionary in the
+    extract_solution format.
+    """
+    if rule not in PRIORITY_RULES:
+        raise ValueError(f"Unknown priority rule {rule!r}, expected one of {PRIORITY_RULES}")
+    tasks = as_task_table(context.tasks)
+    machines = as_machine_table(context.machines)
+    fixed = context.fixed or {}
+    frozen_until = context.frozen_until or 0
+    task_ids = tasks.id.tolist()
+    release = np.maximum(tasks.arrival_time, frozen_until)
+    predecessors = tasks.predecessor_positions()
+    depth = precedence_depth(predecessors)
+    if rule == "edd":
+        priority = tasks.due_time
+    elif rule == "slack":
+        priority = tasks.due_time - tasks.length
+    else:
+        priority = _johnson_priority(tasks, predecessors, depth)
+    # Only the last stage of a job can be late
+    due = tasks.due_time.copy()
+    due[predecessors[predecessors >= 0]] = np.iinfo(np.int64).max
+    machine_ids_by_type = {}
+    for m_id, type_code in zip(machines.id.tolist(), machines.type_code.tolist()):
+        machine_ids_by_type.setdefault(type_code, []).append(m_id)
+    calendars = {
+        m_id: Availability(windows) for m_id, windows in zip(machines.id.tolist(), machines.downtime.tolist()) if windows
+    }
+    # Fixed tasks keep their slot and block their machines until they end
+    busy_until = {m_id: frozen_until for m_id in machines.id.tolist()}
+    result = {}
+    is_fixed = np.fromiter((task_id in fixed for task_id in task_ids), dtype=bool, count=len(task_ids))
+    for idx in np.flatnonzero(is_fixed).tolist():
+        entry = fixed[task_ids[idx]]
+        start = entry["start"]
+        end = start + int(tasks.length[idx])
+        machine_ids = entry.get("machines") or [entry["machine"]]
+        result[task_ids[idx]] = _entry(start, end, int(due[idx]), machine_ids)
+        for m_id in machine_ids:
+            busy_until[m_id] = max(busy_until[m_id], end)
+    for level in range(int(depth.max(initial=0)) + 1):
+        in_level = (depth == level) & ~is_fixed
+        if level > 0:
+            # Release each stage when its predecessor ends
+            rows = np.flatnonzero(in_level)
+            pred_end = np.fromiter(
+                (result[task_ids[p]]["end"] for p in predecessors[rows].tolist()), dtype=np.int64, count=len(rows)
+            )
+            release[rows] = np.maximum(release[rows], pred_end)
+        for type_code in np.unique(tasks.type_code[in_level]).tolist():
+            indices = np.flatnonzero((tasks.type_code == type_code) & in_level)
+            machine_ids = machine_ids_by_type.get(type_code, [])
+            if tasks.required_count[indices].max() > len(machine_ids):
+                return "No feasible solution found."
+            type_calendars = {m_id: calendars[m_id] for m_id in machine_ids if m_id in calendars}
+            _dispatch(tasks, indices, release, priority, due, machine_ids, busy_until, result, type_calendars)
+    return {task_id: result[task_id] for task_id in task_ids}
+
+def best_greedy_schedule(context: Context) -> Union[Dict[str, Any], str]:
+    """
+    The greedy schedule used as warm start: "edd", and when the tasks form
+    multi-stage jobs also "johnson", keeping the one with less lateness.
+    """
+    best = greedy_schedule(context)
+    if not isinstance(best, dict) or not as_task_table(context.tasks).has_precedence():
+        return best
+    candidate = greedy_schedule(context, rule="johnson")
+    if sum(info["late"] for info in candidate.values()) < sum(info["late"] for info in best.values()):
+        return candidate
+    return best
+
+def _johnson_priority(tasks: TaskTable, predecessors: np.ndarray, depth: np.ndarray) -> np.ndarray:
+    """
+    Position of each task's job in a Johnson sequence.
+    Jobs are reduced to two pseudo stages as in the CDS heuristic, all but the
+    last stage (a) and all but the first stage (b), which is exactly Johnson's
+    rule for two stages. Jobs with a < b go first by increasing a, the others
+    follow by decreasing b; due times break ties.
+    """
+    n = len(tasks)
+    job = np.arange(n)
+    for level in range(1, int(depth.max(initial=0)) + 1):
+        rows = np.flatnonzero(depth == level)
+        job[rows] = job[predecessors[rows]]
+    roots = np.flatnonzero(depth == 0)
+    total = np.bincount(job, weights=tasks.length, minlength=n).astype(np.int64)[roots]
+    first = tasks.length[roots]
+    # The last stage of a job is its deepest task: sorted by job, then depth, it ends each job's run
+    by_job = np.lexsort((depth, job))
+    is_last = np.ones(n, dtype=bool)
+    is_last[:-1] = job[by_job][1:] != job[by_job][:-1]
+    last = np.zeros(n, dtype=tasks.length.dtype)
+    last[job[by_job][is_last]] = tasks.length[by_job][is_last]
+    last = last[roots]
+    single = total == first
+    a = np.where(single, total, total - last)
+    b = np.where(single, total, total - first)
+    due = tasks.due_time[roots]
+    front = a < b
+    order = np.concatenate([
+        roots[front][np.lexsort((due[front], a[front]))],
+        roots[~front][np.lexsort((due[~front], -b[~front]))],
+    ])
+    position = np.empty(n, dtype=np.int64)
+    position[order] = np.arange(len(order))
+    return position[job]
+
+def _dispatch(
+    tasks: TaskTable,
+    indices: np.ndarray,
+    release: np.ndarray,
+    priority: np.ndarray,
+    due: np.ndarray,
+    machine_ids: List[str],
+    busy_until: Dict[str, int],
+    result: Dict[str, Any],
+    calendars: Optional[Dict[str, Availability]] = None,
+) -> None:
+    """
+    Dispatch the given tasks of one machine type onto its machines in place.
+    With calendars (downtime of some of the machines), each task takes the
+    machines on which it can start first, see _calendar_slot.
+    """
+    by_release = indices[np.lexsort((priority[indices], release[indices]))].tolist()
+    release_list = release.tolist()
+    task_ids = tasks.id.tolist()
+    length_list = tasks.length.tolist()
+    due_list = due.tolist()
+    count_list = tasks.required_count.tolist()
+    priority_list = priority.tolist()
+    free = [(busy_until[m_id], m_id) for m_id in machine_ids]
+    heapq.heapify(free)
+    ready = []
+    next_release = 0
+    now = 0
+    while next_release < len(by_release) or ready:
+        # Machines idle since earlier stay at the top of the heap, so time never moves back
+        now = max(now, free[0][0])
+        if not ready:
+            now = max(now, release_list[by_release[next_release]])
+        while next_release < len(by_release) and release_list[by_release[next_release]] <= now:
+            idx = by_release[next_release]
+            heapq.heappush(ready, (priority_list[idx], idx))
+            next_release += 1
+        _, idx = heapq.heappop(ready)
+        if calendars:
+            start, taken = _calendar_slot(free, now, length_list[idx], count_list[idx], calendars)
+            free[:] = [entry for entry in free if entry[1] not in taken]
+            heapq.heapify(free)
+        else:
+            entries = [heapq.heappop(free) for _ in range(count_list[idx])]
+            start = max(now, entries[-1][0])
+            taken = [m_id for _, m_id in entries]
+        end = start + length_list[idx]
+        result[task_ids[idx]] = _entry(start, end, due_list[idx], taken)
+        for m_id in taken:
+            heapq.heappush(free, (end, m_id))
+    for free_at, m_id in free:
+        busy_until[m_id] = free_at
+
+def _calendar_slot(
+    free: List[Tuple[int, str]],
+    now: int,
+    length: int,
+    count: int,
+    calendars: Dict[str, Availability],
+) -> Tuple[int, List[str]]:
+    """
+    Start and machines for a task of `length` hours on `count` machines, given
+    the (free_at, machine id) heap entries: the machines on which the task
+    could start first, and the earliest common start between their downtime.
+    """
+    def next_free(m_id: str, start: int) -> int:
+        calendar = calendars.get(m_id)
+        return calendar.next_free(start, length) if calendar else start
+
+    options = sorted((next_free(m_id, max(now, free_at)), m_id) for free_at, m_id in free)[:count]
+    taken = [m_id for _, m_id in options]
+    start = options[-1][0]
+    # Pushing past one machine's downtime may run into another's; starts only grow, so this ends
+    while True:
+        shifted = max(next_free(m_id, start) for m_id in taken)
+        if shifted == start:
+            return start, taken
+        start = shifted
+
+def _entry(start: int, end: int, due_time: int, machines: List[str]) -> Dict[str, Any]:
+    """
+    Build one schedule entry in the extract_solution format.
+    """
+    return {
+        "start": start,
+        "end": end,
+        "late": max(0, end - due_time),
+        "machine": machines[0],
+        "machines": machines,
+    }
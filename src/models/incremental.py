@@ -0,0 +1,125 @@
+
+from src.models.entities import Context, SolverConfig, Task, WashingMachine
+from src.models.lp_model import create_scheduling_model, extract_solution, precheck, solve_model
+from typing import Any, Dict, List, Optional, Union
+
+class IncrementalScheduler:
+    """
+    Scheduler that keeps its last solution between solves.
+    Tasks that have already started are frozen, everything else is re-optimized
+    with the previous schedule as a warm start, so a few arriving tasks do not
+    trigger a cold solve of the whole day.
+    """
+
+    def __init__(
+        self,
+        machines: List[WashingMachine],
+        horizon: Optional[int] = None,
+        pooled: bool = False,
+        solver_config: Optional[SolverConfig] = None,
+    ) -> None:
+        self.machines = list(machines)
+        self.horizon = horizon
+        self.pooled = pooled
+        self.solver_config = solver_config or SolverConfig()
+        self.tasks: Dict[str, Task] = {}
+        # Last known schedule per task id: {"start", "end", "late", "machine", "machines"}
+        self.schedule: Dict[str, Dict[str, Any]] = {}
+        # Tasks added since the last successful solve, with the task each one replaced (None if new)
+        self.added: Dict[str, Optional[Task]] = {}
+
+    def add_tasks(self, tasks: List[Task]) -> None:
+        """
+        Register newly arrived tasks; they are scheduled on the next call to solve.
+        If that solve fails, they are taken back out (see commit).
+        """
+        for t in tasks:
+            if t.id not in self.added:
+                self.added[t.id] = self.tasks.get(t.id)
+            self.tasks[t.id] = t
+
+    def remove_tasks(self, task_ids: List[str]) -> None:
+        """
+        Drop tasks and their schedule; the others are re-planned on the next call to solve.
+        """
+        for task_id in task_ids:
+            self.tasks.pop(task_id, None)
+            self.schedule.pop(task_id, None)
+            self.added.pop(task_id, None)
+
+    def solve(self, now: int = 0) -> Union[Dict[str, Any], str]:
+        """
+        Re-optimize all tasks that have not started by `now`.
+        Finished tasks are left out of the model, running ones are pinned to their
+        start and machines, and the previous schedule is used as a solver hint.
+        Returns the full schedule in the extract_solution format.
+        """
+        context = self.prepare(now)
+        if context is None:
+            return dict(self.schedule)
+        return self.commit(solve_prepared(context))
+
+    def prepare(self, now: int = 0) -> Optional[Context]:
+        """
+        The context solve() would optimize, or None when no task is left to plan.
+        Together with solve_prepared and commit, this lets the search run elsewhere,
+        e.g. in a worker process.
+        """
+        fixed = {}
+        hints = {}
+        active = []
+        for t in self.tasks.values():
+            entry = self.schedule.get(t.id)
+            if entry is None:
+                active.append(t)
+            elif entry["start"] < now:
+                if entry["end"] > now:
+                    fixed[t.id] = entry
+                    active.append(t)
+            else:
+                hints[t.id] = entry
+                active.append(t)
+        if not active:
+            return None
+        return Context(
+            machines=self.machines,
+            tasks=active,
+            horizon=self.horizon,
+            pooled=self.pooled,
+            fixed=fixed,
+            hints=hints,
+            frozen_until=now,
+            solver_config=self.solver_config,
+        )
+
+    def commit(self, result: Union[Dict[str, Any], str]) -> Union[Dict[str, Any], str]:
+        """
+        Merge the result of solve_prepared into the kept schedule and return the full schedule.
+        A failed result (a string) is returned as it is, and the tasks added since the
+        last successful solve are rolled back so that they do not fail every later solve.
+        """
+        if not isinstance(result, dict):
+            for task_id, previous in self.added.items():
+                if previous is None:
+                    del self.tasks[task_id]
+                else:
+                    self.tasks[task_id] = previous
+            self.added = {}
+            return result
+        self.added = {}
+        self.schedule.update(result)
+        return {task_id: dict(info) for task_id, info in self.schedule.items()}
+
+def solve_prepared(context: Context) -> Union[Dict[str, Any], str]:
+    """
+    Solve a context from IncrementalScheduler.prepare. With Context.precheck, a
+    context the presolve analysis proves infeasible is answered with its reasons
+    (see solve_scheduling_problem).
+    """
+    if context.precheck:
+        analysis = precheck(context)
+        if analysis.infeasible:
+            return analysis.message()
+    model, variables = create_scheduling_model(context)
+    solver, status = solve_model(model, context.solver_config, variables.objective_stages)
+    return extract_solution(solver, status, variables)
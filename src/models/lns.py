@@ -0,0 +1,211 @@
+
+import math
+import os
+import random
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from src.models.entities import Context
+from src.models.heuristics import best_greedy_schedule
+from src.models.lp_model import solve_component
+from src.models.objectives import evaluate_schedule, stage_value
+from src.models.tables import MACHINE_TYPES, MachineTable, TaskTable, as_machine_table, as_task_table
+from src.profiling import phase
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+NEIGHBORHOODS = ("time_window", "machine", "most_late")
+
+def solve_lns(context: Context) -> Union[Dict[str, Any], str]:
+    """
+    Improve a schedule by large neighbourhood search: starting from the greedy
+    schedule (or Context.hints), each round frees a few neighbourhoods of about
+    lns_size tasks, re-solves each with every other task kept where it is, and
+    keeps the best result that improves the objectives (compared stage by stage).
+    Neighbourhoods take turns between a window of consecutive starts, a stretch
+    of two machines of one type, and the tasks around a late one. With several
+    processes (Context.max_workers) the neighbourhoods of a round are solved in
+    parallel. Rounds stop at lns_rounds, at the time limit of the solver
+    configuration, or once every objective is 0. Like the greedy schedule it
+    starts from, the result may run past Context.horizon.
+    """
+    tasks = as_task_table(context.tasks)
+    machines = as_machine_table(context.machines)
+    context = replace(context, tasks=tasks, machines=machines)
+    incumbent = context.hints
+    if incumbent is None:
+        with phase(context.profiler, "greedy"):
+            incumbent = best_greedy_schedule(context)
+        if not isinstance(incumbent, dict):
+            return incumbent
+    score = _score(incumbent, context)
+    rng = random.Random(context.solver_config.random_seed or 0)
+    cores = os.cpu_count() or 1
+    processes = max(1, context.max_workers or cores)
+    search_workers = context.solver_config.num_search_workers or max(1, cores // processes)
+    time_limit = context.solver_config.max_time_in_seconds
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    pool = ProcessPoolExecutor(max_workers=processes) if processes > 1 else None
+    try:
+        with phase(context.profiler, "lns"):
+            for round_index in range(context.lns_rounds):
+                left = None if deadline is None else deadline - time.perf_counter()
+                if (left is not None and left <= 0) or not any(score):
+                    break
+                seconds = context.lns_time_limit if left is None else min(context.lns_time_limit, left)
+                kinds = [NEIGHBORHOODS[(round_index * processes + k) % len(NEIGHBORHOODS)] for k in range(processes)]
+                neighborhoods = [pick_neighborhood(kind, tasks, incumbent, context, rng) for kind in kinds]
+                subproblems = [
+                    neighborhood_context(context, incumbent, rows, seconds, search_workers) for rows in neighborhoods
+                ]
+                results = list(pool.map(solve_component, subproblems) if pool else map(solve_component, subproblems))
+                best = None
+                for rows, result in zip(neighborhoods, results):
+                    if not isinstance(result, dict):
+                        continue
+                    # Only the freed tasks move; the fixed neighbours were solved without their successors
+                    candidate = dict(incumbent)
+                    candidate.update({task_id: result[task_id] for task_id in tasks.id[rows].tolist()})
+                    candidate_score = _score(candidate, context)
+                    if candidate_score < (score if best is None else best[0]):
+                        best = candidate_score, candidate
+                if best is not None:
+                    score, incumbent = best
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return {task_id: incumbent[task_id] for task_id in tasks.id.tolist()}
+
+def _score(schedule: Dict[str, Dict[str, Any]], context: Context) -> Tuple[float, ...]:
+    """
+    The value of every objective stage, compared lexicographically.
+    """
+    metrics = evaluate_schedule(schedule, context)
+    return tuple(stage_value(metrics, stage) for stage in context.objectives)
+
+def _machines_of(entry: Dict[str, Any]) -> List[str]:
+    return entry.get("machines") or [entry["machine"]]
+
+def pick_neighborhood(
+    kind: str,
+    tasks: TaskTable,
+    schedule: Dict[str, Dict[str, Any]],
+    context: Context,
+    rng: random.Random,
+) -> np.ndarray:
+    """
+    Rows of up to Context.lns_size tasks to free, never fixed ones:
+    "time_window" takes consecutive tasks in start order, "machine" a stretch
+    of the tasks on one machine and another of its type, "most_late" the tasks
+    of one type starting closest to a late task (picked with a chance that
+    grows with its lateness; a time window when nothing is late).
+    """
+    size = context.lns_size
+    task_ids = tasks.id.tolist()
+    fixed = context.fixed or {}
+    movable = np.flatnonzero(np.fromiter((task_id not in fixed for task_id in task_ids), dtype=bool, count=len(tasks)))
+    if len(movable) <= size:
+        return movable
+    starts = np.fromiter((schedule[task_id]["start"] for task_id in task_ids), dtype=np.float64, count=len(tasks))
+    if kind == "most_late":
+        lates = np.fromiter((schedule[task_id]["late"] for task_id in task_ids), dtype=np.float64, count=len(tasks))[movable]
+        if lates.any():
+            seed = rng.choices(movable.tolist(), weights=lates.tolist())[0]
+            same_type = movable[tasks.type_code[movable] == tasks.type_code[seed]]
+            distance = np.abs(starts[same_type] - starts[seed])
+            return np.sort(same_type[np.argsort(distance, kind="stable")[:size]])
+        kind = "time_window"
+    if kind == "machine":
+        seed = rng.choice(movable.tolist())
+        own = _machines_of(schedule[task_ids[seed]])
+        others = [
+            m_id for m_id, type_code in zip(context.machines.id.tolist(), context.machines.type_code.tolist())
+            if type_code == tasks.type_code[seed] and m_id not in own
+        ]
+        chosen = set(own[:1] + ([rng.choice(others)] if others else []))
+        on_chosen = movable[[bool(chosen.intersection(_machines_of(schedule[task_ids[row]]))) for row in movable.tolist()]]
+        ordered = on_chosen[np.argsort(starts[on_chosen], kind="stable")]
+        position = int(np.flatnonzero(ordered == seed)[0])
+        first = max(0, min(position - size // 2, len(ordered) - size))
+        return np.sort(ordered[first:first + size])
+    if kind != "time_window":
+        raise ValueError(f"Unknown neighbourhood {kind!r}, expected one of {NEIGHBORHOODS}")
+    ordered = movable[np.argsort(starts[movable], kind="stable")]
+    first = rng.randrange(len(ordered) - size + 1)
+    return np.sort(ordered[first:first + size])
+
+def neighborhood_context(
+    context: Context,
+    schedule: Dict[str, Dict[str, Any]],
+    rows: np.ndarray,
+    seconds: Optional[float],
+    search_workers: int,
+) -> Context:
+    """
+    The context that re-solves the tasks at rows (TaskTable positions) with
+    everything else kept as in the schedule. Predecessors and successors of
+    the freed tasks come along as fixed entries, so precedence still holds.
+    Only the machines these tasks run on are kept, which lets the freed tasks
+    trade places without a literal per machine of the type, and every other
+    task on them becomes downtime. The horizon is the
+    latest end among these tasks in the schedule, which keeps the schedule a
+    feasible warm start and leaves out the downtime after it.
+    """
+    tasks = context.tasks
+    machines = context.machines
+    task_ids = tasks.id.tolist()
+    freed = np.zeros(len(tasks), dtype=bool)
+    freed[rows] = True
+    predecessors = tasks.predecessor_positions()
+    neighbours = np.zeros(len(tasks), dtype=bool)
+    neighbours[predecessors[rows][predecessors[rows] >= 0]] = True
+    neighbours[(predecessors >= 0) & freed[predecessors]] = True
+    neighbours &= ~freed
+    sub_rows = np.flatnonzero(freed | neighbours)
+    starts = np.fromiter((schedule[task_id]["start"] for task_id in task_ids), dtype=np.float64, count=len(tasks))
+    ends = np.fromiter((schedule[task_id]["end"] for task_id in task_ids), dtype=np.float64, count=len(tasks))
+    earliest = math.floor(min(starts[sub_rows].min(), tasks.arrival_time[sub_rows].min()))
+    horizon = math.ceil(ends[sub_rows].max())
+    used = {m_id for row in sub_rows.tolist() for m_id in _machines_of(schedule[task_ids[row]])}
+    # Tasks that stay put and overlap the span of the neighbourhood block their machines
+    blocking = ~(freed | neighbours) & (ends > earliest) & (starts < horizon) & np.isin(tasks.type_code, tasks.type_code[sub_rows])
+    occupied: Dict[str, List[Tuple[int, int]]] = {m_id: [] for m_id in used}
+    for row in np.flatnonzero(blocking).tolist():
+        entry = schedule[task_ids[row]]
+        for m_id in _machines_of(entry):
+            if m_id in occupied:
+                occupied[m_id].append((math.floor(entry["start"]), math.ceil(entry["end"])))
+    keep = [i for i, m_id in enumerate(machines.id.tolist()) if m_id in used]
+    sub_machines = MachineTable.from_records(
+        {
+            "id": machines.id[i],
+            "type": MACHINE_TYPES[machines.type_code[i]],
+            "downtime": list(machines.downtime[i]) + occupied[machines.id[i]],
+        }
+        for i in keep
+    )
+    sub_ids = tasks.id[sub_rows].tolist()
+    return replace(
+        context,
+        tasks=tasks.take(sub_rows),
+        machines=sub_machines,
+        horizon=horizon,
+        fixed={task_id: schedule[task_id] for task_id in tasks.id[neighbours].tolist()} or None,
+        hints={task_id: schedule[task_id] for task_id in sub_ids},
+        lateness_bound=None,
+        # The greedy fallback ignores the horizon, past which downtime was left out
+        greedy_hint=False,
+        lns=False,
+        rolling_horizon=False,
+        decompose=False,
+        solver_config=replace(
+            context.solver_config,
+            max_time_in_seconds=seconds,
+            num_search_workers=search_workers,
+            # Probing a neighbourhood can take longer than solving it
+            probing_level=0 if context.solver_config.probing_level is None else context.solver_config.probing_level,
+            log_callback=None,
+        ),
+        profiler=None,
+        cache=None,
+    )
@@ -1,55 +1,196 @@
 
+import heapq
+import time
+import numpy as np
+from dataclasses import replace
 from ortools.sat.python import cp_model
-from src.models.entities import Context, ModelVariables
-from typing import Dict, Any, Tuple, Union
+from src.models.analysis import Analysis, analyze
+from src.models.entities import Context, ModelVariables, SolverConfig
+from src.models.heuristics import best_greedy_schedule, greedy_schedule
+from src.models.objectives import bounds_tardiness, objective_stages
+from src.models.tables import (
+    MachineTable, TaskTable, as_machine_table, as_task_table, chain_lengths, precedence_depth, start_windows,
+    to_hours, to_slots,
+)
+from src.profiling import phase
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple, Union
 
 def create_scheduling_model(
     context: Context
 ) -> Tuple[cp_model.CpModel, ModelVariables]:
     """
     Create the CP-SAT model for the dry clean scheduling problem.
-    Returns the model and a ModelVariables dataclass for later extraction.
+    Returns the model and a ModelVariables dataclass for later extraction;
+    the model minimizes the first stage of Context.objectives.
+    Tasks and machines may be given as model lists or as TaskTable/MachineTable.
+    A task with a predecessor starts after it ends, and only tasks that are
+    nobody's predecessor (the last stage of a job) count towards lateness.
+    Machine downtime becomes fixed intervals in the machine's no-overlap set;
+    types with downtime are modelled per machine even when pooled.
     """
+    if context.slot_minutes < 1:
+        raise ValueError("slot_minutes must be at least 1")
     model = cp_model.CpModel()
-    machines = context.machines
-    tasks = context.tasks
-    machines_by_type = {}
-    for m in machines:
-        machines_by_type.setdefault(m.type, []).append(m.id)
+    machines = as_machine_table(context.machines)
+    tasks = as_task_table(context.tasks)
+    slot = context.slot_minutes
+    task_ids = tasks.id.tolist()
+    # Everything below is in time slots of slot_minutes
+    arrival_slots = to_slots(tasks.arrival_time, slot)
+    length_slots = to_slots(tasks.length, slot)
+    due_slots = to_slots(tasks.due_time, slot, round_up=False)
+    lengths = length_slots.tolist()
+    due_times = due_slots.tolist()
+    type_codes = tasks.type_code.tolist()
+    counts = tasks.required_count.tolist()
+    predecessors = tasks.predecessor_positions()
+    depth = precedence_depth(predecessors)
+    is_terminal = np.ones(len(tasks), dtype=bool)
+    is_terminal[predecessors[predecessors >= 0]] = False
+    machines_by_type = machine_ids_by_type(machines)
+    classes = machine_classes(machines)
+    calendar_types = sorted(set(machines.type_code[[bool(w) for w in machines.downtime.tolist()]].tolist()))
+    pooled_types = set(machines_by_type) - set(calendar_types) if context.pooled else set()
     start_vars = {}
     end_vars = {}
     late_vars = {}
     assigned_vars = {}
-    intervals_by_machine = {m.id: [] for m in machines}
+    assigned_machines = {}
+    demand_so_far = {}
+    intervals_by_machine = {m_id: [] for m_id in machines.id.tolist()}
+    fixed = context.fixed or {}
+    hints = context.hints or {}
+    fixed_starts = {task_id: int(to_slots(entry["start"], slot)) for task_id, entry in fixed.items()}
+    frozen_until = int(to_slots(context.frozen_until or 0, slot))
+    # Pinned machines may contradict the first-use ordering, so only break symmetry on a clean slate
+    symmetry_breaking = context.symmetry_breaking and not fixed
+    if symmetry_breaking and hints and len(pooled_types) < len(machines_by_type):
+        hints = _relabel_by_first_use(tasks, hints, classes)
     # Use the maximum due_time as the default horizon, but allow for a custom horizon in context
     if hasattr(context, 'horizon') and context.horizon is not None:
-        horizon = context.horizon
+        horizon = int(to_slots(context.horizon, slot, round_up=False))
     else:
-        horizon = max(t.due_time for t in tasks) + max(int(t.length.value) for t in tasks)
-    for t in tasks:
-        start = model.NewIntVar(t.arrival_time, horizon, f"start_{t.id}")
-        end = model.NewIntVar(t.arrival_time, horizon, f"end_{t.id}")
-        late = model.NewIntVar(0, horizon, f"late_{t.id}")
-        model.Add(end == start + int(t.length.value))
-        model.Add(late >= end - t.due_time)
-        model.Add(late >= 0)
-        model.Add(end <= horizon)  # Enforce that no task ends after the horizon
-        start_vars[t.id] = start
-        end_vars[t.id] = end
-        late_vars[t.id] = late
-        assigned_vars[t.id] = []
-        for m in machines:
-            if m.type == t.required_type:
-                assigned = model.NewBoolVar(f"assigned_{t.id}_{m.id}")
-                interval = model.NewOptionalIntervalVar(
-                    start, int(t.length.value), end, assigned, f"interval_{t.id}_{m.id}"
-                )
-                intervals_by_machine[m.id].append(interval)
-                assigned_vars[t.id].append(assigned)
-        model.Add(sum(assigned_vars[t.id]) == t.required_count)
-    for m in machines:
-        model.AddNoOverlap(intervals_by_machine[m.id])
-    model.Minimize(sum(late_vars[t.id] for t in tasks))
+        latest = max(due_times + list(fixed_starts.values()) + [frozen_until])
+        # Leave room for the longest chain of stages to run after the latest due time
+        horizon = latest + int(chain_lengths(tasks, predecessors, depth, length_slots).max(initial=0))
+        # A warm start that runs later must stay feasible, otherwise the hint is worthless
+        horizon = max([horizon] + [int(to_slots(entry["end"], slot)) for entry in hints.values() if "end" in entry])
+    release = np.maximum(arrival_slots, frozen_until)
+    for pos, task_id in enumerate(task_ids):
+        if task_id in fixed_starts:
+            release[pos] = fixed_starts[task_id]
+    earliest_starts, latest_starts = start_windows(release, length_slots, predecessors, depth, horizon)
+    # No task can be later than the whole schedule, given a bound on that
+    late_cap = horizon
+    if context.lateness_bound is not None:
+        late_cap = min(late_cap, int(to_slots(context.lateness_bound, slot)))
+    pooled_intervals = {}
+    fixed_machines = {}
+    # Hints are collected as (variable index, value) and written to the proto at once
+    hint_index = []
+    hint_value = []
+    assignment_index = []
+    assignment_task = []
+    assignment_machine = []
+    new_var = _var_factory(model)
+    for pos, (task_id, length, due_time, type_code, count, terminal, earliest, latest_start) in enumerate(zip(
+        task_ids, lengths, due_times, type_codes, counts, is_terminal.tolist(),
+        earliest_starts.tolist(), latest_starts.tolist(),
+    )):
+        if task_id in fixed:
+            earliest = latest_start = fixed_starts[task_id]
+        elif task_id in hints and context.fix_slack is not None:
+            hinted = int(to_slots(hints[task_id]["start"], slot))
+            # A task finishing well before its due time in the warm start keeps that start
+            if earliest <= hinted <= latest_start and hinted + length + int(to_slots(context.fix_slack, slot)) <= due_time:
+                earliest = latest_start = hinted
+        if earliest > latest_start:
+            model.add_bool_or([])  # The task cannot fit before the horizon: report infeasible, not invalid
+            latest_start = earliest
+        start = new_var(f"start_{task_id}", earliest, latest_start)
+        end = new_var(f"end_{task_id}", earliest + length, latest_start + length)
+        late = new_var(f"late_{task_id}", 0, max(0, min(late_cap, latest_start + length - due_time)) if terminal else 0)
+        model.add(end == start + length)
+        if terminal:
+            model.add_max_equality(late, [end - due_time, 0])
+        start_vars[task_id] = start
+        end_vars[task_id] = end
+        late_vars[task_id] = late
+        if task_id in hints:
+            hint_index.append(start.index)
+            hint_value.append(int(to_slots(hints[task_id]["start"], slot)))
+        if type_code in pooled_types:
+            assigned_vars[task_id] = []
+            assigned_machines[task_id] = []
+            if task_id in fixed:
+                fixed_machines[task_id] = _entry_machines(fixed[task_id])
+            interval = model.new_interval_var(start, length, end, f"interval_{task_id}")
+            pooled_intervals.setdefault(type_code, []).append((interval, count))
+            continue
+        candidates = machines_by_type.get(type_code, [])
+        if symmetry_breaking:
+            # Identical machines can be relabelled in order of first use, so the k-th task of a
+            # type never needs a machine beyond its cumulative demand in each class of identical machines
+            demand_so_far[type_code] = demand_so_far.get(type_code, 0) + count
+            groups = classes.get(type_code, [])
+            if len(groups) == 1:
+                candidates = candidates[:demand_so_far[type_code]]
+            else:
+                candidates = [m_id for group in groups for m_id in group[:demand_so_far[type_code]]]
+        if task_id in fixed:
+            # Pinned assignments become constants instead of constraints
+            pinned = set(_entry_machines(fixed[task_id]))
+            literals = [new_var(f"assigned_{task_id}_{m_id}", int(m_id in pinned), int(m_id in pinned)) for m_id in candidates]
+        else:
+            literals = [new_var(f"assigned_{task_id}_{m_id}", 0, 1) for m_id in candidates]
+            if task_id in hints:
+                hinted_machines = set(_entry_machines(hints[task_id]))
+                hint_index.extend(literal.index for literal in literals)
+                hint_value.extend(int(m_id in hinted_machines) for m_id in candidates)
+        # The per-machine intervals (and first-use literals) go unnamed: with tasks x machines of them, the names
+        # alone take a noticeable share of the model's memory
+        for m_id, literal in zip(candidates, literals):
+            intervals_by_machine[m_id].append(model.new_optional_interval_var(start, length, end, literal, ""))
+        assigned_vars[task_id] = literals
+        assigned_machines[task_id] = candidates
+        assignment_index.extend(literal.index for literal in literals)
+        assignment_task.extend([pos] * len(literals))
+        assignment_machine.extend(candidates)
+        if count == 1:
+            model.add_exactly_one(literals)
+        else:
+            model.add(cp_model.LinearExpr.sum(literals) == count)
+    for type_code, items in pooled_intervals.items():
+        model.add_cumulative(
+            [interval for interval, _ in items],
+            [count for _, count in items],
+            len(machines_by_type.get(type_code, [])),
+        )
+    for m_id, windows in zip(machines.id.tolist(), machines.downtime.tolist()):
+        for window_start, window_end in windows:
+            # Whole slots the machine is down for at least part of
+            down_start = max(0, int(to_slots(window_start, slot, round_up=False)))
+            down_end = min(horizon, int(to_slots(window_end, slot)))
+            if down_start < down_end:
+                intervals_by_machine[m_id].append(model.new_fixed_size_interval_var(down_start, down_end - down_start, ""))
+    for m_id, type_code in zip(machines.id.tolist(), machines.type_code.tolist()):
+        if type_code not in pooled_types:
+            model.add_no_overlap(intervals_by_machine[m_id])
+    if symmetry_breaking:
+        _add_first_use_ordering(
+            model, tasks, {t: groups for t, groups in classes.items() if t not in pooled_types},
+            assigned_vars, assigned_machines,
+        )
+    for pos in np.flatnonzero(predecessors >= 0).tolist():
+        model.add(start_vars[task_ids[pos]] >= end_vars[task_ids[predecessors[pos]]])
+    hint = model.proto.solution_hint
+    hint.vars.extend(hint_index)
+    hint.values.extend(hint_value)
+    stages = objective_stages(
+        model, context.objectives, tasks, machines, list(late_vars.values()), list(end_vars.values()),
+        length_slots, horizon,
+    )
+    model.minimize(stages[0])
     variables = ModelVariables(
         start_vars=start_vars,
         end_vars=end_vars,
@@ -57,53 +198,416 @@ def create_scheduling_model(
         assigned_vars=assigned_vars,
         machines=machines,
         tasks=tasks,
+        assigned_machines=assigned_machines,
+        pooled=bool(pooled_types),
+        calendar_types=calendar_types if pooled_types else [],
+        fixed_machines=fixed_machines,
+        start_index=_var_indices(start_vars.values()),
+        end_index=_var_indices(end_vars.values()),
+        late_index=_var_indices(late_vars.values()),
+        slot_minutes=slot,
+        objective_stages=stages,
+        assignment_index=np.array(assignment_index, dtype=np.int64),
+        assignment_task=np.array(assignment_task, dtype=np.int64),
+        assignment_machine=np.array(assignment_machine, dtype=object),
     )
     return model, variables
 
-def solve_model(model: cp_model.CpModel) -> Tuple[cp_model.CpSolver, Any]:
+def warm_start(context: Context, greedy: Union[Dict[str, Any], str]) -> Context:
+    """
+    The context with a greedy schedule as hints. When that schedule is a
+    feasible solution of the model (it ends by the horizon, and hour times
+    are whole slots) and tardiness is minimized first, its total lateness
+    also becomes the lateness bound.
+    """
+    if not isinstance(greedy, dict):
+        return context
+    bound = context.lateness_bound
+    fits = context.horizon is None or all(info["end"] <= context.horizon for info in greedy.values())
+    if fits and 60 % context.slot_minutes == 0 and bounds_tardiness(context.objectives):
+        total = sum(info["late"] for info in greedy.values())
+        bound = total if bound is None else min(bound, total)
+    return replace(context, hints=greedy, lateness_bound=bound)
+
+def machine_ids_by_type(machines: MachineTable) -> Dict[int, List[str]]:
+    """
+    Machine ids grouped by machine type code, in table order.
+    """
+    grouped = {}
+    for m_id, type_code in zip(machines.id.tolist(), machines.type_code.tolist()):
+        grouped.setdefault(type_code, []).append(m_id)
+    return grouped
+
+def machine_classes(machines: MachineTable) -> Dict[int, List[List[str]]]:
+    """
+    Machine ids grouped by type code and then by identical downtime, in table
+    order. Machines of one class are interchangeable in any schedule.
+    """
+    grouped = {}
+    for m_id, type_code, windows in zip(machines.id.tolist(), machines.type_code.tolist(), machines.downtime.tolist()):
+        grouped.setdefault(type_code, {}).setdefault(windows, []).append(m_id)
+    return {type_code: list(groups.values()) for type_code, groups in grouped.items()}
+
+def _var_indices(variables: Iterable[cp_model.IntVar]) -> np.ndarray:
+    """
+    Positions of the given variables in the model, for bulk reads of a solution.
+    """
+    return np.fromiter((v.index for v in variables), dtype=np.int64)
+
+def _relabel_by_first_use(
+    tasks: TaskTable,
+    hints: Dict[str, Dict[str, Any]],
+    classes: Dict[int, List[List[str]]],
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Rename the machines of hinted entries so that, per class of identical
+    machines (see machine_classes), machines are first used in task order,
+    which keeps the hint compatible with the first-use ordering.
+    """
+    group_of = {m_id: group for groups in classes.values() for group in groups for m_id in group}
+    relabel = {}
+    used_per_group = {}
+    relabelled = {}
+    for task_id in tasks.id.tolist():
+        if task_id not in hints:
+            continue
+        new_machines = []
+        for m_id in _entry_machines(hints[task_id]):
+            if m_id not in relabel:
+                group = group_of.get(m_id)
+                if group is None:
+                    continue
+                used = used_per_group.get(id(group), 0)
+                relabel[m_id] = group[used]
+                used_per_group[id(group)] = used + 1
+            new_machines.append(relabel[m_id])
+        relabelled[task_id] = dict(hints[task_id], machines=new_machines)
+    return relabelled
+
+def _entry_machines(entry: Dict[str, Any]) -> List[str]:
+    """
+    Machine ids of a schedule entry, accepting the single "machine" form as well.
+    """
+    return entry.get("machines") or [entry["machine"]]
+
+def _add_first_use_ordering(
+    model: cp_model.CpModel,
+    tasks: TaskTable,
+    classes: Dict[int, List[List[str]]],
+    assigned_vars: Dict[str, List[cp_model.IntVar]],
+    assigned_machines: Dict[str, List[str]],
+) -> None:
+    """
+    Lexicographic symmetry breaking for identical machines (see machine_classes).
+    A machine may only be used by a task if the previous machine of the same
+    class is already used by that task or an earlier one (in task order).
+    Candidates are a prefix of each class (see create_scheduling_model),
+    so walking them in order visits the machines in class order.
+    """
+    new_var = _var_factory(model)
+    task_ids = tasks.id.tolist()
+    type_codes = tasks.type_code.tolist()
+    for type_code, groups in classes.items():
+        whole_type = len(groups) == 1
+        # A machine alone in its class has no twin to break symmetry with
+        group_of = {m_id: k for k, group in enumerate(groups) if len(group) > 1 for m_id in group}
+        if not group_of:
+            continue
+        # used[k][m_id] is true only if some task seen so far runs on m_id
+        used = [{} for _ in groups]
+        for task_id in (task_id for task_id, code in zip(task_ids, type_codes) if code == type_code):
+            if whole_type:
+                pairs_by_group = {0: list(zip(assigned_machines[task_id], assigned_vars[task_id]))}
+            else:
+                pairs_by_group = {}
+                for m_id, literal in zip(assigned_machines[task_id], assigned_vars[task_id]):
+                    k = group_of.get(m_id)
+                    if k is not None:
+                        pairs_by_group.setdefault(k, []).append((m_id, literal))
+            for k, pairs in pairs_by_group.items():
+                used_in_group = used[k]
+                for m_id, literal in pairs:
+                    prev_used = used_in_group.get(m_id)
+                    now_used = new_var("", 0, 1)
+                    if prev_used is None:
+                        model.add_implication(now_used, literal)
+                    else:
+                        model.add_bool_or([~now_used, prev_used, literal])
+                    used_in_group[m_id] = now_used
+                for (prev_id, _), (_, literal) in zip(pairs, pairs[1:]):
+                    model.add_implication(literal, used_in_group[prev_id])
+
+def _var_factory(model: cp_model.CpModel) -> Callable[[str, int, int], cp_model.IntVar]:
+    """
+    model.new_int_var for the hot loops of the builder, building each
+    distinct Domain once.
+    """
+    domains = {}
+
+    def new_var(name: str, lb: int, ub: int) -> cp_model.IntVar:
+        domain = domains.get((lb, ub))
+        if domain is None:
+            domain = domains[lb, ub] = cp_model.Domain(lb, ub)
+        return model.new_int_var_from_domain(domain, name)
+
+    return new_var
+
+def assign_pooled_machines(
+    tasks: TaskTable,
+    starts: List[int],
+    ends: List[int],
+    machines: MachineTable,
+    fixed_machines: Optional[Dict[str, List[str]]] = None,
+) -> List[List[str]]:
+    """
+    Turn a pooled (cumulative) schedule into concrete machine ids, per task position.
+    Sweeping tasks by start time and taking the machines that have been idle
+    longest always succeeds, because the cumulative constraint guarantees that
+    enough machines of the type are free whenever a task starts.
+    Tasks in fixed_machines keep their machines; they must start before every
+    other task (see Context.frozen_until) for the sweep to stay valid.
+    """
+    fixed_machines = fixed_machines or {}
+    task_ids = tasks.id.tolist()
+    type_codes = tasks.type_code.tolist()
+    counts = tasks.required_count.tolist()
+    free_at = {m_id: 0 for m_id in machines.id.tolist()}
+    free_by_type = {
+        type_code: [(0, m_id) for m_id in machine_ids]
+        for type_code, machine_ids in machine_ids_by_type(machines).items()
+    }
+    assignment = [None] * len(task_ids)
+    order = sorted(range(len(task_ids)), key=lambda i: (task_ids[i] not in fixed_machines, starts[i], ends[i]))
+    for i in order:
+        heap = free_by_type[type_codes[i]]
+        if task_ids[i] in fixed_machines:
+            taken = fixed_machines[task_ids[i]]
+        else:
+            taken = []
+            while len(taken) < counts[i]:
+                machine_free_at, m_id = heapq.heappop(heap)
+                if machine_free_at != free_at[m_id]:
+                    continue  # Stale entry, the machine was re-queued after a fixed task
+                if machine_free_at > starts[i]:
+                    raise ValueError(f"Machine capacity exceeded when assigning task {task_ids[i]}")
+                taken.append(m_id)
+        assignment[i] = list(taken)
+        for m_id in taken:
+            free_at[m_id] = ends[i]
+            heapq.heappush(heap, (ends[i], m_id))
+    return assignment
+
+def solve_model(
+    model: cp_model.CpModel,
+    config: Optional[SolverConfig] = None,
+    stages: Optional[List[Any]] = None,
+) -> Tuple[cp_model.CpSolver, Any]:
     """
     Solve the given CP-SAT model and return the solver and status.
+    The optional SolverConfig sets time limit, workers, gap limit, seed and logging.
+    With several objective stages (ModelVariables.objective_stages) they are
+    minimized lexicographically: each stage is kept at the best value found
+    and its solution warm-starts the next, and the time limit is shared among
+    the stages. A stage that finds nothing leaves the previous solution.
+    """
+    if stages is None or len(stages) <= 1:
+        solver = cp_model.CpSolver()
+        if config is not None:
+            configure_solver(solver, config)
+        return solver, solver.solve(model)
+    deadline = stage_deadline(config)
+    best = None
+    for k, objective in enumerate(stages):
+        solver = stage_solver(config, deadline, len(stages) - k)
+        model.minimize(objective)
+        status = solver.solve(model)
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return best or (solver, status)
+        best = solver, status
+        if k + 1 < len(stages):
+            keep_stage(model, objective, solver)
+    return best
+
+def stage_deadline(config: Optional[SolverConfig]) -> Optional[float]:
+    """
+    perf_counter time by which all objective stages must be done, None without a time limit.
+    """
+    if config is None or config.max_time_in_seconds is None:
+        return None
+    return time.perf_counter() + config.max_time_in_seconds
+
+def stage_solver(config: Optional[SolverConfig], deadline: Optional[float], stages_left: int) -> cp_model.CpSolver:
+    """
+    A solver for the next objective stage, with an equal share of the time left.
     """
     solver = cp_model.CpSolver()
-    status = solver.Solve(model)
-    return solver, status
+    if config is not None:
+        configure_solver(solver, config)
+    if deadline is not None:
+        solver.parameters.max_time_in_seconds = max(deadline - time.perf_counter(), 0.0) / stages_left
+    return solver
+
+def keep_stage(model: cp_model.CpModel, objective: Any, solver: Any) -> None:
+    """
+    Constrain a stage objective to the value just found and hint the whole solution.
+    """
+    model.add(objective <= round(solver.objective_value))
+    model.clear_hints()
+    solution = solver.response_proto.solution
+    hint = model.proto.solution_hint
+    hint.vars.extend(range(len(solution)))
+    hint.values.extend(solution)
+
+def configure_solver(solver: cp_model.CpSolver, config: SolverConfig) -> None:
+    """
+    Copy a SolverConfig onto the parameters of a CP-SAT solver.
+    """
+    if config.max_time_in_seconds is not None:
+        solver.parameters.max_time_in_seconds = config.max_time_in_seconds
+    if config.num_search_workers:
+        solver.parameters.num_workers = config.num_search_workers
+    if config.relative_gap_limit is not None:
+        solver.parameters.relative_gap_limit = config.relative_gap_limit
+    if config.random_seed is not None:
+        solver.parameters.random_seed = config.random_seed
+    if config.probing_level is not None:
+        solver.parameters.cp_model_probing_level = config.probing_level
+    if config.log_search_progress or config.log_callback is not None:
+        solver.parameters.log_search_progress = True
+    if config.log_callback is not None:
+        solver.parameters.log_to_stdout = False
+        solver.log_callback = config.log_callback
 
 def extract_solution(
     solver: cp_model.CpSolver, status: Any, variables: ModelVariables
 ) -> Union[Dict[str, Any], str]:
     """
     Extract the solution from the solver and variables if feasible.
-    Returns a dictionary mapping task IDs to their schedule.
-    """
-    tasks = variables.tasks
-    start_vars = variables.start_vars
-    end_vars = variables.end_vars
-    late_vars = variables.late_vars
-    result = {}
-    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
-        for t in tasks:
-            assigned_machine = None
-            # Find which machine this task was assigned to (first True in assigned_vars)
-            for idx, m in enumerate(variables.machines):
-                if m.type == t.required_type:
-                    assigned_list = variables.assigned_vars[t.id]
-                    if idx < len(assigned_list) and solver.Value(assigned_list[idx]):
-                        assigned_machine = m.id
-                        break
-            result[t.id] = {
-                "start": solver.Value(start_vars[t.id]),
-                "end": solver.Value(end_vars[t.id]),
-                "late": solver.Value(late_vars[t.id]),
-                "machine": assigned_machine,
-            }
+    Returns a dictionary mapping task IDs to their schedule, with every machine
+    a task runs on under "machines" and the first one under "machine".
+    Values are read in bulk from the response through the precomputed variable
+    indices, so `solver` may also be a CpSolverSolutionCallback.
+    """
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return "No feasible solution found."
+    values = np.asarray(solver.response_proto.solution, dtype=np.int64)
+    task_ids = variables.tasks.id.tolist()
+    starts = to_hours(values[variables.start_index], variables.slot_minutes).tolist()
+    ends = to_hours(values[variables.end_index], variables.slot_minutes).tolist()
+    lates = to_hours(values[variables.late_index], variables.slot_minutes).tolist()
+    if variables.pooled and not variables.calendar_types:
+        machines_per_task = assign_pooled_machines(
+            variables.tasks, starts, ends, variables.machines, variables.fixed_machines
+        )
     else:
-        result = "No feasible solution found."
-    return result
+        chosen = values[variables.assignment_index] == 1
+        # Literals are stored task by task, so splitting at task boundaries groups them
+        boundaries = np.cumsum(np.bincount(variables.assignment_task[chosen], minlength=len(task_ids)))[:-1]
+        machines_per_task = [
+            group.tolist() for group in np.split(variables.assignment_machine[chosen], boundaries)
+        ]
+        if variables.pooled:
+            # Types without downtime were pooled and have no literals
+            rows = np.flatnonzero(~np.isin(variables.tasks.type_code, variables.calendar_types)).tolist()
+            pooled_machines = assign_pooled_machines(
+                variables.tasks.take(rows), [starts[i] for i in rows], [ends[i] for i in rows],
+                variables.machines, variables.fixed_machines,
+            )
+            for i, assigned in zip(rows, pooled_machines):
+                machines_per_task[i] = assigned
+    return {
+        task_id: {
+            "start": start,
+            "end": end,
+            "late": late,
+            "machine": machines[0] if machines else None,
+            "machines": machines,
+        }
+        for task_id, start, end, late, machines in zip(task_ids, starts, ends, lates, machines_per_task)
+    }
 
 def solve_scheduling_problem(context: Context) -> Union[Dict[str, Any], str]:
     """
     High-level function to create, solve, and extract the solution for the scheduling problem.
+    With Context.profiler set, every phase is recorded and the report is emitted at the end.
+    With Context.cache set, a context solved before is answered from the cache
+    without building or solving a model. With Context.precheck, a context the
+    presolve analysis proves infeasible is answered with its reasons, e.g.
+    "No feasible solution found. Task t1 needs 3 washer machines, only 2 exist."
+    """
+    key = None
+    result = None
+    if context.cache is not None:
+        from src.cache import context_key
+        with phase(context.profiler, "cache"):
+            key = context_key(context)
+            result = context.cache.get(key)
+    if result is None and context.precheck:
+        analysis = precheck(context)
+        if analysis.infeasible:
+            result = analysis.message()
+    if result is None:
+        if context.decompose:
+            from src.models.decomposition import solve_decomposed
+            result = solve_decomposed(context)
+        else:
+            result = solve_component(context)
+        if key is not None and isinstance(result, dict):
+            context.cache.put(key, result)
+    if context.profiler is not None:
+        context.profiler.emit()
+    return result
+
+def precheck(context: Context) -> Analysis:
+    """
+    analysis.analyze, recorded by Context.profiler if set.
+    """
+    started = time.perf_counter()
+    analysis = analyze(context)
+    if context.profiler is not None:
+        context.profiler.record_analysis(analysis, time.perf_counter() - started)
+    return analysis
+
+def solve_component(context: Context) -> Union[Dict[str, Any], str]:
+    """
+    Solve the whole context as one problem (window by window with
+    rolling_horizon, or by large neighbourhood search with lns), without
+    decomposition and without emitting the profiler report.
+    """
+    if context.lns:
+        from src.models.lns import solve_lns
+        return solve_lns(context)
+    if context.rolling_horizon:
+        from src.models.rolling_horizon import solve_rolling_horizon
+        return solve_rolling_horizon(context)
+    return _solve(context)
+
+def _solve(context: Context) -> Union[Dict[str, Any], str]:
+    profiler = context.profiler
+    greedy = None
+    if context.greedy_hint and context.hints is None:
+        with phase(profiler, "greedy"):
+            greedy = best_greedy_schedule(context)
+        context = warm_start(context, greedy)
+    model, variables, solver, status = build_and_solve(context)
+    if status == cp_model.UNKNOWN and context.greedy_hint:
+        # The solver stopped before finding anything, fall back to the list schedule
+        return greedy if greedy is not None else greedy_schedule(context)
+    with phase(profiler, "extract"):
+        return extract_solution(solver, status, variables)
+
+def build_and_solve(
+    context: Context,
+) -> Tuple[cp_model.CpModel, ModelVariables, cp_model.CpSolver, Any]:
+    """
+    create_scheduling_model followed by solve_model, recorded by Context.profiler if set.
     """
-    model, variables = create_scheduling_model(context)
-    solver, status = solve_model(model)
-    return extract_solution(solver, status, variables)
+    profiler = context.profiler
+    with phase(profiler, "build"):
+        model, variables = create_scheduling_model(context)
+    with phase(profiler, "solve"):
+        solver, status = solve_model(model, context.solver_config, variables.objective_stages)
+    if profiler is not None:
+        profiler.record_model(model)
+        profiler.record_search(solver, status)
+    return model, variables, solver, status
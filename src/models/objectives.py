@@ -0,0 +1,110 @@
+
+import numpy as np
+from src.models.entities import Context, DueDateCategory
+from src.models.tables import DUE_CATEGORIES, MachineTable, TaskTable, as_machine_table, as_task_table
+from typing import TYPE_CHECKING, Any, Dict, List, Sequence, Union
+
+if TYPE_CHECKING:
+    from ortools.sat.python import cp_model
+
+OBJECTIVES = ("tardiness", "weighted_tardiness", "late_count", "makespan", "idle")
+
+# Lateness weight per due category for "weighted_tardiness": urgent orders hurt more
+DUE_WEIGHTS = {DueDateCategory.H12: 3, DueDateCategory.H24: 2, DueDateCategory.WEEK: 1}
+DUE_WEIGHTS_BY_CODE = np.array([DUE_WEIGHTS[due] for due in DUE_CATEGORIES], dtype=np.int64)
+
+def stage_weights(stage: Union[str, Dict[str, int]]) -> Dict[str, int]:
+    """
+    Weights of one objective stage, given as an objective name or a dict of
+    names to integer weights. Raises ValueError on unknown objectives.
+    """
+    weights = {stage: 1} if isinstance(stage, str) else dict(stage)
+    unknown = sorted(set(weights) - set(OBJECTIVES))
+    if unknown or not weights:
+        raise ValueError(f"Unknown objectives {unknown}, expected some of {OBJECTIVES}")
+    return {name: int(weight) for name, weight in weights.items()}
+
+def bounds_tardiness(objectives: Sequence[Union[str, Dict[str, int]]]) -> bool:
+    """
+    Whether the first stage minimizes plain tardiness, so that the total
+    lateness of any feasible schedule bounds the lateness of the optimum.
+    """
+    return bool(objectives) and set(stage_weights(objectives[0])) == {"tardiness"}
+
+def objective_stages(
+    model: 'cp_model.CpModel',
+    objectives: Sequence[Union[str, Dict[str, int]]],
+    tasks: TaskTable,
+    machines: MachineTable,
+    late_vars: List['cp_model.IntVar'],
+    end_vars: List['cp_model.IntVar'],
+    lengths: np.ndarray,
+    horizon: int,
+) -> List[Any]:
+    """
+    One linear expression per objective stage, in model time slots.
+    late_vars and end_vars follow the task order; only the terms used by
+    some stage get their helper variables and constraints.
+    """
+    from ortools.sat.python import cp_model
+    stages = [stage_weights(stage) for stage in objectives]
+    used = {name for weights in stages for name in weights}
+    terms = {}
+    if "tardiness" in used:
+        terms["tardiness"] = cp_model.LinearExpr.sum(late_vars)
+    if "weighted_tardiness" in used:
+        terms["weighted_tardiness"] = cp_model.LinearExpr.weighted_sum(
+            late_vars, DUE_WEIGHTS_BY_CODE[tasks.due_code].tolist()
+        )
+    if "late_count" in used:
+        is_late = []
+        for late in late_vars:
+            flag = model.new_bool_var(f"is_{late.name}")
+            model.add(late == 0).only_enforce_if(~flag)
+            is_late.append(flag)
+        terms["late_count"] = cp_model.LinearExpr.sum(is_late)
+    if "makespan" in used:
+        makespan = model.new_int_var(0, horizon, "makespan")
+        model.add_max_equality(makespan, end_vars)
+        terms["makespan"] = makespan
+    if "idle" in used:
+        # Machines of a type stay on until its last task ends; busy time is constant
+        type_ends = []
+        machine_counts = []
+        for type_code in np.unique(tasks.type_code).tolist():
+            type_end = model.new_int_var(0, horizon, f"end_of_type_{type_code}")
+            model.add_max_equality(type_end, [end for end, code in zip(end_vars, tasks.type_code.tolist()) if code == type_code])
+            type_ends.append(type_end)
+            machine_counts.append(int((machines.type_code == type_code).sum()))
+        busy = int((lengths * tasks.required_count).sum())
+        terms["idle"] = cp_model.LinearExpr.weighted_sum(type_ends, machine_counts) - busy
+    return [
+        cp_model.LinearExpr.weighted_sum([terms[name] for name in weights], list(weights.values()))
+        for weights in stages
+    ]
+
+def evaluate_schedule(schedule: Dict[str, Dict[str, Any]], context: Context) -> Dict[str, float]:
+    """
+    Every objective of OBJECTIVES for a schedule in the extract_solution format, in hours.
+    """
+    tasks = as_task_table(context.tasks)
+    machines = as_machine_table(context.machines)
+    task_ids = tasks.id.tolist()
+    late = np.array([schedule[task_id]["late"] for task_id in task_ids], dtype=np.float64)
+    ends = np.array([schedule[task_id]["end"] for task_id in task_ids], dtype=np.float64)
+    idle = -float((tasks.length * tasks.required_count).sum())
+    for type_code in np.unique(tasks.type_code).tolist():
+        idle += int((machines.type_code == type_code).sum()) * float(ends[tasks.type_code == type_code].max())
+    return {
+        "tardiness": float(late.sum()),
+        "weighted_tardiness": float((DUE_WEIGHTS_BY_CODE[tasks.due_code] * late).sum()),
+        "late_count": int((late > 0).sum()),
+        "makespan": float(ends.max(initial=0)),
+        "idle": idle,
+    }
+
+def stage_value(metrics: Dict[str, float], stage: Union[str, Dict[str, int]]) -> float:
+    """
+    The value of one objective stage, from the metrics of evaluate_schedule.
+    """
+    return sum(weight * metrics[name] for name, weight in stage_weights(stage).items())
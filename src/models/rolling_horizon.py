@@ -0,0 +1,71 @@
+
+import numpy as np
+from dataclasses import replace
+from src.models.entities import Context
+from src.models.tables import as_task_table
+from src.models.lp_model import build_and_solve, extract_solution
+from src.profiling import phase
+from ortools.sat.python import cp_model
+from typing import Any, Dict, Union
+
+def solve_rolling_horizon(context: Context) -> Union[Dict[str, Any], str]:
+    """
+    Solve the scheduling problem over overlapping time windows.
+    Each window only contains the tasks that have arrived before its end, plus
+    the already committed tasks still running at its start (pinned as fixed).
+    Tasks starting in the first (window - overlap) hours are committed, the rest
+    are re-planned together with the next window, and the committed windows are
+    stitched into one schedule in the extract_solution format. The solver
+    configuration (including its time limit) applies to every window.
+    """
+    window = context.rolling_window
+    step = window - context.rolling_overlap
+    if step <= 0:
+        raise ValueError("rolling_overlap must be smaller than rolling_window")
+    tasks = as_task_table(context.tasks)
+    task_ids = tasks.id.tolist()
+    committed = {}
+    is_committed = np.zeros(len(tasks), dtype=bool)
+    committed_end = np.zeros(len(tasks), dtype=np.int64)
+    window_start = int(tasks.arrival_time.min()) if len(tasks) else 0
+    while not is_committed.all():
+        next_arrival = int(tasks.arrival_time[~is_committed].min())
+        if next_arrival >= window_start + window:
+            # Nothing arrives in this window, jump to the next arrival
+            window_start = next_arrival
+        in_batch = ~is_committed & (tasks.arrival_time < window_start + window)
+        last_window = in_batch.sum() == (~is_committed).sum()
+        is_running = is_committed & (committed_end > window_start)
+        window_context = replace(
+            context,
+            tasks=tasks.take(is_running | in_batch),
+            fixed={task_ids[idx]: committed[task_ids[idx]] for idx in np.flatnonzero(is_running).tolist()},
+            frozen_until=window_start,
+            rolling_horizon=False,
+        )
+        result = _solve_window(window_context)
+        if not isinstance(result, dict):
+            return result
+        commit_until = window_start + step
+        for idx in np.flatnonzero(in_batch).tolist():
+            entry = result[task_ids[idx]]
+            if last_window or entry["start"] < commit_until:
+                committed[task_ids[idx]] = entry
+                is_committed[idx] = True
+                committed_end[idx] = entry["end"]
+        window_start = commit_until
+    return {task_id: committed[task_id] for task_id in task_ids}
+
+def _solve_window(context: Context) -> Union[Dict[str, Any], str]:
+    """
+    Solve a single window (tasks given as a TaskTable); if the default horizon is too tight for the window's
+    backlog, retry once with room to run every task back to back.
+    """
+    model, variables, solver, status = build_and_solve(context)
+    if status == cp_model.INFEASIBLE and context.horizon is None:
+        tasks = context.tasks
+        latest = max(int(tasks.due_time.max()), context.frozen_until or 0)
+        relaxed = replace(context, horizon=latest + int(tasks.length.sum()))
+        model, variables, solver, status = build_and_solve(relaxed)
+    with phase(context.profiler, "extract"):
+        return extract_solution(solver, status, variables)
@@ -0,0 +1,232 @@
+
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from multiprocessing.shared_memory import SharedMemory
+from src.models.analysis import analyze
+from src.models.entities import Context, DueDateCategory, MachineType, Task
+from src.models.lp_model import solve_scheduling_problem
+from src.models.objectives import evaluate_schedule
+from src.models.tables import (
+    DUE_CODES, MACHINE_TYPES, TYPE_CODES, MachineTable, TaskTable, as_machine_table, as_task_table, job_roots,
+)
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+# Numeric task columns placed in shared memory for the worker processes
+SHARED_COLUMNS = ("arrival_time", "length", "due_time", "type_code", "required_count", "due_code")
+
+@dataclass
+class Scenario:
+    """
+    A what-if change to a base context; Scenario("base") leaves it as it is.
+    add_machines adds machines per type (a negative count removes the last
+    ones of the type), remove_machines and remove_tasks drop ids, add_tasks
+    appends tasks. more_orders copies a share of the jobs per due category of
+    their last stage, e.g. {DueDateCategory.H12: 0.2} for 20% more 12h orders
+    (picked with seed, whole jobs so that stages keep their predecessors).
+    overrides replaces Context fields, e.g. {"horizon": 48}.
+    """
+    name: str
+    add_machines: Dict[Union[MachineType, str], int] = field(default_factory=dict)
+    remove_machines: Sequence[str] = ()
+    add_tasks: Optional[Union[List[Task], TaskTable]] = None
+    remove_tasks: Sequence[str] = ()
+    more_orders: Dict[Union[DueDateCategory, str], float] = field(default_factory=dict)
+    seed: int = 0
+    overrides: Dict[str, Any] = field(default_factory=dict)
+
+def solve_scenarios(context: Context, scenarios: Sequence[Scenario]) -> List[Dict[str, Any]]:
+    """
+    Solve every scenario of a base context and return one record per scenario
+    for comparison_frame: "scenario", "status", "tasks", "machines",
+    "tardiness", "late_count", "makespan", "lateness_bound" (see
+    analysis.analyze), "utilization" overall and per machine type (work over
+    machine hours until the makespan), "solve_s" and "schedule" (the result
+    of solve_scheduling_problem). The base tables and the jobs of its tasks
+    are prepared once. With several processes (Context.max_workers) the
+    scenarios are solved in parallel; the numeric task columns are shared
+    with the workers through shared memory and each worker receives the rest
+    of the base once, so only the scenarios travel per solve. Hints, the
+    profiler and the cache of the base context are not used.
+    """
+    tasks = as_task_table(context.tasks)
+    machines = as_machine_table(context.machines)
+    job = job_roots(tasks)
+    base = replace(context, tasks=tasks, machines=machines, hints=None, profiler=None, cache=None)
+    cores = os.cpu_count() or 1
+    processes = min(len(scenarios), max(1, context.max_workers or cores))
+    if processes <= 1:
+        return [solve_scenario(base, job, scenario) for scenario in scenarios]
+    search_workers = context.solver_config.num_search_workers or max(1, cores // processes)
+    base = replace(base, solver_config=replace(base.solver_config, num_search_workers=search_workers, log_callback=None))
+    blocks, layout = _share({**{name: getattr(tasks, name) for name in SHARED_COLUMNS}, "job": job})
+    try:
+        # The object columns and the rest of the context go to each worker once, through the initializer
+        rest = replace(base, tasks=None)
+        with ProcessPoolExecutor(
+            max_workers=processes, initializer=_attach, initargs=(layout, tasks.id, tasks.predecessor, rest),
+        ) as pool:
+            return list(pool.map(_solve_shared, scenarios))
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+def solve_scenario(context: Context, job: np.ndarray, scenario: Scenario) -> Dict[str, Any]:
+    """
+    Apply one scenario to a base context with tables and solve it (see solve_scenarios).
+    """
+    started = time.perf_counter()
+    tasks, machines = apply_scenario(context.tasks, context.machines, scenario, job)
+    scenario_context = replace(context, tasks=tasks, machines=machines, **scenario.overrides)
+    # Analysed here, so the bound is reported next to the result
+    analysis = analyze(scenario_context) if scenario_context.precheck else None
+    if analysis is not None and analysis.infeasible:
+        result = analysis.message()
+    else:
+        result = solve_scheduling_problem(replace(scenario_context, precheck=False))
+    record = {
+        "scenario": scenario.name,
+        "status": "SOLVED" if isinstance(result, dict) else "INFEASIBLE",
+        "tasks": len(tasks),
+        "machines": len(machines),
+        "tardiness": None,
+        "late_count": None,
+        "makespan": None,
+        "lateness_bound": None if analysis is None else analysis.lateness_bound,
+        "utilization": None,
+    }
+    if isinstance(result, dict):
+        metrics = evaluate_schedule(result, scenario_context)
+        record.update(tardiness=metrics["tardiness"], late_count=metrics["late_count"], makespan=metrics["makespan"])
+        record.update(utilization(tasks, machines, metrics["makespan"]))
+    record.update(solve_s=time.perf_counter() - started, schedule=result)
+    return record
+
+def apply_scenario(
+    tasks: TaskTable, machines: MachineTable, scenario: Scenario, job: Optional[np.ndarray] = None
+) -> Tuple[TaskTable, MachineTable]:
+    """
+    The task and machine tables of a scenario. job (see job_roots) is
+    computed from tasks when not given.
+    """
+    for type_key, count in scenario.add_machines.items():
+        type_code = TYPE_CODES[type_key]
+        if count < 0:
+            rows = np.flatnonzero(machines.type_code == type_code)
+            machines = machines.take(np.setdiff1d(np.arange(len(machines)), rows[max(0, len(rows) + count):]))
+        elif count > 0:
+            name = MACHINE_TYPES[type_code].value
+            taken = set(machines.id.tolist())
+            new_ids = []
+            k = 0
+            while len(new_ids) < count:
+                k += 1
+                if f"{name}-extra-{k}" not in taken:
+                    new_ids.append(f"{name}-extra-{k}")
+            machines = MachineTable.concat([
+                machines, MachineTable.from_records({"id": m_id, "type": MACHINE_TYPES[type_code]} for m_id in new_ids),
+            ])
+    if scenario.remove_machines:
+        machines = machines.take(~np.isin(machines.id, list(scenario.remove_machines)))
+    if scenario.more_orders:
+        copies = [_copy_jobs(tasks, job if job is not None else job_roots(tasks), scenario)]
+        tasks = TaskTable.concat([tasks] + copies)
+    if scenario.add_tasks is not None:
+        tasks = TaskTable.concat([tasks, as_task_table(scenario.add_tasks)])
+    if scenario.remove_tasks:
+        tasks = tasks.take(~np.isin(tasks.id, list(scenario.remove_tasks)))
+    return tasks, machines
+
+def utilization(tasks: TaskTable, machines: MachineTable, makespan: float) -> Dict[str, float]:
+    """
+    Machine hours worked over machine hours until the makespan, overall
+    ("utilization") and per machine type ("utilization_<type>").
+    """
+    work = np.bincount(tasks.type_code, weights=tasks.length * tasks.required_count, minlength=len(MACHINE_TYPES))
+    counts = np.bincount(machines.type_code, minlength=len(MACHINE_TYPES))
+    span = max(float(makespan), 1e-9)
+    shares = {"utilization": float(work.sum() / max(counts.sum() * span, 1e-9))}
+    for type_code, machine_type in enumerate(MACHINE_TYPES):
+        if counts[type_code]:
+            shares[f"utilization_{machine_type.value}"] = float(work[type_code] / (counts[type_code] * span))
+    return shares
+
+def comparison_frame(records: List[Dict[str, Any]]) -> Any:
+    """
+    The scenario records of solve_scenarios as a pandas DataFrame, one row per scenario, without the schedules.
+    """
+    import pandas as pd
+    return pd.DataFrame([{k: v for k, v in record.items() if k != "schedule"} for record in records]).set_index("scenario")
+
+def _copy_jobs(tasks: TaskTable, job: np.ndarray, scenario: Scenario) -> TaskTable:
+    """
+    Copies of a share of the jobs per due category (Scenario.more_orders),
+    with ids suffixed "~<copy>" and predecessors pointing at the copies.
+    """
+    predecessors = tasks.predecessor_positions()
+    is_terminal = np.ones(len(tasks), dtype=bool)
+    is_terminal[predecessors[predecessors >= 0]] = False
+    rng = np.random.default_rng(scenario.seed)
+    picked = []
+    for due_key, share in scenario.more_orders.items():
+        roots = job[is_terminal & (tasks.due_code == DUE_CODES[due_key])]
+        n_copies = int(round(share * len(roots)))
+        if n_copies and len(roots):
+            picked.append(rng.choice(roots, size=n_copies, replace=n_copies > len(roots)))
+    if not picked:
+        return tasks.take(np.array([], dtype=np.int64))
+    chosen = np.concatenate(picked)
+    # The c-th copy of a job in this scenario gets the suffix ~c
+    order = np.argsort(chosen, kind="stable")
+    copy_number = np.empty(len(chosen), dtype=np.int64)
+    sorted_chosen = chosen[order]
+    first = np.searchsorted(sorted_chosen, sorted_chosen)
+    copy_number[order] = np.arange(len(chosen)) - first + 1
+    by_job = np.argsort(job, kind="stable")
+    bounds = np.searchsorted(job[by_job], chosen)
+    ends = np.searchsorted(job[by_job], chosen, side="right")
+    rows = np.concatenate([by_job[start:end] for start, end in zip(bounds.tolist(), ends.tolist())])
+    suffixes = np.repeat(copy_number, ends - bounds)
+    copies = tasks.take(rows)
+    copies.id = np.array([f"{task_id}~{c}" for task_id, c in zip(copies.id.tolist(), suffixes.tolist())], dtype=object)
+    copies.predecessor = np.array(
+        [None if p is None else f"{p}~{c}" for p, c in zip(copies.predecessor.tolist(), suffixes.tolist())], dtype=object
+    )
+    return copies
+
+# Base of the scenarios in a worker process, set by _attach
+_BASE: Dict[str, Any] = {}
+
+def _share(columns: Dict[str, np.ndarray]) -> Tuple[List[SharedMemory], Dict[str, Tuple[str, str, int]]]:
+    """
+    Copy arrays into new shared memory blocks; returns the blocks and the
+    (block name, dtype, length) of each column for _attach.
+    """
+    blocks = []
+    layout = {}
+    for name, values in columns.items():
+        block = SharedMemory(create=True, size=max(1, values.nbytes))
+        np.ndarray(values.shape, dtype=values.dtype, buffer=block.buf)[:] = values
+        blocks.append(block)
+        layout[name] = (block.name, values.dtype.str, len(values))
+    return blocks, layout
+
+def _attach(layout: Dict[str, Tuple[str, str, int]], ids: np.ndarray, predecessors: np.ndarray, context: Context) -> None:
+    """
+    Pool initializer: map the shared task columns and keep the base context.
+    """
+    columns = {}
+    for name, (block_name, dtype, length) in layout.items():
+        block = SharedMemory(name=block_name)
+        _BASE.setdefault("blocks", []).append(block)  # The arrays live as long as their blocks
+        columns[name] = np.ndarray((length,), dtype=np.dtype(dtype), buffer=block.buf)
+        columns[name].flags.writeable = False  # Shared by every scenario of the worker
+    job = columns.pop("job")
+    tasks = TaskTable(id=ids, predecessor=predecessors, **columns)
+    _BASE.update(context=replace(context, tasks=tasks), job=job)
+
+def _solve_shared(scenario: Scenario) -> Dict[str, Any]:
+    return solve_scenario(_BASE["context"], _BASE["job"], scenario)
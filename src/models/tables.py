@@ -0,0 +1,411 @@
+
+import numpy as np
+from dataclasses import dataclass
+from src.models.calendars import normalize_windows, parse_windows
+from src.models.entities import DUE_HOURS, DueDateCategory, MachineType, Task, TaskLengthCategory, WashingMachine
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+# Integer codes used in the columns: position in the enum
+MACHINE_TYPES = list(MachineType)
+DUE_CATEGORIES = list(DueDateCategory)
+LENGTH_CATEGORIES = list(TaskLengthCategory)
+
+# Lookups accepting the enum members, their values and their names
+TYPE_CODES: Dict[Any, int] = {}
+for code, machine_type in enumerate(MACHINE_TYPES):
+    TYPE_CODES.update({machine_type: code, machine_type.name: code})
+DUE_CODES: Dict[Any, int] = {}
+for code, due in enumerate(DUE_CATEGORIES):
+    DUE_CODES.update({due: code, due.name: code})
+DUE_HOURS_BY_CODE = np.array([DUE_HOURS[due] for due in DUE_CATEGORIES], dtype=np.int64)
+LENGTH_HOURS: Dict[Any, int] = {}
+for length in LENGTH_CATEGORIES:
+    LENGTH_HOURS.update({length: int(length.value), length.name: int(length.value), int(length.value): int(length.value)})
+
+@dataclass
+class TaskTable:
+    """
+    Column store for tasks: one NumPy array per attribute, lengths in hours and
+    machine types / due categories as integer codes (see MACHINE_TYPES, DUE_CATEGORIES).
+    predecessor holds the id of the task that must end first, or None.
+    """
+    id: np.ndarray
+    arrival_time: np.ndarray
+    length: np.ndarray
+    due_time: np.ndarray
+    type_code: np.ndarray
+    required_count: np.ndarray
+    due_code: np.ndarray
+    predecessor: Optional[np.ndarray] = None
+
+    def __post_init__(self) -> None:
+        if self.predecessor is None:
+            self.predecessor = np.full(len(self.id), None, dtype=object)
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    @classmethod
+    def from_columns(
+        cls,
+        id: Sequence[Any],
+        arrival_time: Sequence[int],
+        length: Sequence[Any],
+        required_type: Sequence[Any],
+        required_count: Sequence[int],
+        due: Sequence[Any],
+        due_time: Union[Sequence[Any], None] = None,
+        predecessor: Union[Sequence[Any], None] = None,
+        row_offset: int = 0,
+    ) -> "TaskTable":
+        """
+        Build and validate a table from raw columns.
+        Lengths, types and due categories may be enum members, values or names;
+        missing due times (None/NaN) are derived from arrival time and due category.
+        Raises ValueError listing the offending rows.
+        """
+        arrival = np.asarray(arrival_time, dtype=np.int64)
+        count = np.asarray(required_count, dtype=np.int64)
+        lengths = np.fromiter((LENGTH_HOURS.get(_key(v), -1) for v in length), dtype=np.int64, count=len(arrival))
+        type_code = np.fromiter((TYPE_CODES.get(v, -1) for v in required_type), dtype=np.int8, count=len(arrival))
+        due_code = np.fromiter((DUE_CODES.get(v, -1) for v in due), dtype=np.int8, count=len(arrival))
+        problems = {
+            "unknown length": lengths < 0,
+            "unknown machine type": type_code < 0,
+            "unknown due category": due_code < 0,
+            "negative arrival time": arrival < 0,
+            "required_count below 1": count < 1,
+        }
+        errors = [f"{message} in rows {(np.flatnonzero(mask)[:10] + row_offset).tolist()}" for message, mask in problems.items() if mask.any()]
+        if errors:
+            raise ValueError("Invalid tasks: " + "; ".join(errors))
+        derived_due = arrival + DUE_HOURS_BY_CODE[due_code]
+        if due_time is None:
+            due = derived_due
+        else:
+            given = np.asarray(due_time, dtype=np.float64)
+            due = np.where(np.isnan(given), derived_due, np.nan_to_num(given)).astype(np.int64)
+        return cls(
+            id=np.asarray(id, dtype=object),
+            arrival_time=arrival,
+            length=lengths,
+            due_time=due,
+            type_code=type_code,
+            required_count=count,
+            due_code=due_code,
+            predecessor=None if predecessor is None else np.array([_optional_id(p) for p in predecessor], dtype=object),
+        )
+
+    @classmethod
+    def from_records(cls, records: Iterable[Mapping[str, Any]]) -> "TaskTable":
+        """
+        Build a table from dicts shaped like Task fields (id and due_time optional).
+        """
+        records = list(records)
+        return cls.from_columns(
+            id=[r.get("id") or f"T{i}" for i, r in enumerate(records)],
+            arrival_time=[r.get("arrival_time", 0) for r in records],
+            length=[r["length"] for r in records],
+            required_type=[r["required_type"] for r in records],
+            required_count=[r.get("required_count", 1) for r in records],
+            due=[r["due"] for r in records],
+            due_time=[r.get("due_time") for r in records],
+            predecessor=[r.get("predecessor") for r in records],
+        )
+
+    @classmethod
+    def from_tasks(cls, tasks: Sequence[Task]) -> "TaskTable":
+        """
+        Build a table from Task models; due times are taken as they are.
+        """
+        return cls(
+            id=np.array([t.id for t in tasks], dtype=object),
+            arrival_time=np.fromiter((t.arrival_time for t in tasks), dtype=np.int64, count=len(tasks)),
+            length=np.fromiter((LENGTH_HOURS[t.length] for t in tasks), dtype=np.int64, count=len(tasks)),
+            due_time=np.fromiter((t.due_time for t in tasks), dtype=np.int64, count=len(tasks)),
+            type_code=np.fromiter((TYPE_CODES[t.required_type] for t in tasks), dtype=np.int8, count=len(tasks)),
+            required_count=np.fromiter((t.required_count for t in tasks), dtype=np.int64, count=len(tasks)),
+            due_code=np.fromiter((DUE_CODES[t.due] for t in tasks), dtype=np.int8, count=len(tasks)),
+            predecessor=np.array([t.predecessor for t in tasks], dtype=object),
+        )
+
+    @classmethod
+    def from_frame(cls, frame: Any, row_offset: int = 0) -> "TaskTable":
+        """
+        Build a table from a pandas DataFrame with one column per Task field
+        (id, required_count, due_time and predecessor optional). row_offset shifts the row
+        numbers reported in validation errors, for chunked reads.
+        """
+        if "id" not in frame:
+            ids = [f"T{row_offset + i}" for i in range(len(frame))]
+        elif frame["id"].dtype.kind == "f":
+            ids = [str(_optional_id(value)) for value in frame["id"].tolist()]
+        else:
+            ids = frame["id"].astype(str).to_numpy()
+        return cls.from_columns(
+            id=ids,
+            arrival_time=frame["arrival_time"].to_numpy(),
+            length=frame["length"].to_numpy(),
+            required_type=frame["required_type"].to_numpy(),
+            required_count=frame["required_count"].to_numpy() if "required_count" in frame else np.ones(len(frame)),
+            due=frame["due"].to_numpy(),
+            due_time=frame["due_time"].to_numpy() if "due_time" in frame else None,
+            predecessor=frame["predecessor"].to_numpy() if "predecessor" in frame else None,
+            row_offset=row_offset,
+        )
+
+    @classmethod
+    def from_csv(cls, path: str) -> "TaskTable":
+        """
+        Load a CSV file with one column per Task field.
+        """
+        import pandas as pd
+        return cls.from_frame(pd.read_csv(path))
+
+    @classmethod
+    def concat(cls, tables: Sequence["TaskTable"]) -> "TaskTable":
+        """
+        Stack several tables into one.
+        """
+        return cls(**{
+            name: np.concatenate([getattr(table, name) for table in tables])
+            for name in cls.__dataclass_fields__
+        })
+
+    def take(self, indices: Any) -> "TaskTable":
+        """
+        Rows selected by an index array or boolean mask.
+        """
+        return TaskTable(**{name: getattr(self, name)[indices] for name in self.__dataclass_fields__})
+
+    def row(self, i: int) -> Task:
+        """
+        Row view as a Task model (no validation, the table is already validated).
+        """
+        return Task.model_construct(
+            id=self.id[i],
+            arrival_time=int(self.arrival_time[i]),
+            length=TaskLengthCategory(str(self.length[i])),
+            due=DUE_CATEGORIES[self.due_code[i]],
+            required_type=MACHINE_TYPES[self.type_code[i]],
+            required_count=int(self.required_count[i]),
+            due_time=int(self.due_time[i]),
+            predecessor=self.predecessor[i],
+        )
+
+    def to_tasks(self) -> List[Task]:
+        return [self.row(i) for i in range(len(self))]
+
+    def predecessor_positions(self) -> np.ndarray:
+        """
+        Row of each task's predecessor, -1 for none. Predecessors missing from the
+        table (e.g. finished and dropped by the incremental scheduler) count as done.
+        """
+        positions = {task_id: i for i, task_id in enumerate(self.id.tolist())}
+        return np.fromiter(
+            (positions.get(p, -1) if p is not None else -1 for p in self.predecessor.tolist()),
+            dtype=np.int64, count=len(self),
+        )
+
+    def has_precedence(self) -> bool:
+        return any(p is not None for p in self.predecessor.tolist())
+
+@dataclass
+class MachineTable:
+    """
+    Column store for machines, with machine types as integer codes.
+    downtime holds each machine's normalized downtime windows, () when always available.
+    """
+    id: np.ndarray
+    type_code: np.ndarray
+    downtime: Optional[np.ndarray] = None
+
+    def __post_init__(self) -> None:
+        if self.downtime is None:
+            self.downtime = _object_column([()] * len(self.id))
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def has_downtime(self) -> bool:
+        return any(self.downtime)
+
+    @classmethod
+    def from_machines(cls, machines: Sequence[WashingMachine]) -> "MachineTable":
+        return cls(
+            id=np.array([m.id for m in machines], dtype=object),
+            type_code=np.fromiter((TYPE_CODES[m.type] for m in machines), dtype=np.int8, count=len(machines)),
+            downtime=_object_column([normalize_windows(m.downtime) for m in machines]),
+        )
+
+    @classmethod
+    def from_records(cls, records: Iterable[Mapping[str, Any]]) -> "MachineTable":
+        """
+        Build a table from dicts with "id", "type" and an optional "downtime"
+        (see parse_windows); raises ValueError on unknown types.
+        """
+        records = list(records)
+        if any(r.get("id") is None or r.get("type") is None for r in records):
+            raise ValueError("Invalid machines: every row needs an id and a type")
+        type_code = np.fromiter((TYPE_CODES.get(r["type"], -1) for r in records), dtype=np.int8, count=len(records))
+        if (type_code < 0).any():
+            raise ValueError(f"Invalid machines: unknown machine type in rows {np.flatnonzero(type_code < 0)[:10].tolist()}")
+        return cls(
+            id=np.array([str(r["id"]) for r in records], dtype=object),
+            type_code=type_code,
+            downtime=_object_column([parse_windows(r.get("downtime")) for r in records]),
+        )
+
+    @classmethod
+    def concat(cls, tables: Sequence["MachineTable"]) -> "MachineTable":
+        """
+        Stack several tables into one.
+        """
+        return cls(**{
+            name: np.concatenate([getattr(table, name) for table in tables])
+            for name in cls.__dataclass_fields__
+        })
+
+    def take(self, indices: Any) -> "MachineTable":
+        """
+        Rows selected by an index array or boolean mask.
+        """
+        return MachineTable(id=self.id[indices], type_code=self.type_code[indices], downtime=self.downtime[indices])
+
+    def row(self, i: int) -> WashingMachine:
+        return WashingMachine.model_construct(
+            id=self.id[i], type=MACHINE_TYPES[self.type_code[i]], downtime=list(self.downtime[i])
+        )
+
+    def to_machines(self) -> List[WashingMachine]:
+        return [self.row(i) for i in range(len(self))]
+
+def _object_column(values: List[Any]) -> np.ndarray:
+    """
+    An object array holding each value as is, even when the values are tuples.
+    """
+    column = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        column[i] = value
+    return column
+
+def as_task_table(tasks: Union[TaskTable, Sequence[Task]]) -> TaskTable:
+    """
+    Accept either a TaskTable or a list of Task models.
+    """
+    return tasks if isinstance(tasks, TaskTable) else TaskTable.from_tasks(tasks)
+
+def as_machine_table(machines: Union[MachineTable, Sequence[WashingMachine]]) -> MachineTable:
+    """
+    Accept either a MachineTable or a list of WashingMachine models.
+    """
+    return machines if isinstance(machines, MachineTable) else MachineTable.from_machines(machines)
+
+def precedence_depth(predecessors: np.ndarray) -> np.ndarray:
+    """
+    Number of predecessors above each task (0 for tasks without one), from the
+    output of TaskTable.predecessor_positions. Raises ValueError on cycles.
+    """
+    depth = np.where(predecessors < 0, 0, -1)
+    pred = predecessors.tolist()
+    depth_list = depth.tolist()
+    for i in range(len(pred)):
+        chain = []
+        j = i
+        while depth_list[j] < 0:
+            chain.append(j)
+            if len(chain) > len(pred):
+                raise ValueError(f"Invalid tasks: predecessor cycle through row {i}")
+            j = pred[j]
+        for k in reversed(chain):
+            depth_list[k] = depth_list[j] + 1
+            j = k
+    return np.array(depth_list, dtype=np.int64)
+
+def job_roots(tasks: TaskTable) -> np.ndarray:
+    """
+    Row of the first stage of each task's job (its own row without predecessor).
+    """
+    predecessors = tasks.predecessor_positions()
+    depth = precedence_depth(predecessors)
+    job = np.arange(len(tasks))
+    for level in range(1, int(depth.max(initial=0)) + 1):
+        rows = np.flatnonzero(depth == level)
+        job[rows] = job[predecessors[rows]]
+    return job
+
+def chain_lengths(
+    tasks: TaskTable, predecessors: np.ndarray, depth: np.ndarray, lengths: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Hours from the start of each task's first predecessor to the task's end,
+    when the chain runs back to back. lengths replaces tasks.length, e.g. in model time slots.
+    """
+    total = (tasks.length if lengths is None else lengths).copy()
+    for level in range(1, int(depth.max(initial=0)) + 1):
+        rows = np.flatnonzero(depth == level)
+        total[rows] += total[predecessors[rows]]
+    return total
+
+def start_windows(
+    release: np.ndarray, lengths: np.ndarray, predecessors: np.ndarray, depth: np.ndarray, horizon: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Earliest and latest start of each task: no earlier than its release or the
+    earliest end of its predecessor, and early enough for the task and the
+    longest chain of successors after it to end by the horizon.
+    """
+    earliest = release.copy()
+    tail = np.zeros(len(lengths), dtype=np.int64)
+    levels = int(depth.max(initial=0))
+    for level in range(1, levels + 1):
+        rows = np.flatnonzero(depth == level)
+        earliest[rows] = np.maximum(earliest[rows], earliest[predecessors[rows]] + lengths[predecessors[rows]])
+    for level in range(levels, 0, -1):
+        rows = np.flatnonzero(depth == level)
+        np.maximum.at(tail, predecessors[rows], lengths[rows] + tail[rows])
+    return earliest, horizon - lengths - tail
+
+def to_slots(hours: Any, slot_minutes: int, round_up: bool = True) -> np.ndarray:
+    """
+    Convert hours (scalar or array, possibly fractional) to whole time slots of
+    slot_minutes, rounding up by default and down with round_up=False.
+    """
+    values = np.asarray(hours)
+    if slot_minutes == 60 and values.dtype.kind in "iu":
+        return values.astype(np.int64, copy=False)
+    # Rounding off float noise first keeps exact multiples, e.g. 0.25 h in 15 minute slots, exact
+    scaled = np.round(values.astype(np.float64) * 60 / slot_minutes, 6)
+    return (np.ceil(scaled) if round_up else np.floor(scaled)).astype(np.int64)
+
+def to_hours(slots: Any, slot_minutes: int) -> Any:
+    """
+    Convert time slots back to hours: integers when slots are whole hours, floats otherwise.
+    """
+    if slot_minutes % 60 == 0:
+        return slots * (slot_minutes // 60)
+    return slots * slot_minutes / 60
+
+def _optional_id(value: Any) -> Any:
+    """
+    Task id as a string, or None for missing values (None, NaN, "").
+    Integral floats, e.g. from a numeric column with blanks, lose their ".0",
+    so that predecessor 1.0 matches task id 1.
+    """
+    if value is None or value == "" or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        return str(int(value))
+    return str(value)
+
+def _key(value: Any) -> Any:
+    """
+    Normalise numeric lengths coming from files ("2", 2.0) to int hours.
+    """
+    if isinstance(value, (int, np.integer)) or isinstance(value, TaskLengthCategory):
+        return value
+    if isinstance(value, (float, np.floating)):
+        return int(value) if float(value).is_integer() else value
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    return value
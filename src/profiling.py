@@ -0,0 +1,187 @@
+
+import json
+import logging
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, ContextManager, Dict, IO, Iterator, List, Optional, Sequence, Union
+
+class PhaseProfiler:
+    """
+    Collects per-phase wall and CPU time, model size, CP-SAT search statistics
+    and peak memory for one scheduling run. Set it as Context.profiler and the
+    pipeline records its phases ("greedy", "build", "solve", "extract"); phases
+    that run several times, e.g. once per rolling-horizon window, are summed.
+    emit() sends the report to every sink.
+    """
+
+    def __init__(self, sinks: Optional[Sequence[Any]] = None) -> None:
+        self.sinks = list(sinks or [])
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.model: Counter = Counter()
+        self.search: Dict[str, Any] = {}
+        self.analysis: Dict[str, Any] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            stats = self.phases.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0, "calls": 0})
+            stats["wall_s"] += time.perf_counter() - wall
+            stats["cpu_s"] += time.process_time() - cpu
+            stats["calls"] += 1
+
+    def record_model(self, model: Any) -> None:
+        """
+        Add the variable, constraint and interval counts of a CP-SAT model.
+        """
+        proto = model.proto
+        self.model["variables"] += len(proto.variables)
+        self.model["constraints"] += len(proto.constraints)
+        for kind, key in (("interval", "intervals"), ("no_overlap", "no_overlap"), ("cumulative", "cumulative")):
+            self.model[key] += sum(_has(constraint, kind) for constraint in proto.constraints)
+
+    def record_search(self, solver: Any, status: Any) -> None:
+        """
+        Add the response statistics of a finished CP-SAT solve.
+        Branches, conflicts and search time are summed over solves; status,
+        objective, bound and gap describe the last one.
+        """
+        self.search["status"] = solver.status_name(status)
+        self.search["branches"] = self.search.get("branches", 0) + solver.num_branches
+        self.search["conflicts"] = self.search.get("conflicts", 0) + solver.num_conflicts
+        self.search["wall_time_s"] = self.search.get("wall_time_s", 0.0) + solver.wall_time
+        if self.search["status"] in ("OPTIMAL", "FEASIBLE"):
+            objective, bound = solver.objective_value, solver.best_objective_bound
+            self.search.update(objective=objective, bound=bound, gap=(objective - bound) / max(1.0, abs(objective)))
+        else:
+            self.search.update(objective=None, bound=None, gap=None)
+
+    def record_analysis(self, analysis: Any, wall_s: float) -> None:
+        """
+        Keep the load per machine type, lateness bound and infeasibility
+        reasons of a presolve analysis (analysis.Analysis) and its wall time.
+        """
+        self.analysis = dict(analysis.as_dict(), wall_s=wall_s)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "phases": {name: dict(stats) for name, stats in self.phases.items()},
+            "model": dict(self.model),
+            "search": dict(self.search),
+            "analysis": dict(self.analysis),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+    def emit(self) -> Dict[str, Any]:
+        """
+        Send the current report to every sink and return it.
+        """
+        report = self.report()
+        for sink in self.sinks:
+            sink.emit(report)
+        return report
+
+def phase(profiler: Optional[PhaseProfiler], name: str) -> ContextManager[None]:
+    """
+    profiler.phase(name), or a no-op when there is no profiler.
+    """
+    return profiler.phase(name) if profiler is not None else nullcontext()
+
+class LogSink:
+    """
+    Writes each report as one JSON line to a logger.
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.INFO) -> None:
+        self.logger = logger or logging.getLogger("wash_scheduler.profile")
+        self.level = level
+
+    def emit(self, report: Dict[str, Any]) -> None:
+        self.logger.log(self.level, json.dumps(report, default=str))
+
+class PrometheusSink:
+    """
+    Writes each report in the Prometheus text exposition format, to a file
+    (overwritten, e.g. for the node exporter textfile collector) or a stream.
+    """
+
+    def __init__(self, target: Union[str, Path, IO[str], None] = None, prefix: str = "wash_scheduler") -> None:
+        self.target = target if target is not None else sys.stdout
+        self.prefix = prefix
+
+    def emit(self, report: Dict[str, Any]) -> None:
+        text = prometheus_text(report, self.prefix)
+        if isinstance(self.target, (str, Path)):
+            Path(self.target).write_text(text)
+        else:
+            self.target.write(text)
+
+class MemorySink:
+    """
+    Keeps every report in memory, e.g. for a stats panel in the app.
+    """
+
+    def __init__(self) -> None:
+        self.reports: List[Dict[str, Any]] = []
+
+    def emit(self, report: Dict[str, Any]) -> None:
+        self.reports.append(report)
+
+    @property
+    def last(self) -> Optional[Dict[str, Any]]:
+        return self.reports[-1] if self.reports else None
+
+def _has(constraint: Any, kind: str) -> bool:
+    # Recent OR-Tools wrap the proto with has_<field>() methods instead of protobuf's HasField
+    has = getattr(constraint, f"has_{kind}", None)
+    return has() if has is not None else constraint.HasField(kind)
+
+def prometheus_text(report: Dict[str, Any], prefix: str = "wash_scheduler") -> str:
+    """
+    Render a profiler report as Prometheus gauges.
+    """
+    lines = []
+    for metric, unit in (("wall_s", "wall_seconds"), ("cpu_s", "cpu_seconds"), ("calls", "calls")):
+        lines.append(f"# TYPE {prefix}_phase_{unit} gauge")
+        for name, stats in report["phases"].items():
+            lines.append(f'{prefix}_phase_{unit}{{phase="{name}"}} {stats[metric]}')
+    for name, value in report["model"].items():
+        lines.append(f"# TYPE {prefix}_model_{name} gauge")
+        lines.append(f"{prefix}_model_{name} {value}")
+    for name, value in report["search"].items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            lines.append(f"# TYPE {prefix}_search_{name} gauge")
+            lines.append(f"{prefix}_search_{name} {value}")
+    if "status" in report["search"]:
+        lines.append(f"# TYPE {prefix}_search_status gauge")
+        lines.append(f'{prefix}_search_status{{status="{report["search"]["status"]}"}} 1')
+    analysis = report.get("analysis") or {}
+    if analysis:
+        lines.append(f"# TYPE {prefix}_analysis_lateness_bound_hours gauge")
+        lines.append(f"{prefix}_analysis_lateness_bound_hours {analysis['lateness_bound']}")
+        lines.append(f"# TYPE {prefix}_analysis_infeasible gauge")
+        lines.append(f"{prefix}_analysis_infeasible {int(bool(analysis['infeasible']))}")
+        lines.append(f"# TYPE {prefix}_analysis_load_ratio gauge")
+        for name, load in analysis["load"].items():
+            lines.append(f'{prefix}_analysis_load_ratio{{type="{name}"}} {load["load"]}')
+    if report.get("peak_rss_mb") is not None:
+        lines.append(f"# TYPE {prefix}_peak_rss_megabytes gauge")
+        lines.append(f"{prefix}_peak_rss_megabytes {report['peak_rss_mb']}")
+    return "\n".join(lines) + "\n"
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Peak resident memory of this process in MiB, or None where it is unavailable.
+    """
+    try:
+        import resource
+    except ImportError:  # Not available on Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
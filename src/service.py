@@ -0,0 +1,319 @@
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import sys
+import time
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+if __package__ in (None, ""):
+    sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from pydantic import ValidationError
+from src.models.analysis import analyze
+from src.models.entities import Context, Job, SolverConfig, Task, WashingMachine
+from src.models.incremental import IncrementalScheduler, solve_prepared
+from src.models.lp_model import solve_scheduling_problem
+from src.models.tables import MachineTable, TaskTable
+
+_REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+            500: "Internal Server Error"}
+
+class RequestError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+class SchedulingService:
+    """
+    Asyncio HTTP/JSON front end for the scheduler, shared by several terminals.
+
+    POST /tasks      {"tasks": [...], "jobs": [...], "now": h, "time_limit": s}
+                     adds tasks to the shared IncrementalScheduler. now is the
+                     current hour of the shared schedule (default: whole hours
+                     since the service started) and may not move backwards;
+                     tasks started before it are kept as they are. Submissions
+                     arriving within batch_window seconds of each other are
+                     coalesced into one re-solve, limited by the smallest
+                     time_limit among them. Tasks the machines can never run
+                     are rejected with 400 and the reasons.
+    POST /solve      {"machines": [...], "tasks": [...], "pooled": b, "horizon": h, "time_limit": s}
+                     solves a standalone problem with solve_scheduling_problem.
+    GET  /jobs/<id>  status ("queued", "running", "done", "failed") and, when
+                     done, the schedule of the job's tasks.
+    GET  /schedule   the current shared schedule.
+    GET  /health     queue and job counts.
+
+    Both kinds of request answer 202 with a job id right away; solves run in a
+    process pool so the event loop stays responsive. Time limits are capped at
+    max_time_limit and requests are limited to max_tasks tasks.
+    """
+
+    def __init__(
+        self,
+        machines: List[WashingMachine],
+        horizon: Optional[int] = None,
+        pooled: bool = False,
+        batch_window: float = 0.2,
+        max_time_limit: float = 30.0,
+        max_tasks: int = 10_000,
+        max_body_bytes: int = 16 * 2**20,
+        job_ttl: float = 3600.0,
+        executor: Optional[Executor] = None,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        self.scheduler = IncrementalScheduler(machines, horizon=horizon, pooled=pooled)
+        self.batch_window = batch_window
+        self.max_time_limit = max_time_limit
+        self.max_tasks = max_tasks
+        self.max_body_bytes = max_body_bytes
+        self.job_ttl = job_ttl
+        # Forked workers would inherit open client sockets and keep those connections from closing
+        self.executor = executor or ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context("spawn"))
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self._pending: List[Tuple[str, List[Task], int, float]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._solves: set = set()  # Running standalone solves, referenced until they finish
+        self.started = time.time()  # Hour 0 of the shared schedule
+        self.now = 0  # Latest hour a submission was planned from
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.AbstractServer:
+        self._wakeup = asyncio.Event()
+        self._batcher = asyncio.create_task(self._run_batches())
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.cancel()
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def submit_tasks(self, tasks: List[Task], now: Optional[int] = None, time_limit: Optional[float] = None) -> str:
+        """
+        Queue tasks for the next coalesced re-solve of the shared schedule and return the job id.
+        now defaults to current_hour(); an hour before that of an earlier submission is rejected,
+        and so are tasks the presolve analysis proves cannot be scheduled.
+        """
+        if len(tasks) > self.max_tasks:
+            raise RequestError(413, f"At most {self.max_tasks} tasks per request")
+        if now is None:
+            now = self.current_hour()
+        if now < self.now:
+            raise RequestError(400, f"now={now} is before hour {self.now}, which the schedule was already planned from")
+        analysis = analyze(Context(machines=self.scheduler.machines, tasks=tasks, horizon=self.scheduler.horizon, frozen_until=now))
+        if analysis.infeasible:
+            raise RequestError(400, analysis.message())
+        self.now = now
+        job_id = self._new_job([t.id for t in tasks])
+        self._pending.append((job_id, tasks, now, self._time_limit(time_limit)))
+        self._wakeup.set()
+        return job_id
+
+    def current_hour(self) -> int:
+        """
+        Whole hours since the service started, the default `now` of submissions.
+        """
+        return int((time.time() - self.started) // 3600)
+
+    def submit_solve(self, context: Context) -> str:
+        """
+        Solve a standalone context in the worker pool and return the job id.
+        """
+        tasks = context.tasks
+        if len(tasks) > self.max_tasks:
+            raise RequestError(413, f"At most {self.max_tasks} tasks per request")
+        job_id = self._new_job(None)
+        solve = asyncio.create_task(self._run_solve(job_id, context))
+        self._solves.add(solve)
+        solve.add_done_callback(self._solves.discard)
+        return job_id
+
+    def job(self, job_id: str) -> Dict[str, Any]:
+        if job_id not in self.jobs:
+            raise RequestError(404, f"Unknown job {job_id}")
+        job = self.jobs[job_id]
+        return {name: value for name, value in job.items() if name != "task_ids"}
+
+    def _new_job(self, task_ids: Optional[List[str]]) -> str:
+        now = time.time()
+        for job_id in [j for j, job in self.jobs.items() if job.get("finished", now) < now - self.job_ttl]:
+            del self.jobs[job_id]
+        job_id = uuid.uuid4().hex
+        self.jobs[job_id] = {"id": job_id, "status": "queued", "submitted": now, "task_ids": task_ids}
+        return job_id
+
+    def _time_limit(self, requested: Optional[float]) -> float:
+        if requested is None or requested <= 0:
+            return self.max_time_limit
+        return min(float(requested), self.max_time_limit)
+
+    def _finish(self, job_id: str, result: Any) -> None:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        job["finished"] = time.time()
+        if isinstance(result, dict):
+            job["status"] = "done"
+            task_ids = job["task_ids"] if job["task_ids"] is not None else list(result)
+            job["schedule"] = {task_id: result[task_id] for task_id in task_ids if task_id in result}
+            job["total_late"] = sum(info["late"] for info in job["schedule"].values())
+        else:
+            job["status"] = "failed"
+            job["error"] = str(result)
+
+    async def _run_batches(self) -> None:
+        """
+        Re-solve the shared schedule whenever tasks are pending, one batch at a time.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            # Let a burst of submissions settle before solving them together
+            await asyncio.sleep(self.batch_window)
+            self._wakeup.clear()
+            batch, self._pending = self._pending, []
+            if not batch:
+                continue
+            for job_id, tasks, _, _ in batch:
+                self.jobs[job_id]["status"] = "running"
+                self.scheduler.add_tasks(tasks)
+            now = max(now for _, _, now, _ in batch)
+            time_limit = min(limit for _, _, _, limit in batch)
+            context = self.scheduler.prepare(now)
+            if context is None:
+                result = dict(self.scheduler.schedule)
+            else:
+                context = replace(context, solver_config=replace(context.solver_config, max_time_in_seconds=time_limit))
+                try:
+                    result = await loop.run_in_executor(self.executor, solve_prepared, context)
+                except Exception as error:  # Report the failure on every job of the batch
+                    result = f"Solve failed: {error}"
+                # A failed batch is rolled back, so it does not fail the submissions after it
+                result = self.scheduler.commit(result)
+            for job_id, _, _, _ in batch:
+                self._finish(job_id, result)
+
+    async def _run_solve(self, job_id: str, context: Context) -> None:
+        self.jobs[job_id]["status"] = "running"
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(self.executor, solve_scheduling_problem, context)
+        except Exception as error:
+            result = f"Solve failed: {error}"
+        self._finish(job_id, result)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            method, path, body = await self._read_request(reader)
+            status, payload = self._route(method, path, body)
+        except RequestError as error:
+            status, payload = error.status, {"error": str(error)}
+        except (ValueError, ValidationError) as error:
+            status, payload = 400, {"error": str(error)}
+        except Exception as error:  # Answer instead of leaving the client waiting
+            status, payload = 500, {"error": f"{type(error).__name__}: {error}"}
+        data = json.dumps(payload).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode()
+            + data
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Tuple[str, str, Any]:
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) < 2:
+            raise RequestError(400, "Malformed request line")
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length > self.max_body_bytes:
+            raise RequestError(413, f"Request bodies are limited to {self.max_body_bytes} bytes")
+        body = json.loads(await reader.readexactly(length)) if length else {}
+        return request_line[0].upper(), request_line[1], body
+
+    def _route(self, method: str, path: str, body: Any) -> Tuple[int, Any]:
+        if path == "/tasks" and method == "POST":
+            # Tasks need ids that are unique across terminals, so missing ones are generated
+            records = [dict(record, id=record.get("id") or uuid.uuid4().hex[:8]) for record in body.get("tasks", [])]
+            tasks = TaskTable.from_records(records).to_tasks()
+            tasks += [task for record in body.get("jobs", []) for task in Job(**record).to_tasks()]
+            now = body.get("now")
+            return 202, {"job_id": self.submit_tasks(tasks, None if now is None else int(now), body.get("time_limit"))}
+        if path == "/solve" and method == "POST":
+            tasks = TaskTable.from_records(body.get("tasks", []))
+            machines = MachineTable.from_records(body.get("machines", []))
+            context = Context(
+                machines=machines,
+                tasks=tasks,
+                horizon=body.get("horizon"),
+                pooled=bool(body.get("pooled", False)),
+                solver_config=SolverConfig(max_time_in_seconds=self._time_limit(body.get("time_limit"))),
+            )
+            return 202, {"job_id": self.submit_solve(context)}
+        if path.startswith("/jobs/") and method == "GET":
+            return 200, self.job(path[len("/jobs/"):])
+        if path == "/schedule" and method == "GET":
+            return 200, {"schedule": self.scheduler.schedule}
+        if path == "/health" and method == "GET":
+            statuses = [job["status"] for job in self.jobs.values()]
+            return 200, {"pending": len(self._pending), **{s: statuses.count(s) for s in ("queued", "running", "done", "failed")}}
+        if path in ("/tasks", "/solve", "/schedule", "/health") or path.startswith("/jobs/"):
+            raise RequestError(405, f"{method} is not allowed on {path}")
+        raise RequestError(404, f"No route for {path}")
+
+async def serve(service: SchedulingService, host: str, port: int) -> None:
+    server = await service.start(host, port)
+    print(f"Scheduling service listening on http://{host}:{port}", file=sys.stderr)
+    try:
+        await server.serve_forever()
+    finally:
+        await service.close()
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from src.data.file_io import read_machines
+    parser = argparse.ArgumentParser(description="Serve the scheduler over HTTP.")
+    parser.add_argument("--machines", required=True, help="Machines file with id and type columns")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--horizon", type=int)
+    parser.add_argument("--pooled", action="store_true")
+    parser.add_argument("--batch-window", type=float, default=0.2, help="Seconds to collect submissions into one re-solve")
+    parser.add_argument("--max-time-limit", type=float, default=30.0, help="Cap on the solver time limit of any request")
+    parser.add_argument("--max-tasks", type=int, default=10_000, help="Most tasks accepted per request")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per core)")
+    args = parser.parse_args(argv)
+    service = SchedulingService(
+        read_machines(args.machines).to_machines(),
+        horizon=args.horizon,
+        pooled=args.pooled,
+        batch_window=args.batch_window,
+        max_time_limit=args.max_time_limit,
+        max_tasks=args.max_tasks,
+        max_workers=args.workers,
+    )
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,27 @@
-from src.models.entities import WashingMachine, Task, Context, MachineType, TaskLengthCategory, DueDateCategory
-from src.models.lp_model import solve_scheduling_problem
+import asyncio
+import json
+import re
+import pytest
+from dataclasses import replace
+from src.models.entities import WashingMachine, Task, Context, MachineType, TaskLengthCategory, DueDateCategory, SolverConfig, Job, Operation
+from src.models.lp_model import create_scheduling_model, solve_scheduling_problem, warm_start
+from src.models.analysis import analyze
+from src.models.scenarios import Scenario, apply_scenario, comparison_frame, solve_scenarios
+from src.models.objectives import evaluate_schedule
+from src.models.incremental import IncrementalScheduler
+from src.models.heuristics import PRIORITY_RULES, greedy_schedule
+from src.models.anytime import solve_anytime
+from src.models.decomposition import find_components
+from src.cache import ScheduleCache, context_key
+from src.service import SchedulingService
+from src.models.tables import MachineTable, TaskTable
+from src.models.calendars import Availability
+from src.visualize_gantt import gantt_segments, machine_utilization, visible_segments
+from src.data.file_io import iter_frames, read_machines, read_tasks, write_machines, write_schedule, write_tasks
+from src.benchmarks.workload import WorkloadSpec, generate_workload
+from src.benchmarks.runner import run_suite
+from src.benchmarks.startup import measure_import
+from src.profiling import MemorySink, PhaseProfiler, prometheus_text
 
 def generate_tasks(n):
     tasks = []
@@ -25,6 +47,15 @@ def generate_tasks(n):
         ))
     return tasks
 
+def assert_no_machine_overlap(result):
+    by_machine = {}
+    for task_id, info in result.items():
+        by_machine.setdefault(info["machine"], []).append((info["start"], info["end"]))
+    for machine_id, slots in by_machine.items():
+        slots.sort()
+        for (_, prev_end), (next_start, _) in zip(slots, slots[1:]):
+            assert prev_end <= next_start, f"Overlapping tasks on {machine_id}"
+
 def test_large_batch():
     machines = [WashingMachine(id=f"M{j}", type=MachineType.WASHER) for j in range(25)]
     tasks = generate_tasks(50)
@@ -34,3 +65,442 @@ def test_large_batch():
     assert len(result) == 50, f"Expected 50 tasks in result, got {len(result)}"
     for task_id, info in result.items():
         assert info["end"] - info["start"] == int(TaskLengthCategory.S.value), f"Task {task_id} does not have length 2"
+
+def test_pooled_model_assigns_distinct_machines():
+    machines = [WashingMachine(id=f"W{j}", type=MachineType.WASHER) for j in range(3)]
+    machines += [WashingMachine(id=f"D{j}", type=MachineType.DRIER) for j in range(2)]
+    tasks = generate_tasks(6)
+    tasks.append(Task(id="DRY", arrival_time=0, length=TaskLengthCategory.M, required_type=MachineType.DRIER, required_count=2, due=DueDateCategory.H12))
+    for pooled in (True, False):
+        context = Context(machines=machines, tasks=tasks, pooled=pooled)
+        result = solve_scheduling_problem(context)
+        assert isinstance(result, dict), f"Expected dict, got {type(result)}: {result}"
+        assert result["DRY"]["machine"].startswith("D")
+        assert sorted(result["DRY"]["machines"]) == ["D0", "D1"]
+        assert_no_machine_overlap(result)
+
+def test_incremental_scheduler_freezes_started_tasks():
+    machines = [WashingMachine(id=f"M{j}", type=MachineType.WASHER) for j in range(2)]
+    for pooled in (True, False):
+        scheduler = IncrementalScheduler(machines, pooled=pooled)
+        scheduler.add_tasks(generate_tasks(4))
+        first = scheduler.solve(now=0)
+        started = {task_id: info for task_id, info in first.items() if info["start"] < 1}
+        scheduler.add_tasks([Task(id="NEW", arrival_time=1, length=TaskLengthCategory.XS, required_type=MachineType.WASHER, required_count=1, due=DueDateCategory.H12)])
+        second = scheduler.solve(now=1)
+        assert len(second) == 5
+        assert second["NEW"]["start"] >= 1
+        for task_id, info in started.items():
+            assert (second[task_id]["start"], second[task_id]["machine"]) == (info["start"], info["machine"])
+
+def test_incremental_scheduler_recovers_from_a_failed_solve():
+    scheduler = IncrementalScheduler([WashingMachine(id="M0", type=MachineType.WASHER)])
+    task = dict(arrival_time=0, length=TaskLengthCategory.XS, required_type=MachineType.WASHER, due=DueDateCategory.H12)
+    scheduler.add_tasks([Task(id="A", required_count=1, **task)])
+    assert set(scheduler.solve(now=0)) == {"A"}
+    scheduler.add_tasks([Task(id="BAD", required_count=2, **task)])
+    assert scheduler.solve(now=0) == "No feasible solution found. Task BAD needs 2 washer machines, only 1 exist."
+    assert list(scheduler.tasks) == ["A"]
+    scheduler.add_tasks([Task(id="C", required_count=1, **task)])
+    assert set(scheduler.solve(now=0)) == {"A", "C"}
+    scheduler.remove_tasks(["A"])
+    assert set(scheduler.solve(now=0)) == {"C"}
+
+def test_rolling_horizon_covers_all_tasks():
+    machines = [WashingMachine(id=f"M{j}", type=MachineType.WASHER) for j in range(2)]
+    tasks = [
+        Task(id=f"T{i}", arrival_time=6 * i, length=TaskLengthCategory.M, required_type=MachineType.WASHER, required_count=1, due=DueDateCategory.H12)
+        for i in range(12)
+    ]
+    tasks.append(Task(id="WEEK", arrival_time=0, length=TaskLengthCategory.L, required_type=MachineType.WASHER, required_count=1, due=DueDateCategory.WEEK))
+    for pooled in (True, False):
+        context = Context(machines=machines, tasks=tasks, pooled=pooled, rolling_horizon=True, rolling_window=24, rolling_overlap=12)
+        result = solve_scheduling_problem(context)
+        assert isinstance(result, dict), f"Expected dict, got {type(result)}: {result}"
+        assert set(result) == {t.id for t in tasks}
+        assert sum(info["late"] for info in result.values()) == 0
+        assert_no_machine_overlap(result)
+
+def test_greedy_schedule_respects_counts_and_arrivals():
+    machines = [WashingMachine(id=f"M{j}", type=MachineType.WASHER) for j in range(3)]
+    machines.append(WashingMachine(id="D0", type=MachineType.DRIER))
+    tasks = generate_tasks(5)
+    tasks.append(Task(id="PAIR", arrival_time=3, length=TaskLengthCategory.M, required_type=MachineType.WASHER, required_count=2, due=DueDateCategory.H12))
+    tasks.append(Task(id="DRY", arrival_time=5, length=TaskLengthCategory.XS, required_type=MachineType.DRIER, required_count=1, due=DueDateCategory.H12))
+    for rule in PRIORITY_RULES:
+        result = greedy_schedule(Context(machines=machines, tasks=tasks), rule=rule)
+        assert set(result) == {t.id for t in tasks}
+        assert len(set(result["PAIR"]["machines"])) == 2
+        assert result["PAIR"]["start"] >= 3 and result["DRY"]["start"] >= 5
+        assert result["DRY"]["machine"] == "D0"
+        assert_no_machine_overlap({
+            f"{task_id}@{m_id}": dict(info, machine=m_id)
+            for task_id, info in result.items() for m_id in info["machines"]
+        })
+
+def test_solver_config_is_applied():
+    machines = [WashingMachine(id=f"M{j}", type=MachineType.WASHER) for j in range(3)]
+    log_lines = []
+    config = SolverConfig(max_time_in_seconds=5, num_search_workers=2, random_seed=7, log_callback=log_lines.append)
+    result = solve_scheduling_problem(Context(machines=machines, tasks=generate_tasks(6), solver_config=config))
+    assert isinstance(result, dict)
+    assert log_lines, "Expected the solver log to be captured"
+
+def test_anytime_solve_streams_improving_schedules():
+    machines = [WashingMachine(id=f"M{j}", type=MachineType.WASHER) for j in range(3)]
+    updates = list(solve_anytime(Context(machines=machines, tasks=generate_tasks(12))))
+    assert updates[0]["status"] == "HEURISTIC"
+    assert updates[-1]["status"] == "OPTIMAL"
+    objectives = [update["objective"] for update in updates]
+    assert objectives == sorted(objectives, reverse=True)
+    assert all(len(update["schedule"]) == 12 for update in updates)
+
+def test_task_table_from_records_and_solve():
+    records = [
+        {"id": "A", "arrival_time": 0, "length": "S", "required_type": "washer", "required_count": 1, "due": "12h"},
+        {"id": "B", "arrival_time": 1, "length": 4, "required_type": MachineType.DRIER, "due": DueDateCategory.WEEK, "due_time": 30},
+    ]
+    table = TaskTable.from_records(records)
+    assert table.length.tolist() == [2, 4]
+    assert table.due_time.tolist() == [12, 30]
+    assert table.row(1).required_type == MachineType.DRIER
+    machines = MachineTable.from_records([{"id": "W", "type": "washer"}, {"id": "D", "type": "drier"}])
+    result = solve_scheduling_problem(Context(machines=machines, tasks=table))
+    assert {task_id: info["machine"] for task_id, info in result.items()} == {"A": "W", "B": "D"}
+    with pytest.raises(ValueError, match="unknown length.*required_count below 1"):
+        TaskTable.from_records([dict(records[0], length=3, required_count=0)])
+
+def test_file_io_round_trip(tmp_path):
+    tasks = TaskTable.from_tasks(generate_tasks(7))
+    machines = MachineTable.from_machines([WashingMachine(id=f"M{j}", type=MachineType.WASHER) for j in range(2)])
+    for suffix in ("csv", "jsonl"):
+        write_tasks(tasks, tmp_path / f"tasks.{suffix}")
+        write_machines(machines, tmp_path / f"machines.{suffix}")
+        loaded = read_tasks(tmp_path / f"tasks.{suffix}", chunksize=3)
+        assert loaded.id.tolist() == tasks.id.tolist()
+        assert loaded.due_time.tolist() == tasks.due_time.tolist()
+        result = greedy_schedule(Context(machines=read_machines(tmp_path / f"machines.{suffix}"), tasks=loaded))
+        write_schedule(result, tmp_path / f"schedule.{suffix}")
+        assert len(list(iter_frames(tmp_path / f"schedule.{suffix}", suffix))[0]) == 7
+    # Blanks make pandas read numeric predecessors as floats, 1.0 must still find task 1
+    (tmp_path / "chain.csv").write_text("id,arrival_time,length,required_type,due,predecessor\n1,0,2,washer,12h,\n2,0,2,washer,12h,1\n3,0,2,washer,12h,\n")
+    chain = read_tasks(tmp_path / "chain.csv")
+    assert chain.id.tolist() == ["1", "2", "3"] and chain.predecessor.tolist() == [None, "1", None]
+    assert chain.predecessor_positions().tolist() == [-1, 0, -1]
+    (tmp_path / "bad.csv").write_text("arrival_time,length,required_type,due\n0,2,washer,12h\n0,2,washer,12h\n0,2,toaster,12h\n")
+    with pytest.raises(ValueError, match=re.escape("unknown machine type in rows [2]")):
+        read_tasks(tmp_path / "bad.csv", chunksize=2)
+
+def test_workload_generator_is_seeded_and_runner_records_phases():
+    spec = WorkloadSpec(n_tasks=60, seed=3, arrival="bursty")
+    machines, tasks = generate_workload(spec)
+    again_machines, again_tasks = generate_workload(spec)
+    assert tasks.arrival_time.tolist() == again_tasks.arrival_time.tolist()
+    assert machines.id.tolist() == again_machines.id.tolist()
+    assert len(set(tasks.length.tolist())) > 1 and len(set(tasks.type_code.tolist())) > 1
+    records = run_suite([40], ["pooled", "greedy"], WorkloadSpec(n_tasks=0, seed=1), time_limit=5, isolate=False)
+    assert [r["mode"] for r in records] == ["pooled", "greedy"]
+    assert records[0]["status"] in ("OPTIMAL", "FEASIBLE") and records[0]["build_s"] >= 0
+    assert records[1]["objective"] >= records[0]["bound"]
+
+def test_profiler_records_phases_model_size_and_search():
+    machines = [WashingMachine(id=f"M{j}", type=MachineType.WASHER) for j in range(3)]
+    sink = MemorySink()
+    context = Context(machines=machines, tasks=generate_tasks(12), profiler=PhaseProfiler([sink]))
+    assert isinstance(solve_scheduling_problem(context), dict)
+    report = sink.last
+    assert set(report["phases"]) == {"greedy", "build", "solve", "extract"}
+    assert report["model"]["intervals"] > 0 and report["model"]["variables"] > 0
+    assert report["search"]["status"] == "OPTIMAL" and report["search"]["gap"] == 0
+    rolling = PhaseProfiler()
+    solve_scheduling_problem(Context(machines=machines, tasks=generate_tasks(12), rolling_horizon=True, profiler=rolling))
+    assert rolling.phases["build"]["calls"] >= 1
+    text = prometheus_text(report)
+    assert 'wash_scheduler_phase_wall_seconds{phase="solve"}' in text and 'status="OPTIMAL"' in text
+
+def test_jobs_run_their_stages_in_order():
+    stages = (MachineType.WASHER, MachineType.DRIER, MachineType.IRON)
+    machines = [WashingMachine(id=f"{t.value}{j}", type=t) for t in stages for j in range(2)]
+    lengths = [TaskLengthCategory.S, TaskLengthCategory.M, TaskLengthCategory.XS]
+    jobs = [
+        Job(id=f"J{i}", arrival_time=i % 3, due=DueDateCategory.H12,
+            operations=[Operation(length=lengths[(i + k) % 3], required_type=t) for k, t in enumerate(stages)])
+        for i in range(8)
+    ]
+    tasks = [task for job in jobs for task in job.to_tasks()]
+    assert tasks[1].predecessor == tasks[0].id and tasks[2].due_time == jobs[0].arrival_time + 12
+    by_id = {t.id: t for t in tasks}
+    for rule in PRIORITY_RULES:
+        greedy = greedy_schedule(Context(machines=machines, tasks=tasks), rule=rule)
+        assert all(greedy[t.id]["start"] >= greedy[t.predecessor]["end"] for t in tasks if t.predecessor)
+    for pooled in (False, True):
+        result = solve_scheduling_problem(Context(machines=machines, tasks=tasks, pooled=pooled))
+        assert_no_machine_overlap(result)
+        for task_id, info in result.items():
+            task = by_id[task_id]
+            if task.predecessor:
+                assert info["start"] >= result[task.predecessor]["end"]
+            if task_id.endswith("-2"):
+                assert info["late"] == max(0, info["end"] - task.due_time)
+            else:
+                assert info["late"] == 0
+
+def test_decomposition_splits_types_and_time_clusters():
+    machines = [WashingMachine(id=f"{t.value}{j}", type=t) for t in (MachineType.WASHER, MachineType.DRIER) for j in range(2)]
+    tasks = [
+        Task(id=f"{t.value}{batch}{i}", arrival_time=batch * 10 + i, length=TaskLengthCategory.S,
+             due=DueDateCategory.H12, required_type=t, required_count=1)
+        for t in (MachineType.WASHER, MachineType.DRIER) for batch in range(2) for i in range(3)
+    ]
+    context = Context(machines=machines, tasks=tasks)
+    table = TaskTable.from_tasks(tasks)
+    assert len(find_components(table, context)) == 2
+    assert len(find_components(table, context, greedy_schedule(context), min_cluster_size=1)) == 4
+    linked = tasks[:-1] + [tasks[-1].model_copy(update={"predecessor": tasks[0].id})]
+    assert len(find_components(TaskTable.from_tasks(linked), Context(machines=machines, tasks=linked))) == 1
+    expected = solve_scheduling_problem(context)
+    result = solve_scheduling_problem(Context(machines=machines, tasks=tasks, decompose=True, max_workers=2))
+    assert list(result) == list(expected)
+    assert sum(i["late"] for i in result.values()) == sum(i["late"] for i in expected.values())
+    assert_no_machine_overlap(result)
+    # Two time clusters of the default size; without a warm start only the cut keeps the first off the second's machines
+    washers = machines[:2]
+    batches = [
+        Task(id=f"B{batch}-{i}", arrival_time=40 * batch, length=TaskLengthCategory.XS, required_type=MachineType.WASHER, required_count=1, due=DueDateCategory.WEEK)
+        for batch in range(2) for i in range(60)
+    ]
+    context = Context(machines=washers, tasks=batches, decompose=True, max_workers=1, greedy_hint=False, solver_config=SolverConfig(num_search_workers=2))
+    assert len(find_components(TaskTable.from_tasks(batches), context, greedy_schedule(context))) == 2
+    result = solve_scheduling_problem(context)
+    assert max(info["end"] for task_id, info in result.items() if task_id.startswith("B0")) <= 40
+    assert_no_machine_overlap(result)
+
+def test_schedule_cache_skips_solving_repeated_contexts(tmp_path):
+    machines = [WashingMachine(id=f"M{j}", type=MachineType.WASHER) for j in range(2)]
+    tasks = generate_tasks(6)
+    cache = ScheduleCache(max_entries=1, directory=tmp_path)
+    first = solve_scheduling_problem(Context(machines=machines, tasks=tasks, cache=cache))
+    assert cache.misses == 1 and len(list(tmp_path.glob("*.json"))) == 1
+    # A new log callback does not change the key, a different horizon does
+    logged = Context(machines=machines, tasks=tasks, solver_config=SolverConfig(log_callback=print))
+    assert context_key(logged) == context_key(Context(machines=machines, tasks=tasks))
+    assert context_key(logged) != context_key(Context(machines=machines, tasks=tasks, horizon=50))
+    sink = MemorySink()
+    again = solve_scheduling_problem(Context(machines=machines, tasks=tasks, cache=cache, profiler=PhaseProfiler([sink])))
+    assert again == first and cache.hits == 1 and set(sink.last["phases"]) == {"cache"}
+    # Served from disk by a fresh cache, then dropped once too old
+    assert ScheduleCache(directory=tmp_path).get(context_key(logged)) == first
+    stale = ScheduleCache(directory=tmp_path, max_age_seconds=-1)
+    assert stale.get(context_key(logged)) is None and not list(tmp_path.glob("*.json"))
+
+def test_service_coalesces_submissions_and_reports_jobs():
+    async def request(port, method, path, body=None):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        data = json.dumps(body).encode() if body is not None else b""
+        writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+        response = await reader.read()
+        writer.close()
+        head, _, payload = response.partition(b"\r\n\r\n")
+        return int(head.split()[1]), json.loads(payload)
+
+    async def scenario():
+        machines = [WashingMachine(id=f"M{j}", type=MachineType.WASHER) for j in range(2)]
+        service = SchedulingService(machines, batch_window=0.1, max_tasks=5)
+        server = await service.start(port=0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            task = {"length": "2", "required_type": "washer", "due": "12h"}
+            submitted = [await request(port, "POST", "/tasks", {"tasks": [dict(task, id=f"T{i}")], "time_limit": 5}) for i in range(3)]
+            assert all(status == 202 for status, _ in submitted)
+            assert (await request(port, "POST", "/tasks", {"tasks": [task] * 6}))[0] == 413
+            assert (await request(port, "POST", "/tasks", {"tasks": [dict(task, length="huge")]}))[0] == 400
+            solo = (await request(port, "POST", "/solve", {"machines": [{"id": "W", "type": "washer"}], "tasks": [task]}))[1]
+            for _ in range(100):
+                jobs = [(await request(port, "GET", f"/jobs/{body['job_id']}"))[1] for _, body in submitted]
+                if all(job["status"] == "done" for job in jobs):
+                    break
+                await asyncio.sleep(0.05)
+            assert [list(job["schedule"]) for job in jobs] == [["T0"], ["T1"], ["T2"]]
+            assert len(service.scheduler.schedule) == 3
+            assert (await request(port, "GET", "/jobs/unknown"))[0] == 404
+            for _ in range(100):
+                solo_job = (await request(port, "GET", f"/jobs/{solo['job_id']}"))[1]
+                if solo_job["status"] == "done":
+                    break
+                await asyncio.sleep(0.05)
+            assert solo_job["total_late"] == 0
+            # Without "now" the service plans from the hours it has been running; time never moves back
+            service.started -= 5 * 3600
+            before = {task_id: dict(info) for task_id, info in service.scheduler.schedule.items()}
+            late = await request(port, "POST", "/tasks", {"tasks": [dict(task, id="T3")]})
+            assert late[0] == 202 and service.now == 5
+            for _ in range(100):
+                job = (await request(port, "GET", f"/jobs/{late[1]['job_id']}"))[1]
+                if job["status"] == "done":
+                    break
+                await asyncio.sleep(0.05)
+            # Tasks started before hour 5 stay where they are
+            assert job["schedule"]["T3"]["start"] >= 5
+            assert all(service.scheduler.schedule[task_id] == info for task_id, info in before.items() if info["start"] < 5)
+            status, body = await request(port, "POST", "/tasks", {"tasks": [dict(task, id="T4")], "now": 4})
+            assert status == 400 and "before hour 5" in body["error"]
+            # Tasks that can never run are turned away, so they do not fail the submissions after them
+            status, body = await request(port, "POST", "/tasks", {"tasks": [dict(task, id="BAD", required_count=3)], "now": 6})
+            assert status == 400 and "Task BAD needs 3 washer machines, only 2 exist" in body["error"]
+            good = await request(port, "POST", "/tasks", {"tasks": [dict(task, id="T4")], "now": 6})
+            assert good[0] == 202
+            for _ in range(100):
+                job = (await request(port, "GET", f"/jobs/{good[1]['job_id']}"))[1]
+                if job["status"] == "done":
+                    break
+                await asyncio.sleep(0.05)
+            assert job["schedule"]["T4"]["start"] >= 6
+            assert "BAD" not in service.scheduler.tasks
+        finally:
+            await service.close()
+
+    asyncio.run(scenario())
+
+def test_time_slots_and_tightened_domains():
+    machines = [WashingMachine(id="M0", type=MachineType.WASHER)]
+    tasks = [Task(id=f"T{i}", arrival_time=0, length=TaskLengthCategory.M, required_type=MachineType.WASHER, required_count=1, due=DueDateCategory.H12) for i in range(4)]
+    hourly = solve_scheduling_problem(Context(machines=machines, tasks=tasks))
+    quarter = solve_scheduling_problem(Context(machines=machines, tasks=tasks, slot_minutes=15))
+    assert sum(info["late"] for info in quarter.values()) == sum(info["late"] for info in hourly.values()) == 4
+    assert all(info["end"] - info["start"] == 4.0 for info in quarter.values())
+    assert_no_machine_overlap(quarter)
+
+    def domain(model, var):
+        return list(model.proto.variables[var.index].domain)
+
+    model, variables = create_scheduling_model(Context(machines=machines, tasks=tasks, horizon=20, lateness_bound=4, slot_minutes=15))
+    assert domain(model, variables.start_vars["T0"]) == [0, 64]  # Quarter hours, room for 4 hours before hour 20
+    assert domain(model, variables.late_vars["T0"]) == [0, 16]
+    greedy = greedy_schedule(Context(machines=machines, tasks=tasks))
+    model, variables = create_scheduling_model(Context(machines=machines, tasks=tasks, hints=greedy, fix_slack=6))
+    pinned = [task_id for task_id, var in variables.start_vars.items() if domain(model, var)[0] == domain(model, var)[1]]
+    assert pinned == [task_id for task_id, info in greedy.items() if info["end"] + 6 <= 12] == ["T0"]
+
+def test_lexicographic_and_weighted_objectives():
+    machines = [WashingMachine(id=f"M{j}", type=MachineType.WASHER) for j in range(2)]
+    tasks = [Task(id=f"T{i}", arrival_time=0, length=TaskLengthCategory.M, required_type=MachineType.WASHER, required_count=1, due=DueDateCategory.WEEK) for i in range(4)]
+    context = Context(machines=machines, tasks=tasks, objectives=["tardiness", "makespan"])
+    metrics = evaluate_schedule(solve_scheduling_problem(context), context)
+    assert (metrics["tardiness"], metrics["makespan"], metrics["idle"]) == (0, 8, 0)
+    final = list(solve_anytime(context))[-1]
+    assert (final["status"], final["stage"], final["objective"]) == ("OPTIMAL", 1, 8)
+    greedy = greedy_schedule(context)
+    assert warm_start(context, greedy).lateness_bound == 0
+    assert warm_start(Context(machines=machines, tasks=tasks, objectives=["makespan"]), greedy).lateness_bound is None
+    # Same tardiness either way, but the 12h order weighs more than the weekly one
+    urgent = [
+        Task(id=task_id, arrival_time=0, length=TaskLengthCategory.M, required_type=MachineType.WASHER, required_count=1, due=due, due_time=4)
+        for task_id, due in (("WEEKLY", DueDateCategory.WEEK), ("RUSH", DueDateCategory.H12))
+    ]
+    weighted = solve_scheduling_problem(Context(machines=machines[:1], tasks=urgent, objectives=["weighted_tardiness"]))
+    assert weighted["RUSH"]["start"] == 0 and weighted["WEEKLY"]["late"] == 4
+
+def test_machine_downtime_is_respected(tmp_path):
+    calendar = Availability([(5, 8), (2, 6), (20, 22)])
+    assert (calendar.starts, calendar.ends) == ([2, 20], [8, 22])
+    assert calendar.is_free(0, 2) and not calendar.is_free(1, 3) and calendar.is_free(8, 20)
+    assert calendar.next_free(1, 2) == 8 and calendar.next_free(8, 14) == 22
+    # Identical washers but for their calendars: RUSH only fits on UP, LATER only on DOWN
+    machines = [
+        WashingMachine(id="DOWN", type=MachineType.WASHER, downtime=[(0, 4)]),
+        WashingMachine(id="UP", type=MachineType.WASHER, downtime=[(2, 24)]),
+    ]
+    tasks = [
+        Task(id=task_id, arrival_time=0, length=TaskLengthCategory.S, required_type=MachineType.WASHER, required_count=1, due=DueDateCategory.H12, due_time=due_time)
+        for task_id, due_time in (("RUSH", 2), ("LATER", 6))
+    ]
+    for pooled in (False, True):
+        result = solve_scheduling_problem(Context(machines=machines, tasks=tasks, pooled=pooled))
+        assert [(info["machine"], info["start"], info["late"]) for info in result.values()] == [("UP", 0, 0), ("DOWN", 4, 0)]
+    greedy = greedy_schedule(Context(machines=machines, tasks=tasks))
+    assert [(info["machine"], info["start"]) for info in greedy.values()] == [("UP", 0), ("DOWN", 4)]
+    write_machines(MachineTable.from_machines(machines), tmp_path / "machines.csv")
+    loaded = read_machines(tmp_path / "machines.csv")
+    assert loaded.downtime.tolist() == [((0, 4),), ((2, 24),)]
+    assert context_key(Context(machines=loaded, tasks=tasks)) != context_key(Context(machines=machines[:1] + [WashingMachine(id="UP", type=MachineType.WASHER)], tasks=tasks))
+
+def test_gantt_segments_and_utilization():
+    schedule = {
+        "A": {"start": 0, "end": 2, "late": 0, "machine": "M1", "machines": ["M1", "M2"]},
+        "B": {"start": 3, "end": 7, "late": 1, "machine": "M1", "machines": ["M1"]},
+    }
+    segments = gantt_segments(schedule)
+    assert segments["machine"].tolist() == ["M1", "M2", "M1"] and segments["task"].tolist() == ["A", "A", "B"]
+    assert visible_segments(segments, (2, 3))["task"].tolist() == []
+    bins, usage = machine_utilization(segments, ["M1", "M2", "IDLE"], (0, 8), 4)
+    assert bins.tolist() == [0, 4] and usage.tolist() == [[0.75, 0.75], [0.5, 0], [0, 0]]
+    # A partial last bin is measured against its own length
+    assert machine_utilization(segments, ["M1"], (1, 6.5), 2)[1].tolist() == [[0.5, 1, 1]]
+
+def test_lns_improves_greedy_schedule_through_neighbourhoods():
+    machines = [WashingMachine(id="W", type=MachineType.WASHER), WashingMachine(id="D", type=MachineType.DRIER)]
+    tasks = []
+    # Due-date order runs the long task first and makes the three short ones late
+    for machine_type in (MachineType.WASHER, MachineType.DRIER):
+        tasks.append(Task(id=f"{machine_type.value}-long", arrival_time=0, length=TaskLengthCategory.L, required_type=machine_type, required_count=1, due=DueDateCategory.H12, due_time=8))
+        tasks += [Task(id=f"{machine_type.value}-{k}", arrival_time=0, length=TaskLengthCategory.S, required_type=machine_type, required_count=1, due=DueDateCategory.H12, due_time=9) for k in range(3)]
+    context = Context(machines=machines, tasks=tasks, lns=True, lns_size=4, lns_rounds=10, max_workers=1)
+    greedy = greedy_schedule(context)
+    result = solve_scheduling_problem(context)
+    assert sum(info["late"] for info in greedy.values()) == 18
+    # Each neighbourhood holds at most one machine type's tasks, the other type stays as downtime
+    assert sum(info["late"] for info in result.values()) == 12
+    assert list(result) == [task.id for task in tasks]
+    assert_no_machine_overlap(result)
+
+def test_presolve_analysis_bounds_and_certificates():
+    washer = [WashingMachine(id="W", type=MachineType.WASHER, downtime=[(0, 2)])]
+    tasks = [
+        Task(id=f"T{k}", arrival_time=0, length=TaskLengthCategory.S, required_type=MachineType.WASHER, required_count=1, due=DueDateCategory.H12, due_time=2)
+        for k in range(3)
+    ]
+    # Nothing runs before the downtime ends: 6 hours of work are due when the washer comes up
+    analysis = analyze(Context(machines=washer, tasks=tasks, horizon=8))
+    assert analysis.infeasible == [] and analysis.lateness_bound == 6
+    assert analysis.load["washer"] == {"machines": 1, "work": 6.0, "capacity": 6.0, "load": 1.0}
+    sink = MemorySink()
+    result = solve_scheduling_problem(Context(machines=washer, tasks=tasks, horizon=8, profiler=PhaseProfiler([sink])))
+    assert sum(info["late"] for info in result.values()) == 12 and sink.last["analysis"]["lateness_bound"] == 6
+    # One hour short before the horizon
+    overloaded = solve_scheduling_problem(Context(machines=washer, tasks=tasks, horizon=7))
+    assert overloaded.startswith("No feasible solution found.") and "6 hours of work released from hour 0" in overloaded
+    pair = [Task(id="PAIR", arrival_time=0, length=TaskLengthCategory.S, required_type=MachineType.WASHER, required_count=2, due=DueDateCategory.H12, due_time=2)]
+    updates = list(solve_anytime(Context(machines=washer, tasks=pair)))
+    assert [update["status"] for update in updates] == ["INFEASIBLE"]
+    assert updates[0]["schedule"] == "No feasible solution found. Task PAIR needs 2 washer machines, only 1 exist."
+
+def test_core_and_cli_import_without_the_solver():
+    for module in ("src.core", "src.cli"):
+        record = measure_import(module, repeats=1)
+        assert record["loaded"] == [] and record["import_s"] > 0
+    assert "ortools" in measure_import("src.models.lp_model", repeats=1)["loaded"]
+
+def test_scenarios_compare_capacity_changes():
+    machines = [WashingMachine(id="W1", type=MachineType.WASHER), WashingMachine(id="D1", type=MachineType.DRIER)]
+    tasks = []
+    for k in range(4):
+        tasks.append(Task(id=f"wash{k}", arrival_time=0, length=TaskLengthCategory.S, required_type=MachineType.WASHER, required_count=1, due=DueDateCategory.H12, due_time=12))
+        tasks.append(Task(id=f"dry{k}", arrival_time=0, length=TaskLengthCategory.M, required_type=MachineType.DRIER, required_count=1, due=DueDateCategory.H12, due_time=12, predecessor=f"wash{k}"))
+    scenarios = [
+        Scenario("base"),
+        Scenario("one more drier", add_machines={MachineType.DRIER: 1}),
+        Scenario("twice the 12h orders", more_orders={DueDateCategory.H12: 1.0}),
+        Scenario("no washer", remove_machines=["W1"]),
+    ]
+    copied, _ = apply_scenario(TaskTable.from_tasks(tasks), MachineTable.from_machines(machines), scenarios[2])
+    assert len(copied) == 16 and copied.predecessor[copied.id == "dry3~1"].tolist() == ["wash3~1"]
+    context = Context(machines=machines, tasks=tasks, max_workers=1)
+    records = solve_scenarios(context, scenarios)
+    table = comparison_frame(records)
+    assert table["status"].tolist() == ["SOLVED", "SOLVED", "SOLVED", "INFEASIBLE"]
+    # The drier is the bottleneck: 4 jobs of 2+4 hours end at 18 on one, at 12 (the last wash ends at 8) on two
+    assert table["makespan"].tolist()[:2] == [18, 12] and table.loc["one more drier", "tardiness"] == 0
+    assert table.loc["base", "utilization_drier"] == 16 / 18 and table.loc["base", "lateness_bound"] <= table.loc["base", "tardiness"]
+    # Solved in worker processes from shared memory, the results are the same
+    shared = solve_scenarios(replace(context, max_workers=2), scenarios)
+    assert [record["schedule"] for record in shared] == [record["schedule"] for record in records]
@@ -1,51 +1,161 @@
 
-
-import plotly.figure_factory as ff
-import plotly.offline as pyo
-from typing import Dict, Any, Optional
+import math
+import numpy as np
+from typing import Dict, Any, Optional, Sequence, Tuple
 import uuid
-from datetime import datetime, timedelta
+
+# All chart times are relative to Jan 1st, 2025, in hours
+BASE_TIME = np.datetime64("2025-01-01T00:00")
+
+def gantt_segments(schedule: Dict[str, Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """
+    One bar per task and machine it runs on, as columns: "machine", "task",
+    "start", "end" and "late" (hours).
+    """
+    machine_lists = [info.get("machines") or [info.get("machine", "N/A")] for info in schedule.values()]
+    repeats = np.fromiter((len(machines) for machines in machine_lists), dtype=np.int64, count=len(machine_lists))
+
+    def column(key: str) -> np.ndarray:
+        values = np.fromiter((info[key] for info in schedule.values()), dtype=np.float64, count=len(schedule))
+        return np.repeat(values, repeats)
+
+    return {
+        "machine": np.array([m_id for machines in machine_lists for m_id in machines], dtype=object),
+        "task": np.repeat(np.array(list(schedule), dtype=object), repeats),
+        "start": column("start"),
+        "end": column("end"),
+        "late": column("late"),
+    }
+
+def visible_segments(segments: Dict[str, np.ndarray], window: Tuple[float, float]) -> Dict[str, np.ndarray]:
+    """
+    The bars that overlap the window [start, end) in hours.
+    """
+    mask = (segments["end"] > window[0]) & (segments["start"] < window[1])
+    return {name: values[mask] for name, values in segments.items()}
+
+def machine_utilization(
+    segments: Dict[str, np.ndarray],
+    machines: Sequence[str],
+    window: Tuple[float, float],
+    bin_hours: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Share of each time bin that each machine is busy, for the window split into
+    bins of bin_hours. Returns the bin starts (hours) and a machines x bins matrix.
+    The busy time up to t is the sum of (t - start) over bars started before t,
+    minus (t - end) over bars ended before t, so sorted starts and ends with
+    prefix sums give it at every bin edge without looking at bars one by one.
+    """
+    n_bins = max(1, math.ceil((window[1] - window[0]) / bin_hours))
+    edges = np.minimum(window[0] + bin_hours * np.arange(n_bins + 1, dtype=np.float64), window[1])
+    usage = np.zeros((len(machines), n_bins), dtype=np.float64)
+    row_of = {m_id: row for row, m_id in enumerate(machines)}
+    rows = np.fromiter((row_of.get(m_id, -1) for m_id in segments["machine"].tolist()), dtype=np.int64, count=len(segments["machine"]))
+    order = np.argsort(rows, kind="stable")
+    bounds = np.searchsorted(rows[order], np.arange(len(machines) + 1))
+    for row in range(len(machines)):
+        picked = order[bounds[row]:bounds[row + 1]]
+        busy = _busy_until(np.sort(segments["start"][picked]), edges) - _busy_until(np.sort(segments["end"][picked]), edges)
+        usage[row] = np.diff(busy)
+    return edges[:-1], np.clip(usage / np.diff(edges), 0, 1)
+
+def _busy_until(times: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """
+    Sum of max(0, edge - t) over the sorted times, at every edge.
+    """
+    count = np.searchsorted(times, edges)
+    prefix = np.concatenate([[0.0], np.cumsum(times)])
+    return count * edges - prefix[count]
+
+def _timestamps(hours: np.ndarray) -> np.ndarray:
+    """
+    ISO timestamps (minute resolution) of hours after BASE_TIME, for date axes.
+    """
+    minutes = np.round(np.asarray(hours, dtype=np.float64) * 60).astype(np.int64).astype("timedelta64[m]")
+    return np.datetime_as_string(BASE_TIME + minutes, unit="m")
+
+def gantt_figure(
+    schedule: Dict[str, Dict[str, Any]],
+    machines: Optional[Sequence[str]] = None,
+    window: Optional[Tuple[float, float]] = None,
+    max_bars: int = 5000,
+    max_bins: int = 300,
+    title: str = "Schedule (Start: Jan 1st, 2025, Tasks as bars, Machines as rows)",
+) -> Any:
+    """
+    Gantt chart of a schedule with machines as rows, built to stay responsive
+    for large schedules. When at most max_bars bars overlap the window (hours,
+    default: the whole schedule), they are drawn as WebGL line segments in two
+    traces, on time and late. Otherwise each machine's utilization over the
+    window is shown as a heatmap of at most max_bins time bins; narrow the
+    window to see the bars. machines sets the rows and their order (default:
+    the machines used, sorted).
+    """
+    import plotly.graph_objects as go
+    segments = gantt_segments(schedule)
+    if machines is None:
+        machines = sorted(set(segments["machine"].tolist()))
+    machines = list(machines)
+    if window is None:
+        window = (0.0, float(segments["end"].max(initial=0)) or 1.0)
+    shown = visible_segments(segments, window)
+    fig = go.Figure()
+    if len(shown["task"]) <= max_bars:
+        width = max(2, min(20, 400 // max(len(machines), 1)))
+        for late, name, color in ((False, "On time", "#1f77b4"), (True, "Late", "#d62728")):
+            picked = {key: values[(shown["late"] > 0) == late] for key, values in shown.items()}
+            # Bars are (start, end) pairs separated by gaps, so one trace draws all of them
+            x = np.full(3 * len(picked["task"]), None, dtype=object)
+            x[0::3] = _timestamps(picked["start"])
+            x[1::3] = _timestamps(picked["end"])
+            y = np.full(len(x), None, dtype=object)
+            y[0::3] = y[1::3] = picked["machine"]
+            text = np.full(len(x), None, dtype=object)
+            text[0::3] = text[1::3] = picked["task"]
+            fig.add_trace(go.Scattergl(
+                x=x, y=y, text=text, mode="lines", name=name,
+                line=dict(width=width, color=color),
+                hovertemplate="%{text}<br>%{x}<extra></extra>",
+            ))
+        title = f"{title}, {len(shown['task'])} bars"
+    else:
+        bin_hours = max(1, math.ceil((window[1] - window[0]) / max_bins))
+        bins, usage = machine_utilization(shown, machines, window, bin_hours)
+        fig.add_trace(go.Heatmap(
+            z=usage, x=_timestamps(bins), y=machines, zmin=0, zmax=1, colorscale="Blues",
+            colorbar=dict(title="Utilization"),
+            hovertemplate="%{y}<br>%{x}<br>%{z:.0%} busy<extra></extra>",
+        ))
+        title = f"{title}, utilization per {bin_hours}h (narrow the window for bars)"
+    fig.update_layout(
+        title=title,
+        xaxis=dict(type="date", range=list(_timestamps(np.array(window))), showgrid=True),
+        yaxis=dict(type="category", categoryorder="array", categoryarray=machines[::-1], showgrid=True),
+        height=max(400, min(1200, 40 + 20 * len(machines))),
+    )
+    return fig
 
 def visualize_gantt(
     schedule: Dict[str, dict[str, Any]],
     filename: Optional[str] = None,
     auto_open: bool = True,
     run_id: Optional[str] = None,
+    window: Optional[Tuple[float, float]] = None,
 ) -> None:
     """
     Visualize the schedule as a Gantt chart and save as HTML (optionally open in browser).
     schedule: Dict mapping task ids to dicts with 'start', 'end', and optionally 'machine' keys.
     filename: Optional custom filename. If not provided, uses run_id or generates a new one.
     run_id: Optional run identifier to use in the filename.
+    window: Optional (start, end) in hours to draw bars for; see gantt_figure.
     """
+    import plotly.offline as pyo
     if filename is None:
         if run_id is None:
             run_id = str(uuid.uuid4())[:8]
         filename = f"gantt_{run_id}.html"
-    # All times are relative to Jan 1st, 2025, in hours
-    base_time = datetime(2025, 1, 1, 0, 0, 0)
-    bars = []
-    for task_id, info in schedule.items():
-        start = base_time + timedelta(hours=info['start'])
-        end = base_time + timedelta(hours=info['end'])
-        machine = info.get('machine', 'N/A')
-        bars.append(dict(Task=machine, Start=start, Finish=end, Resource=task_id, Description=task_id))
-    fig = ff.create_gantt(
-        bars,
-        index_col='Task',  # Each row is a machine
-        show_colorbar=True,
-        group_tasks=True,
-        showgrid_x=True,
-        showgrid_y=True,
-        title="Dry Clean Schedule (Start: Jan 1st, 2025, Tasks as bars, Machines as rows)",
-        show_hover_fill=True,
-        bar_width=0.4,
-    )
-    # Add TaskID as annotation on each bar
-    # Add TaskID as annotation on each bar (works for plotly.graph_objects, not figure_factory)
-    # Instead, add hovertext and rely on built-in labels for now
-    # (ff.create_gantt groups by resource, so fig['data'] is per resource, not per task)
-    # Plotly's figure_factory does not support per-bar text labels directly
+    fig = gantt_figure(schedule, window=window, title="Dry Clean Schedule (Start: Jan 1st, 2025, Tasks as bars, Machines as rows)")
     pyo.plot(fig, filename=filename, auto_open=auto_open)
 
 if __name__ == "__main__":